@@ -1,42 +1,73 @@
-from flask import Flask, render_template, send_file
-from bancos.brou.routes import brou_bp
-from bancos.itau.routes import itau_bp
-from bancos.santander.routes import santander_bp
-import os
-import threading
-
-app = Flask(__name__)
-
-# Registrar Blueprints
-app.register_blueprint(brou_bp, url_prefix="/brou")
-app.register_blueprint(itau_bp, url_prefix="/itau")
-app.register_blueprint(santander_bp, url_prefix="/santander")
-
-
-@app.route("/")
-def index():
-    return render_template("landing.html")
-
-
-@app.route("/descargar_excel/<nombre_archivo>")
-def descargar_excel(nombre_archivo):
-    ruta = os.path.join("archivos_temp", nombre_archivo)
-    if not os.path.exists(ruta):
-        return "Archivo no encontrado", 404
-
-    response = send_file(ruta, as_attachment=True)
-
-    def eliminar_archivo():
-        try:
-            os.remove(ruta)
-        except Exception as e:
-            print(f"Error al eliminar archivo: {e}")
-
-    # Delay para evitar problemas de bloqueo en Windows
-    threading.Timer(5.0, eliminar_archivo).start()
-
-    return response
-
-
-if __name__ == "__main__":
-    app.run(debug=False)
+from flask import Flask, render_template, send_file, request, jsonify
+from bancos.brou.routes import brou_bp
+from bancos.itau.routes import itau_bp
+from bancos.santander.routes import santander_bp
+from bancos.trabajos.routes import trabajos_bp
+from bancos.api.routes import api_bp
+from bancos.metricas.routes import metricas_bp
+from bancos.assets.routes import assets_bp
+from bancos.metricas.registro import etapa
+from bancos.almacen import obtener_resultado
+from bancos.compresion import comprimir_respuesta
+from bancos.excel import generar_excel, MIMETYPE_XLSX
+
+app = Flask(__name__)
+
+# Movimientos por página de la tabla de resultado.html
+MOVIMIENTOS_POR_PAGINA = 100
+MAX_MOVIMIENTOS_POR_PAGINA = 1000
+
+# Registrar Blueprints
+app.register_blueprint(brou_bp, url_prefix="/brou")
+app.register_blueprint(itau_bp, url_prefix="/itau")
+app.register_blueprint(santander_bp, url_prefix="/santander")
+app.register_blueprint(trabajos_bp, url_prefix="/trabajos")
+app.register_blueprint(api_bp, url_prefix="/api/v1")
+app.register_blueprint(metricas_bp)
+app.register_blueprint(assets_bp, url_prefix="/assets")
+
+# Comprime HTML/JSON/CSV según Accept-Encoding (ver bancos/compresion.py)
+app.after_request(comprimir_respuesta)
+
+
+@app.route("/")
+def index():
+    return render_template("landing.html")
+
+
+@app.route("/descargar_excel/<nombre_archivo>")
+def descargar_excel(nombre_archivo):
+    token = nombre_archivo.removesuffix(".xlsx")
+    resultado = obtener_resultado(token)
+    if resultado is None:
+        return "Archivo no encontrado", 404
+
+    # El workbook se arma recién ahora, en memoria
+    with etapa("excel"):
+        excel = generar_excel(resultado.movimientos)
+
+    return send_file(
+        excel,
+        as_attachment=True,
+        download_name=nombre_archivo,
+        mimetype=MIMETYPE_XLSX,
+    )
+
+
+@app.route("/movimientos/<token>")
+def movimientos(token):
+    """Página de la tabla de movimientos de un resultado (?desde=0&limite=100)."""
+    resultado = obtener_resultado(token)
+    if resultado is None:
+        return jsonify({"success": False, "error_type": "not_found",
+                        "message": "El resultado no existe o ya venció."}), 404
+
+    desde = max(request.args.get("desde", 0, type=int), 0)
+    limite = request.args.get("limite", MOVIMIENTOS_POR_PAGINA, type=int)
+    limite = min(max(limite, 1), MAX_MOVIMIENTOS_POR_PAGINA)
+
+    return jsonify({"success": True, **resultado.pagina_movimientos(desde, limite)})
+
+
+if __name__ == "__main__":
+    app.run(debug=False)
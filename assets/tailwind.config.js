@@ -0,0 +1,32 @@
+// Configuración de Tailwind para el CSS precompilado (python -m bancos.assets.construir).
+// Los colores son los mismos que define landing.html para el modo CDN.
+module.exports = {
+  content: ["./templates/**/*.html"],
+  theme: {
+    extend: {
+      colors: {
+        cream: {
+          base: '#F4F1EC',
+          light: '#FAF8F5',
+          dark: '#E8E4DD',
+        },
+        olive: {
+          DEFAULT: '#6B7F5A',
+          dark: '#3F4F3C',
+          soft: '#A8B79A',
+          hover: '#5A6D4A',
+        },
+        text: {
+          primary: '#2E2E2E',
+          secondary: '#6B6B6B',
+          disabled: '#9A9A9A',
+        },
+        state: {
+          success: '#6E8F6A',
+          warning: '#C2A24D',
+          error: '#9B4A3C',
+        }
+      }
+    }
+  }
+}
@@ -0,0 +1,338 @@
+"""
+Almacén temporal en memoria para artefactos de corta vida.
+
+Guarda cada ResultadoAnalisis durante unos minutos para poder generar el
+Excel recién cuando el usuario lo descarga, sin escribir nada en disco.
+
+El almacén tiene vencimiento (TTL) y presupuesto de bytes y de cantidad
+de entradas. Los vencidos se barren de forma perezosa en cada operación
+(heap ordenado por vencimiento, sin hilos de limpieza) y, si se supera el
+presupuesto, se descartan primero las entradas usadas hace más tiempo.
+
+La memoria es de cada proceso: con varios workers de gunicorn la descarga
+del Excel puede llegar a otro worker. Para ese caso, si está definida la
+variable de entorno CUOTAVISTA_RESULTADOS_DIR los resultados se guardan en
+ese directorio compartido (ResultadosDirectorio), como los PDFs pendientes
+de Santander.
+"""
+from collections import OrderedDict
+import heapq
+import os
+import pickle
+import re
+import threading
+import time
+import uuid
+
+
+# Tiempo que se conserva un resultado (segundos)
+TTL_RESULTADOS = 10 * 60
+
+# Presupuesto del almacén de resultados
+MAX_BYTES_RESULTADOS = 256 * 1024 * 1024
+MAX_ENTRADAS_RESULTADOS = 500
+
+# Cada cuánto se barre un almacén en directorio (segundos)
+INTERVALO_LIMPIEZA_DIRECTORIO = 30
+
+_PATRON_TOKEN = re.compile(r'[0-9a-f]{32}')
+
+
+class AlmacenTemporal:
+    """
+    Diccionario en memoria con TTL y presupuesto de bytes/entradas.
+
+    Es thread-safe. Cada entrada registra su tamaño aproximado en bytes,
+    informado por quien la guarda.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, max_entradas: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+
+        # clave -> (valor, tamano, vence); el orden es de uso (LRU al principio)
+        self._entradas = OrderedDict()
+        self._vencimientos = []  # heap de (vence, clave)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entradas)
+
+    @property
+    def bytes_usados(self) -> int:
+        return self._bytes
+
+    def guardar(self, valor, tamano: int, clave: str = None) -> str:
+        """
+        Guarda un valor y devuelve su clave (nueva si no se indica).
+
+        Si el valor solo no entra en el presupuesto de bytes, no se guarda
+        pero la clave se devuelve igual (obtener devolverá None).
+        """
+        clave = clave or uuid.uuid4().hex
+        ahora = time.monotonic()
+
+        with self._lock:
+            self._barrer(ahora)
+            self._quitar(clave)
+
+            if tamano > self.max_bytes:
+                return clave
+
+            # Liberar lugar descartando las entradas usadas hace más tiempo
+            while self._entradas and (
+                self._bytes + tamano > self.max_bytes
+                or len(self._entradas) >= self.max_entradas
+            ):
+                self._quitar(next(iter(self._entradas)))
+
+            vence = ahora + self.ttl
+            self._entradas[clave] = (valor, tamano, vence)
+            self._bytes += tamano
+            heapq.heappush(self._vencimientos, (vence, clave))
+
+        return clave
+
+    def obtener(self, clave: str):
+        """Devuelve el valor de la clave, o None si no existe o venció."""
+        with self._lock:
+            self._barrer(time.monotonic())
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[0]
+
+    def eliminar(self, clave: str) -> None:
+        with self._lock:
+            self._quitar(clave)
+
+    def _quitar(self, clave: str) -> None:
+        """Quita una entrada. Llamar con el lock tomado."""
+        entrada = self._entradas.pop(clave, None)
+        if entrada is not None:
+            self._bytes -= entrada[1]
+
+    def _barrer(self, ahora: float) -> None:
+        """Elimina las entradas vencidas. Llamar con el lock tomado."""
+        while self._vencimientos and self._vencimientos[0][0] <= ahora:
+            vence, clave = heapq.heappop(self._vencimientos)
+            entrada = self._entradas.get(clave)
+            # La entrada pudo haberse reemplazado o eliminado antes
+            if entrada is not None and entrada[2] == vence:
+                self._quitar(clave)
+
+        # Evitar que el heap crezca con claves ya eliminadas
+        if len(self._vencimientos) > 2 * len(self._entradas) + 64:
+            self._vencimientos = [(v, c) for v, c in self._vencimientos
+                                  if c in self._entradas and self._entradas[c][2] == v]
+            heapq.heapify(self._vencimientos)
+
+
+class ResultadosMemoria:
+    """Resultados en la memoria del proceso."""
+
+    def __init__(self, ttl: float = TTL_RESULTADOS, max_bytes: int = MAX_BYTES_RESULTADOS,
+                 max_entradas: int = MAX_ENTRADAS_RESULTADOS):
+        self._almacen = AlmacenTemporal(ttl=ttl, max_bytes=max_bytes, max_entradas=max_entradas)
+
+    def guardar(self, resultado) -> str:
+        return self._almacen.guardar(resultado, resultado.nbytes)
+
+    def obtener(self, token: str):
+        return self._almacen.obtener(token)
+
+
+class ResultadosDirectorio:
+    """
+    Resultados serializados en un directorio compartido entre workers.
+
+    Cada resultado es un archivo <token>.pkl escrito con rename atómico.
+    El directorio se crea con permisos 0700 y solo lo debe poder escribir
+    la aplicación (los archivos se leen con pickle). Los vencidos y el
+    exceso de presupuesto se barren como mucho cada
+    INTERVALO_LIMPIEZA_DIRECTORIO segundos, no en cada request.
+    """
+
+    def __init__(self, directorio: str, ttl: float = TTL_RESULTADOS,
+                 max_bytes: int = MAX_BYTES_RESULTADOS, max_entradas: int = MAX_ENTRADAS_RESULTADOS):
+        self.directorio = directorio
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._ultima_limpieza = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directorio, mode=0o700, exist_ok=True)
+
+    def _ruta(self, token: str) -> str:
+        return os.path.join(self.directorio, f"{token}.pkl")
+
+    def guardar(self, resultado) -> str:
+        token = uuid.uuid4().hex
+        self._limpiar_si_corresponde()
+
+        datos = pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL)
+        temporal = f"{self._ruta(token)}.{uuid.uuid4().hex}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(datos)
+        os.replace(temporal, self._ruta(token))
+        return token
+
+    def obtener(self, token: str):
+        if not _PATRON_TOKEN.fullmatch(token or ''):
+            return None
+        ruta = self._ruta(token)
+        try:
+            if time.time() - os.stat(ruta).st_mtime > self.ttl:
+                os.remove(ruta)
+                return None
+            with open(ruta, 'rb') as f:
+                return pickle.loads(f.read())
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _limpiar_si_corresponde(self) -> None:
+        ahora = time.time()
+        with self._lock:
+            if ahora - self._ultima_limpieza < INTERVALO_LIMPIEZA_DIRECTORIO:
+                return
+            self._ultima_limpieza = ahora
+        self._limpiar(ahora)
+
+    def _limpiar(self, ahora: float) -> None:
+        """Borra los vencidos (y restos .tmp) y, si no hay lugar, los más viejos."""
+        vigentes = []
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                continue
+            if ahora - estado.st_mtime > self.ttl:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+            elif nombre.endswith('.pkl'):
+                vigentes.append((estado.st_mtime, ruta, estado.st_size))
+
+        vigentes.sort()
+        total = sum(tamano for _, _, tamano in vigentes)
+        while vigentes and (total > self.max_bytes or len(vigentes) > self.max_entradas):
+            _, ruta, tamano = vigentes.pop(0)
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+            total -= tamano
+
+
+def crear_almacen_resultados():
+    """Crea el almacén de resultados según CUOTAVISTA_RESULTADOS_DIR."""
+    directorio = os.environ.get("CUOTAVISTA_RESULTADOS_DIR")
+    if directorio:
+        return ResultadosDirectorio(directorio)
+    return ResultadosMemoria()
+
+
+# Resultados de análisis, para la descarga del Excel
+_resultados = crear_almacen_resultados()
+
+
+def guardar_resultado(resultado) -> str:
+    """Guarda un resultado y devuelve el token para recuperarlo."""
+    return _resultados.guardar(resultado)
+
+
+def obtener_resultado(token: str):
+    """Devuelve el resultado asociado al token, o None si no existe o venció."""
+    return _resultados.obtener(token)
+
+
+class _RelojFalso:
+    """Reemplazo de time.monotonic para los tests: avanza solo cuando se le pide."""
+
+    def __init__(self, ahora: float = 1000.0):
+        self.ahora = ahora
+
+    def __call__(self) -> float:
+        return self.ahora
+
+
+def _test_almacen():
+    """
+    Vencimiento, presupuesto de bytes/entradas, orden LRU y compactación
+    del heap de AlmacenTemporal, con un reloj falso en time.monotonic.
+    Ejecutar con: python -c "from bancos.almacen import _test_almacen; _test_almacen()"
+    """
+    from unittest import mock
+
+    reloj = _RelojFalso()
+    casos = []
+
+    with mock.patch.object(time, "monotonic", reloj):
+        # Vencimiento: vive ttl segundos desde que se guarda
+        almacen = AlmacenTemporal(ttl=10, max_bytes=100, max_entradas=10)
+        clave = almacen.guardar("a", 10)
+        reloj.ahora += 9.9
+        vigente = almacen.obtener(clave) == "a"
+        reloj.ahora += 0.1
+        casos.append(("Vence a los ttl segundos",
+                      vigente and almacen.obtener(clave) is None
+                      and len(almacen) == 0 and almacen.bytes_usados == 0))
+
+        # Reemplazar una clave renueva el vencimiento (el del heap viejo no cuenta)
+        almacen.guardar("v1", 10, clave="k")
+        reloj.ahora += 5
+        almacen.guardar("v2", 30, clave="k")
+        reloj.ahora += 7
+        casos.append(("Reemplazar renueva el vencimiento y el tamaño",
+                      almacen.obtener("k") == "v2" and almacen.bytes_usados == 30))
+
+        # Presupuesto de bytes: se descarta la usada hace más tiempo
+        almacen = AlmacenTemporal(ttl=10, max_bytes=100, max_entradas=10)
+        almacen.guardar("a", 40, clave="a")
+        almacen.guardar("b", 40, clave="b")
+        almacen.guardar("c", 40, clave="c")
+        casos.append(("Presupuesto de bytes descarta la más vieja",
+                      almacen.obtener("a") is None and almacen.obtener("b") == "b"
+                      and almacen.bytes_usados == 80))
+
+        # Más grande que el presupuesto: devuelve clave pero no se guarda
+        clave = almacen.guardar("x", 101)
+        casos.append(("Valor más grande que el presupuesto no se guarda",
+                      almacen.obtener(clave) is None and almacen.bytes_usados == 80))
+
+        # Presupuesto de entradas y orden LRU: leer una entrada la protege
+        almacen = AlmacenTemporal(ttl=10, max_bytes=100, max_entradas=2)
+        almacen.guardar("a", 1, clave="a")
+        almacen.guardar("b", 1, clave="b")
+        almacen.obtener("a")
+        almacen.guardar("c", 1, clave="c")
+        casos.append(("Presupuesto de entradas descarta la menos usada (LRU)",
+                      almacen.obtener("b") is None and almacen.obtener("a") == "a"
+                      and almacen.obtener("c") == "c" and len(almacen) == 2))
+
+        # Claves eliminadas no dejan crecer el heap de vencimientos
+        almacen = AlmacenTemporal(ttl=10, max_bytes=10_000, max_entradas=1000)
+        for _ in range(500):
+            almacen.eliminar(almacen.guardar("x", 1))
+        almacen.guardar("y", 1, clave="y")
+        casos.append(("El heap se compacta con claves eliminadas",
+                      len(almacen._vencimientos) <= 2 * len(almacen) + 64
+                      and almacen.obtener("y") == "y"))
+
+    errores = 0
+    for descripcion, ok in casos:
+        errores += not ok
+        print(f"{'✓ PASS' if ok else '✗ FAIL'} | {descripcion}")
+
+    print(f"{len(casos) - errores}/{len(casos)} casos pasaron")
+    return errores == 0
+
+
+if __name__ == "__main__":
+    _test_almacen()
@@ -0,0 +1,290 @@
+"""
+Análisis de cuotas común a BROU, Itaú y Santander.
+
+Recibe el DataFrame de movimientos que devuelve el parser de cada banco,
+lo normaliza y calcula en una sola pasada los totales, la proyección de
+cuotas por mes y las cuotas nuevas del mes actual.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from bancos.utils_comunes import detectar_cuotas
+
+
+COLUMNA_DETALLE = "Detalle"
+COLUMNAS_IMPORTE = ["Importe $", "Importe U$S"]
+
+# Columnas auxiliares que no se muestran en la tabla de movimientos
+COLUMNAS_AUXILIARES = ["cuotas_pagas", "cuotas_totales", "cuotas_restantes"]
+
+
+def _valor_json(valor):
+    """Escalar de numpy/pandas como tipo nativo de Python (NaN -> None)."""
+    if valor is None or (np.isscalar(valor) and pd.isna(valor)):
+        return None
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _columna_json(serie: pd.Series) -> list:
+    """Valores de una columna como tipos nativos de Python (NaN -> None)."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return [None if pd.isna(v) else v.isoformat() for v in serie]
+    if pd.api.types.is_float_dtype(serie):
+        valores = serie.to_numpy()
+        return np.where(np.isnan(valores), None, valores).tolist()
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+
+def normalizar_movimientos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Unifica el DataFrame de cualquier banco al formato común.
+
+    - "Descripción" (BROU) pasa a llamarse "Detalle" (Itaú, Santander)
+    - "Importe $" e "Importe U$S" quedan numéricos (NaN si no se pueden convertir)
+    - Se agregan las columnas de cuotas si el parser no las trae
+    """
+    df = df.rename(columns={"Descripción": COLUMNA_DETALLE}).reset_index(drop=True)
+
+    for columna in COLUMNAS_IMPORTE:
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors="coerce")
+        else:
+            df[columna] = np.nan
+
+    if "es_cuota" not in df.columns:
+        cuotas = detectar_cuotas(df[COLUMNA_DETALLE])
+        df[cuotas.columns] = cuotas
+
+    return df
+
+
+@dataclass
+class ResultadoAnalisis:
+    """Resultado del análisis de un estado de cuenta, listo para renderizar."""
+    movimientos: pd.DataFrame
+    total_pesos: float
+    total_dolares: float
+    total_cuotas_pesos: float
+    total_cuotas_dolares: float
+    total_corrientes_pesos: float
+    total_corrientes_dolares: float
+    total_devoluciones: float
+    porcentaje_cuotas_pesos: float
+    # Importe de cuotas que vence en cada mes (índice = cuotas restantes) y saldo acumulado
+    importes_mes: np.ndarray
+    saldo_mes: np.ndarray
+    cuotas_mes_actual: pd.DataFrame
+    cuotas_mes_total_pesos: float
+    cuotas_mes_total_dolares: float
+    saldo_anterior: float = 0.0
+    resumen: dict = field(default_factory=dict)
+    validacion: dict = field(default_factory=dict)
+
+    @property
+    def cuotas_mes_cantidad(self) -> int:
+        return len(self.cuotas_mes_actual)
+
+    @property
+    def total_pesos_con_saldo_anterior(self) -> float:
+        return self.total_pesos + self.saldo_anterior
+
+    @property
+    def nbytes(self) -> int:
+        """Tamaño aproximado en memoria (para el presupuesto del almacén)."""
+        return int(
+            self.movimientos.memory_usage(index=True, deep=True).sum()
+            + self.importes_mes.nbytes
+            + self.saldo_mes.nbytes
+        )
+
+    @property
+    def proyeccion(self) -> pd.DataFrame:
+        """Proyección mes a mes: cuotas_restantes, Importe $ y saldo_mes."""
+        return pd.DataFrame({
+            "cuotas_restantes": np.arange(len(self.importes_mes)),
+            "Importe $": self.importes_mes,
+            "saldo_mes": self.saldo_mes,
+        })
+
+    def a_dict(self, desde: int = 0, limite: int = None) -> dict:
+        """
+        Resultado serializable a JSON (para la API), sin generar HTML.
+
+        Los movimientos van por columnas ({columna: [valores]}) y se pueden
+        paginar con desde/limite; limite=None devuelve todos desde "desde".
+        """
+        hasta = None if limite is None else desde + limite
+        pagina = self.movimientos.iloc[desde:hasta]
+
+        return {
+            "totales": {
+                "pesos": float(self.total_pesos),
+                "dolares": float(self.total_dolares),
+                "pesos_con_saldo_anterior": float(self.total_pesos_con_saldo_anterior),
+                "cuotas_pesos": float(self.total_cuotas_pesos),
+                "cuotas_dolares": float(self.total_cuotas_dolares),
+                "corrientes_pesos": float(self.total_corrientes_pesos),
+                "corrientes_dolares": float(self.total_corrientes_dolares),
+                "devoluciones": float(self.total_devoluciones),
+                "porcentaje_cuotas_pesos": float(self.porcentaje_cuotas_pesos),
+                "saldo_anterior": float(self.saldo_anterior),
+            },
+            "cuotas_mes_actual": {
+                "cantidad": self.cuotas_mes_cantidad,
+                "pesos": float(self.cuotas_mes_total_pesos),
+                "dolares": float(self.cuotas_mes_total_dolares),
+            },
+            "proyeccion": {
+                "cuotas_restantes": list(range(len(self.saldo_mes))),
+                "importe_mes": self.importes_mes.tolist(),
+                "saldo_mes": self.saldo_mes.tolist(),
+            },
+            "resumen": {clave: _valor_json(valor) for clave, valor in self.resumen.items()},
+            "validacion": {clave: _valor_json(valor) for clave, valor in self.validacion.items()},
+            "movimientos": {
+                "total": len(self.movimientos),
+                "desde": desde,
+                "cantidad": len(pagina),
+                "columnas": list(pagina.columns),
+                "datos": {columna: _columna_json(pagina[columna]) for columna in pagina.columns},
+            },
+        }
+
+    def pagina_movimientos(self, desde: int = 0, limite: int = None) -> dict:
+        """
+        Página de la tabla de movimientos de resultado.html (sin columnas
+        auxiliares), con las filas como listas de valores JSON.
+        """
+        tabla = self.movimientos.drop(columns=COLUMNAS_AUXILIARES, errors="ignore")
+        hasta = None if limite is None else desde + limite
+        pagina = tabla.iloc[desde:hasta]
+        columnas = [_columna_json(pagina[columna]) for columna in pagina.columns]
+
+        return {
+            "total": len(tabla),
+            "desde": desde,
+            "cantidad": len(pagina),
+            "columnas": list(pagina.columns),
+            "filas": [list(fila) for fila in zip(*columnas)],
+        }
+
+    def contexto_plantilla(self, nombre_archivo: str, nombre_excel: str,
+                           nombre_banco: str, banco_color: str) -> dict:
+        """
+        Arma el contexto que espera templates/resultado.html. La tabla de
+        movimientos no va en la página: el navegador la pide por páginas
+        a /movimientos/<token> (ver pagina_movimientos).
+        """
+        cuotas_restantes_list = list(range(len(self.saldo_mes)))
+        montos_cuotas_restantes_list = self.saldo_mes.tolist()
+
+        # Evitar errores de índice en plantilla cuando hay un solo mes
+        if len(montos_cuotas_restantes_list) == 1:
+            montos_cuotas_restantes_list.append(montos_cuotas_restantes_list[0])
+
+        if self.cuotas_mes_cantidad > 0:
+            cuotas_mes_actual_html = self.cuotas_mes_actual.fillna("").to_html(
+                classes='min-w-full', index=True, na_rep=""
+            )
+        else:
+            cuotas_mes_actual_html = "<p>No hay cuotas nuevas este mes</p>"
+
+        return {
+            "total_movimientos": len(self.movimientos),
+            "total_pesos": round(self.total_pesos, 2),
+            "total_dolares": round(self.total_dolares, 2),
+            "total_pesos_con_saldo_anterior": round(self.total_pesos_con_saldo_anterior, 2),
+            "total_cuotas_pesos": round(self.total_cuotas_pesos, 2),
+            "total_cuotas_dolares": round(self.total_cuotas_dolares, 2),
+            "total_corrientes_pesos": round(self.total_corrientes_pesos, 2),
+            "total_corrientes_dolares": round(self.total_corrientes_dolares, 2),
+            "porcentaje_cuotas_pesos": self.porcentaje_cuotas_pesos,
+            "cuotas_restantes": cuotas_restantes_list,
+            "montos_cuotas_restantes": montos_cuotas_restantes_list,
+            "nombre_archivo": nombre_archivo,
+            "nombre_excel": nombre_excel,
+            "cuotas_mes_actual": cuotas_mes_actual_html,
+            "cuotas_mes_total_pesos": round(self.cuotas_mes_total_pesos, 2),
+            "cuotas_mes_total_dolares": round(self.cuotas_mes_total_dolares, 2),
+            "cuotas_mes_cantidad": self.cuotas_mes_cantidad,
+            "nombre_banco": nombre_banco,
+            "banco_color": banco_color,
+            "saldo_anterior": self.saldo_anterior,
+            "saldo_contado": self.resumen.get('saldo_contado', 0),
+            "pago_minimo": self.resumen.get('pago_minimo', 0),
+            "validacion_warning": self.validacion.get('warning'),
+            "total_devoluciones": self.total_devoluciones,
+        }
+
+
+def analizar_movimientos(df: pd.DataFrame, separar_devoluciones: bool = False,
+                         resumen: dict = None, validacion: dict = None) -> ResultadoAnalisis:
+    """
+    Calcula todos los agregados del estado de cuenta en una sola pasada.
+
+    Args:
+        df: DataFrame de movimientos de cualquier banco (ver normalizar_movimientos)
+        separar_devoluciones: Si es True (Santander), los importes negativos se
+            restan como devoluciones y cuotas/corrientes solo suman gastos (> 0)
+        resumen: Campos de resumen del PDF (saldo_anterior, saldo_contado, ...)
+        validacion: Resultado de la validación de devoluciones del parser
+
+    Returns:
+        ResultadoAnalisis
+    """
+    df = normalizar_movimientos(df)
+    resumen = resumen or {}
+
+    # Máscaras precalculadas una sola vez
+    pesos = np.nan_to_num(df["Importe $"].to_numpy(dtype=float))
+    dolares = np.nan_to_num(df["Importe U$S"].to_numpy(dtype=float))
+    es_cuota = (df["es_cuota"] == "SI").to_numpy()
+
+    if separar_devoluciones:
+        gastos = pesos > 0
+        devoluciones = pesos < 0
+    else:
+        gastos = np.ones(len(df), dtype=bool)
+        devoluciones = np.zeros(len(df), dtype=bool)
+
+    cuotas = es_cuota & gastos
+    corrientes = ~es_cuota & gastos
+    cuotas_nuevas = cuotas & (df["cuotas_pagas"] == 1).to_numpy()
+
+    # Totales
+    total_cuotas_pesos = pesos[cuotas].sum()
+    total_corrientes_pesos = pesos[corrientes].sum()
+    total_devoluciones = abs(pesos[devoluciones].sum())
+    total_gastos_pesos = total_cuotas_pesos + total_corrientes_pesos
+
+    if total_gastos_pesos > 0:
+        porcentaje_cuotas_pesos = round(total_cuotas_pesos / total_gastos_pesos * 100, 2)
+    else:
+        porcentaje_cuotas_pesos = 0
+
+    # Proyección: importe por cuotas restantes (0 = mes actual) y saldo acumulado inverso
+    restantes = df["cuotas_restantes"].to_numpy()[cuotas].astype(int)
+    importes_mes = np.bincount(restantes, weights=pesos[cuotas], minlength=1)
+    saldo_mes = importes_mes[::-1].cumsum()[::-1]
+
+    return ResultadoAnalisis(
+        movimientos=df,
+        total_pesos=total_gastos_pesos - total_devoluciones,
+        total_dolares=dolares[gastos].sum(),
+        total_cuotas_pesos=total_cuotas_pesos,
+        total_cuotas_dolares=dolares[cuotas].sum(),
+        total_corrientes_pesos=total_corrientes_pesos,
+        total_corrientes_dolares=dolares[corrientes].sum(),
+        total_devoluciones=total_devoluciones,
+        porcentaje_cuotas_pesos=porcentaje_cuotas_pesos,
+        importes_mes=importes_mes,
+        saldo_mes=saldo_mes,
+        cuotas_mes_actual=df.loc[cuotas_nuevas],
+        cuotas_mes_total_pesos=pesos[cuotas_nuevas].sum(),
+        cuotas_mes_total_dolares=dolares[cuotas_nuevas].sum(),
+        saldo_anterior=resumen.get('saldo_anterior', 0) or 0,
+        resumen=resumen,
+        validacion=validacion or {},
+    )
@@ -0,0 +1,2 @@
+# API JSON - Cuotavista
+# Análisis de estados de cuenta sin renderizar HTML
@@ -0,0 +1,119 @@
+# bancos/api/routes.py
+
+from flask import Blueprint, request, jsonify
+from bancos.procesamiento import BANCOS, procesar_estado_cuenta
+from bancos.lotes import leer_archivos_lote, analizar_lote, LoteInvalidoError
+from bancos.santander.parser import (
+    PasswordRequiredError,
+    InvalidPasswordError,
+    InvalidPDFError,
+    SantanderPDFError
+)
+
+api_bp = Blueprint("api", __name__)
+
+
+def _error(error_type: str, message: str, status: int = 400):
+    return jsonify({
+        "success": False,
+        "error_type": error_type,
+        "message": message
+    }), status
+
+
+def _entero(nombre: str, default=None):
+    """Parámetro entero no negativo de la query/form. Lanza ValueError si es inválido."""
+    valor = request.values.get(nombre, "").strip()
+    if not valor:
+        return default
+    numero = int(valor)
+    if numero < 0:
+        raise ValueError(nombre)
+    return numero
+
+
+@api_bp.route("/<banco>/analizar", methods=["POST"])
+def analizar(banco):
+    """
+    Analiza un estado de cuenta y devuelve el resultado en JSON.
+
+    Form multipart:
+        archivo: Excel (BROU) o PDF (Itaú, Santander)
+        password: Contraseña del PDF Santander, si está encriptado
+
+    Query (o form):
+        desde: Primer movimiento a devolver (0 por defecto)
+        limite: Cantidad máxima de movimientos (todos por defecto)
+
+    Los movimientos van por columnas: {"columnas": [...], "datos": {columna: [...]}}.
+    """
+    if banco not in BANCOS:
+        return _error("invalid_bank", f"Banco no soportado: {banco}", 404)
+
+    archivo = request.files.get("archivo") or request.files.get("file")
+    if not archivo or archivo.filename == "":
+        return _error("no_file", "No se subió ningún archivo.")
+
+    try:
+        desde = _entero("desde", 0)
+        limite = _entero("limite")
+    except ValueError:
+        return _error("invalid_parameter", "desde y limite deben ser enteros no negativos.")
+
+    password = request.form.get("password", "").strip() or None
+
+    try:
+        resultado = procesar_estado_cuenta(banco, archivo.read(), archivo.filename, password)
+    except PasswordRequiredError:
+        return _error("password_required", "El PDF requiere contraseña.")
+    except InvalidPasswordError:
+        return _error("invalid_password", "Contraseña incorrecta.")
+    except InvalidPDFError:
+        return _error("invalid_pdf", "Archivo inválido. Asegurate de subir un PDF válido.")
+    except SantanderPDFError as e:
+        return _error("pdf_error", str(e))
+    except ValueError as e:
+        return _error("invalid_file", str(e))
+    except Exception as e:
+        return _error("unexpected", f"Error inesperado: {str(e)}", 500)
+
+    return jsonify({
+        "success": True,
+        "banco": banco,
+        "nombre_archivo": archivo.filename,
+        **resultado.a_dict(desde, limite),
+    })
+
+
+@api_bp.route("/lote", methods=["POST"])
+def analizar_lote_archivos():
+    """
+    Analiza varios estados de cuenta (o zips con ellos) en paralelo.
+
+    Form multipart:
+        archivos: Uno o más Excel/PDF/zip, de cualquier banco
+        password: Contraseñas a probar en los PDF Santander (se puede repetir)
+        banco: Opcional, fuerza el banco de todos los archivos
+
+    Devuelve la proyección combinada mes a mes, los totales sumados y el
+    resumen de cada estado de cuenta (los que fallan traen su error).
+    """
+    archivos = [archivo for archivo in request.files.getlist("archivos") if archivo.filename]
+    if not archivos:
+        return _error("no_file", "No se subió ningún archivo.")
+
+    banco = request.form.get("banco", "").strip() or None
+    if banco is not None and banco not in BANCOS:
+        return _error("invalid_bank", f"Banco no soportado: {banco}")
+
+    passwords = [password.strip() for password in request.form.getlist("password") if password.strip()]
+
+    try:
+        lote = leer_archivos_lote((archivo.filename, archivo.read()) for archivo in archivos)
+        resultado = analizar_lote(lote, passwords, banco)
+    except LoteInvalidoError as e:
+        return _error("invalid_batch", str(e))
+    except Exception as e:
+        return _error("unexpected", f"Error inesperado: {str(e)}", 500)
+
+    return jsonify({"success": True, **resultado})
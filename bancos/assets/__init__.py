@@ -0,0 +1,2 @@
+# Assets estáticos - Cuotavista
+# Build de Plotly y Tailwind con hash en el nombre y variantes comprimidas
@@ -0,0 +1,194 @@
+"""
+Build de los assets estáticos de las páginas.
+
+Uso:
+    python -m bancos.assets.construir [--plotly RUTA | --plotly-completo] [--tailwind COMANDO]
+
+Genera en static/dist/:
+    plotly.<hash>.js    Plotly mínimo (bundle "basic": scatter, bar y pie)
+    estilos.<hash>.css  Tailwind precompilado con las clases de templates/
+    *.gz, *.br          variantes comprimidas de cada uno (br requiere el
+                        paquete brotli; si no está, solo gzip)
+    manifest.json       nombre lógico -> archivo con hash
+
+El hash del contenido va en el nombre, así los archivos se sirven con
+cache inmutable (ver bancos/assets/routes.py) y cada build nuevo cambia la
+URL. Los archivos de builds anteriores se borran.
+
+Plotly se toma, en orden, de --plotly, del paquete npm
+plotly.js-basic-dist-min (npm pack, versión fija) o, si no hay npm ni red,
+del plotly.min.js completo que trae el paquete plotly de Python (misma
+versión de plotly.js, pero con todos los tipos de gráfico). Con
+--plotly-completo se usa directamente este último, sin intentar npm.
+
+Tailwind se compila con el CLI (por defecto npx tailwindcss, versión fija)
+usando assets/tailwind.config.js y assets/estilos.css. Si no se puede
+compilar, ese asset no se genera y las páginas siguen usando el CDN.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DIRECTORIO_FUENTES = os.path.join(RAIZ, "assets")
+DIRECTORIO_DIST = os.path.join(RAIZ, "static", "dist")
+MANIFEST = os.path.join(DIRECTORIO_DIST, "manifest.json")
+
+# Versiones fijas (plotly.js coincide con la que trae plotly==6.0.1 de requirements.txt)
+VERSION_PLOTLY = "3.0.1"
+PAQUETE_PLOTLY = "plotly.js-basic-dist-min"
+VERSION_TAILWIND = "3.4.17"
+
+# Tiempo máximo de cada comando externo (segundos)
+TIMEOUT_COMANDO = 300
+
+
+def _nombre_con_hash(nombre: str, contenido: bytes) -> str:
+    """plotly.js -> plotly.<12 hex del sha256>.js"""
+    base, extension = os.path.splitext(nombre)
+    return f"{base}.{hashlib.sha256(contenido).hexdigest()[:12]}{extension}"
+
+
+def escribir_asset(nombre: str, contenido: bytes, directorio: str = DIRECTORIO_DIST) -> str:
+    """Escribe el asset con hash y sus variantes comprimidas. Devuelve el nombre con hash."""
+    archivo = _nombre_con_hash(nombre, contenido)
+    ruta = os.path.join(directorio, archivo)
+    with open(ruta, "wb") as f:
+        f.write(contenido)
+
+    # mtime=0: el .gz es el mismo en cada build del mismo contenido
+    with open(ruta + ".gz", "wb") as f:
+        f.write(gzip.compress(contenido, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(ruta + ".br", "wb") as f:
+            f.write(brotli.compress(contenido, quality=11))
+
+    return archivo
+
+
+def _plotly_npm() -> bytes:
+    """plotly-basic.min.js del paquete npm, o None si no se pudo descargar."""
+    with tempfile.TemporaryDirectory() as temporal:
+        try:
+            subprocess.run(
+                ["npm", "pack", f"{PAQUETE_PLOTLY}@{VERSION_PLOTLY}", "--silent", "--fetch-retries=1"],
+                cwd=temporal, check=True, capture_output=True, timeout=TIMEOUT_COMANDO,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+        for nombre in os.listdir(temporal):
+            if nombre.endswith(".tgz"):
+                with tarfile.open(os.path.join(temporal, nombre)) as tgz:
+                    return tgz.extractfile("package/plotly-basic.min.js").read()
+    return None
+
+
+def _plotly_python() -> bytes:
+    """plotly.min.js completo del paquete plotly de Python, o None si no está instalado."""
+    try:
+        from plotly.offline import get_plotlyjs, get_plotlyjs_version
+    except ImportError:
+        return None
+    if get_plotlyjs_version() != VERSION_PLOTLY:
+        print(f"Aviso: el paquete plotly trae plotly.js {get_plotlyjs_version()} "
+              f"(se esperaba {VERSION_PLOTLY}).", file=sys.stderr)
+    return get_plotlyjs().encode("utf-8")
+
+
+def construir_plotly(ruta: str = None, completo: bool = False) -> bytes:
+    """Contenido del bundle de Plotly (ver docstring del módulo)."""
+    if ruta:
+        with open(ruta, "rb") as f:
+            return f.read()
+    if completo:
+        return _plotly_python()
+
+    contenido = _plotly_npm()
+    if contenido is not None:
+        return contenido
+
+    print(f"Aviso: no se pudo obtener {PAQUETE_PLOTLY} con npm; se usa el plotly.js "
+          "completo del paquete de Python.", file=sys.stderr)
+    return _plotly_python()
+
+
+def construir_tailwind(comando: str = None) -> bytes:
+    """CSS de Tailwind compilado y minificado, o None si el CLI falló."""
+    base = comando.split() if comando else ["npx", "--yes", f"tailwindcss@{VERSION_TAILWIND}"]
+    with tempfile.TemporaryDirectory() as temporal:
+        salida = os.path.join(temporal, "estilos.css")
+        try:
+            subprocess.run(
+                base + [
+                    "--config", os.path.join(DIRECTORIO_FUENTES, "tailwind.config.js"),
+                    "--input", os.path.join(DIRECTORIO_FUENTES, "estilos.css"),
+                    "--output", salida,
+                    "--minify",
+                ],
+                # El content del config es relativo a la raíz del repo
+                cwd=RAIZ, check=True, capture_output=True, timeout=TIMEOUT_COMANDO,
+            )
+            with open(salida, "rb") as f:
+                return f.read()
+        except (OSError, subprocess.SubprocessError) as e:
+            detalle = getattr(e, "stderr", None) or b""
+            print(f"No se pudo compilar Tailwind: {e} {detalle.decode(errors='replace')[-500:]}",
+                  file=sys.stderr)
+            return None
+
+
+def _limpiar(directorio: str, vigentes: set) -> None:
+    """Borra los assets de builds anteriores."""
+    for nombre in os.listdir(directorio):
+        base = nombre.removesuffix(".gz").removesuffix(".br")
+        if nombre != "manifest.json" and base not in vigentes:
+            os.remove(os.path.join(directorio, nombre))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build de los assets estáticos.")
+    origen_plotly = parser.add_mutually_exclusive_group()
+    origen_plotly.add_argument("--plotly", help="Bundle de plotly.js a usar en lugar de descargarlo")
+    origen_plotly.add_argument("--plotly-completo", action="store_true",
+                               help="Usar el plotly.js completo del paquete de Python (sin npm)")
+    parser.add_argument("--tailwind", help="Comando del CLI de Tailwind (por defecto npx tailwindcss)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(DIRECTORIO_DIST, exist_ok=True)
+    fuentes = {
+        "plotly.js": construir_plotly(args.plotly, args.plotly_completo),
+        "estilos.css": construir_tailwind(args.tailwind),
+    }
+
+    manifest = {}
+    for nombre, contenido in fuentes.items():
+        if contenido is None:
+            continue
+        manifest[nombre] = escribir_asset(nombre, contenido)
+        print(f"{nombre}: {manifest[nombre]} ({len(contenido) / 1024:.0f} KB)")
+
+    _limpiar(DIRECTORIO_DIST, set(manifest.values()))
+    with open(MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    if brotli is None:
+        print("Aviso: sin el paquete brotli solo se generan variantes .gz.", file=sys.stderr)
+
+    return 0 if len(manifest) == len(fuentes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
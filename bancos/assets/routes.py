@@ -0,0 +1,63 @@
+# bancos/assets/routes.py
+
+import json
+import mimetypes
+import os
+
+from flask import Blueprint, abort, request, send_file
+
+from bancos.assets.construir import DIRECTORIO_DIST, MANIFEST
+
+assets_bp = Blueprint("assets", __name__)
+
+# Los archivos llevan el hash del contenido en el nombre: nunca cambian
+MAX_AGE_ASSETS = 365 * 24 * 60 * 60
+
+# Variantes precomprimidas, en orden de preferencia
+CODIFICACIONES = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest = None
+
+
+def leer_manifest() -> dict:
+    """Nombre lógico -> archivo con hash del último build (vacío si no se construyó)."""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST, encoding="utf-8") as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+@assets_bp.app_context_processor
+def _url_asset():
+    def url_asset(nombre: str):
+        """URL del asset construido, o None para que la plantilla use el CDN."""
+        archivo = leer_manifest().get(nombre)
+        return f"/assets/{archivo}" if archivo else None
+    return {"url_asset": url_asset}
+
+
+@assets_bp.route("/<archivo>")
+def servir_asset(archivo):
+    """Sirve un asset del build con cache inmutable y, si se acepta, precomprimido."""
+    if archivo not in leer_manifest().values():
+        abort(404)
+
+    ruta = os.path.join(DIRECTORIO_DIST, archivo)
+    codificacion = None
+    for nombre, extension in CODIFICACIONES:
+        if request.accept_encodings[nombre] and os.path.exists(ruta + extension):
+            ruta, codificacion = ruta + extension, nombre
+            break
+
+    respuesta = send_file(ruta, mimetype=mimetypes.guess_type(archivo)[0],
+                          max_age=MAX_AGE_ASSETS, conditional=True)
+    respuesta.cache_control.immutable = True
+    respuesta.cache_control.public = True
+    respuesta.vary.add("Accept-Encoding")
+    if codificacion:
+        respuesta.headers["Content-Encoding"] = codificacion
+    return respuesta
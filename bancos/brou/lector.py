@@ -0,0 +1,244 @@
+"""
+Lectura incremental de la hoja de un Excel BROU.
+
+En lugar de cargar la hoja entera en un DataFrame (pd.read_excel) y
+convertir cada celda a texto para buscar el encabezado, se recorren las
+filas una por una (xlrd con on_demand para .xls, openpyxl en modo
+read_only para .xlsx): las filas anteriores al encabezado solo se revisan,
+no se guardan, y con las filas de datos se arma el DataFrame directamente.
+
+Los valores de las celdas se convierten igual que en pd.read_excel
+(números enteros como int, errores y textos vacíos o "N/A" como NaN,
+fechas como datetime), así depurar_archivo devuelve lo mismo que antes.
+"""
+from datetime import time
+import math
+import os
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import xlrd
+
+
+# Textos que pd.read_excel toma por defecto como NaN
+VALORES_NA = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+# Valores de las celdas con error en openpyxl (values_only no informa el tipo)
+ERRORES_XLSX = frozenset({"#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"})
+
+# El encabezado de los movimientos es la segunda fila que menciona "Fecha"
+APARICION_ENCABEZADO = 2
+
+
+class EncabezadoNoEncontradoError(ValueError):
+    """La hoja no tiene la fila de encabezado de los movimientos."""
+    pass
+
+
+def _numero(valor):
+    """Número de Excel como lo deja pandas: int si es entero."""
+    if math.isfinite(valor) and int(valor) == valor:
+        return int(valor)
+    return float(valor)
+
+
+def _na(valor):
+    return np.nan if isinstance(valor, str) and valor in VALORES_NA else valor
+
+
+def _filas_xls(origen):
+    """Filas de la primera hoja de un .xls, con las celdas convertidas."""
+    if isinstance(origen, (str, os.PathLike)):
+        libro = xlrd.open_workbook(origen, on_demand=True)
+    else:
+        libro = xlrd.open_workbook(file_contents=origen.read(), on_demand=True)
+
+    try:
+        hoja = libro.sheet_by_index(0)
+        fecha_1904 = bool(libro.datemode)
+        for i in range(hoja.nrows):
+            fila = []
+            for valor, tipo in zip(hoja.row_values(i), hoja.row_types(i)):
+                if tipo == xlrd.XL_CELL_NUMBER:
+                    valor = _numero(valor)
+                elif tipo == xlrd.XL_CELL_DATE:
+                    valor = _fecha_xls(valor, fecha_1904)
+                elif tipo == xlrd.XL_CELL_BOOLEAN:
+                    valor = bool(valor)
+                elif tipo == xlrd.XL_CELL_ERROR:
+                    valor = np.nan
+                fila.append(_na(valor))
+            yield fila
+    finally:
+        libro.release_resources()
+
+
+def _fecha_xls(valor: float, fecha_1904: bool):
+    try:
+        fecha = xlrd.xldate.xldate_as_datetime(valor, fecha_1904)
+    except OverflowError:
+        return valor
+    # Solo hora: el día es el origen de las fechas de Excel
+    if fecha.timetuple()[:3] == ((1904, 1, 1) if fecha_1904 else (1899, 12, 31)):
+        return time(fecha.hour, fecha.minute, fecha.second, fecha.microsecond)
+    return fecha
+
+
+def _filas_xlsx(origen):
+    """
+    Filas de la primera hoja de un .xlsx, con las celdas convertidas.
+
+    Como pd.read_excel, no devuelve las filas vacías del final.
+    """
+    libro = openpyxl.load_workbook(origen, read_only=True, data_only=True)
+    try:
+        hoja = libro.worksheets[0]
+        # Algunos archivos declaran mal el tamaño de la hoja
+        hoja.reset_dimensions()
+        vacias = 0
+        for valores in hoja.iter_rows(values_only=True):
+            if all(valor is None for valor in valores):
+                vacias += 1
+                continue
+            # Las vacías intermedias sí cuentan
+            for _ in range(vacias):
+                yield []
+            vacias = 0
+
+            fila = []
+            for valor in valores:
+                if valor is None or (isinstance(valor, str) and valor in ERRORES_XLSX):
+                    valor = np.nan
+                elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                    valor = _numero(valor)
+                fila.append(_na(valor))
+            yield fila
+    finally:
+        libro.close()
+
+
+def filas_hoja(origen, nombre_archivo: str):
+    """Filas de la primera hoja según la extensión del archivo (.xls o .xlsx)."""
+    if nombre_archivo.endswith(".xls"):
+        return _filas_xls(origen)
+    if nombre_archivo.endswith(".xlsx"):
+        return _filas_xlsx(origen)
+    raise ValueError("Formato de archivo no permitido")
+
+
+def _menciona_fecha(fila: list) -> bool:
+    return any(isinstance(v, str) and "fecha" in v.lower() for v in fila)
+
+
+def leer_movimientos(origen, nombre_archivo: str) -> pd.DataFrame:
+    """
+    Movimientos de la hoja: desde el encabezado (la segunda fila que
+    menciona "Fecha", sin contar la primera fila de la hoja) hasta el final,
+    con el encabezado como nombres de columna. Todas las columnas son
+    object, como en la hoja leída con pd.read_excel.
+
+    Raises:
+        EncabezadoNoEncontradoError: Si no hay encabezado
+        ValueError: Si la extensión no es .xls ni .xlsx
+    """
+    filas = filas_hoja(origen, nombre_archivo)
+    try:
+        # La primera fila es la que pd.read_excel usaba como encabezado de la hoja
+        next(filas, None)
+
+        apariciones = 0
+        encabezado = None
+        for fila in filas:
+            if _menciona_fecha(fila):
+                apariciones += 1
+                if apariciones == APARICION_ENCABEZADO:
+                    encabezado = fila
+                    break
+
+        if encabezado is None:
+            raise EncabezadoNoEncontradoError("No se encontró la fila adecuada para el encabezado")
+
+        datos = list(filas)
+    finally:
+        filas.close()
+
+    # Todas las filas con el mismo ancho (las de openpyxl pueden venir más cortas)
+    ancho = max([len(encabezado)] + [len(fila) for fila in datos])
+    encabezado = encabezado + [np.nan] * (ancho - len(encabezado))
+    datos = [fila + [np.nan] * (ancho - len(fila)) if len(fila) < ancho else fila
+             for fila in datos]
+
+    return pd.DataFrame(datos, columns=pd.Index(encabezado, dtype=object), dtype=object)
+
+
+def _test_lector():
+    """
+    Encabezado, conversión de celdas y filas vacías de leer_movimientos
+    con un .xlsx armado en memoria (y el .xls de ejemplo si está).
+    Ejecutar con: python -m bancos.brou.lector
+    """
+    from io import BytesIO
+
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    for fila in (
+        [None],
+        ["Fecha: 01/09/2024"],
+        ["Estado de Cuenta"],
+        ["Fecha", "Descripción", None, "Importe $"],
+        ["01/09/2024", "COMPRA", None, "1.234,56"],
+        [None, "N/A", None, 100.0],
+        [],
+        ["02/09/2024", "OTRA", None, 2.5],
+        [],
+        [],
+    ):
+        hoja.append(fila)
+    datos = BytesIO()
+    libro.save(datos)
+
+    casos = []
+    df = leer_movimientos(BytesIO(datos.getvalue()), "estado.xlsx")
+    casos.append(("Encabezado en la segunda fila con Fecha",
+                  list(df.columns[[0, 1, 3]]) == ["Fecha", "Descripción", "Importe $"]))
+    casos.append(("Las vacías intermedias quedan y las del final no", len(df) == 4))
+    casos.append(("N/A y celdas vacías son NaN", pd.isna(df.iloc[1, 1]) and pd.isna(df.iloc[0, 2])))
+    casos.append(("Número entero como int y decimal como float",
+                  type(df.iloc[1, 3]) is int and type(df.iloc[3, 3]) is float))
+    casos.append(("Texto sin convertir", df.iloc[0, 3] == "1.234,56"))
+
+    try:
+        leer_movimientos(BytesIO(datos.getvalue()), "estado.xlsm")
+        casos.append(("Extensión no soportada", False))
+    except ValueError:
+        casos.append(("Extensión no soportada", True))
+
+    hoja.delete_rows(4)
+    datos = BytesIO()
+    libro.save(datos)
+    try:
+        leer_movimientos(BytesIO(datos.getvalue()), "estado.xlsx")
+        casos.append(("Sin encabezado lanza EncabezadoNoEncontradoError", False))
+    except EncabezadoNoEncontradoError:
+        casos.append(("Sin encabezado lanza EncabezadoNoEncontradoError", True))
+
+    ejemplo = os.path.join(os.path.dirname(__file__), "..", "..", "static", "ejemplo_estado_cuenta.xls")
+    if os.path.exists(ejemplo):
+        df = leer_movimientos(ejemplo, "ejemplo_estado_cuenta.xls")
+        casos.append(("Ejemplo .xls", "Importe $" in df.columns and len(df) > 0))
+
+    errores = 0
+    for descripcion, ok in casos:
+        errores += not ok
+        print(f"{'✓ PASS' if ok else '✗ FAIL'} | {descripcion}")
+
+    print(f"{len(casos) - errores}/{len(casos)} casos pasaron")
+    return errores == 0
+
+
+if __name__ == "__main__":
+    _test_lector()
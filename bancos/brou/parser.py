@@ -2,30 +2,28 @@ import pandas as pd
 import re
 import os
 
-def depurar_archivo(file):
+from bancos.brou.lector import leer_movimientos, EncabezadoNoEncontradoError
+from bancos.utils_comunes import importes_a_float
+
+def depurar_archivo(file, nombre_archivo=None):
     """
     Función para leer y depurar el archivo cargado.
     Retorna un DataFrame limpio.
+
+    file puede ser el archivo subido (usa file.filename) o cualquier buffer
+    o ruta, indicando nombre_archivo para saber el formato.
     """
     try:
-        # Leer el archivo con pandas según el tipo
-        if file.filename.endswith(".xls"):  # Archivos Excel antiguos
-            df = pd.read_excel(file, engine="xlrd")
-        elif file.filename.endswith(".xlsx"):  # Archivos Excel modernos
-            df = pd.read_excel(file, engine="openpyxl")
-        else:
-            return None, "Formato de archivo no permitido"
+        nombre_archivo = nombre_archivo or file.filename
 
-        # Encontrar la fila con el segundo "Fecha" como referencia del encabezado
-        filas_fecha = df[df.apply(lambda x: x.astype(str).str.contains("Fecha", case=False, na=False)).any(axis=1)].index
-        
-        if len(filas_fecha) < 2:
-            return None, "No se encontró la fila adecuada para el encabezado"
+        if not nombre_archivo.endswith((".xls", ".xlsx")):
+            return None, "Formato de archivo no permitido"
 
-        fila_encabezado = filas_fecha[1]  # Segunda aparición de "Fecha"
-        df = df.iloc[fila_encabezado:].reset_index(drop=True)
-        df.columns = df.iloc[0]  # Asignar la primera fila como encabezado
-        df = df[1:].reset_index(drop=True)  # Eliminar fila duplicada
+        # Leer fila por fila (xlrd / openpyxl) desde el segundo "Fecha", que es el encabezado
+        try:
+            df = leer_movimientos(file, nombre_archivo)
+        except EncabezadoNoEncontradoError as e:
+            return None, str(e)
 
         # Eliminar la última fila y las completamente vacías
         df = df.iloc[:-1]  
@@ -38,25 +36,9 @@ def depurar_archivo(file):
         if "Importe $" not in df.columns:
             return None, "No se encontró la columna 'Importe $' en el archivo"
 
-        # Convertir "Importe $" a valores numéricos
-        df["Importe $"] = (
-            df["Importe $"]
-            .fillna("")
-            .astype(str)
-            .str.replace(".", "", regex=False)  # Eliminar puntos (separadores de miles)
-            .str.replace(",", ".", regex=False)  # Reemplazar comas por puntos
-            .apply(pd.to_numeric, errors="coerce")  # Convertir a float
-        )
-
-        # Convertir "Importe U$S" a valores numéricos
-        df["Importe U$S"] = (
-            df["Importe U$S"]
-            .fillna("")
-            .astype(str)
-            .str.replace(".", "", regex=False)  # Eliminar puntos (separadores de miles)
-            .str.replace(",", ".", regex=False)  # Reemplazar comas por puntos
-            .apply(pd.to_numeric, errors="coerce")  # Convertir a float
-        )    
+        # Convertir los importes (formato uruguayo) a valores numéricos
+        for columna in ("Importe $", "Importe U$S"):
+            df[columna] = importes_a_float(df[columna])[0]
 
         return df
 
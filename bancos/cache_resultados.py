@@ -0,0 +1,137 @@
+"""
+Cache en memoria de resultados de análisis por contenido del archivo.
+
+Si se sube dos veces el mismo estado de cuenta (recargar la página,
+reintentar después de pedir la contraseña Santander), el segundo análisis
+devuelve el ResultadoAnalisis ya calculado sin volver a parsear.
+
+La clave es un hash del contenido del archivo, el banco y la versión del
+parser (VERSIONES_PARSER en bancos.procesamiento). Para Santander incluye
+contenido ya desencriptado (EstadoCuentaSantander.huella): sin la
+contraseña no se puede armar la clave de un resultado guardado.
+
+- Es un AlmacenTemporal (bancos.almacen): TTL, presupuesto de bytes y
+  descarte LRU. Vive solo en la memoria del proceso, nunca en disco,
+  aunque esté definido CUOTAVISTA_RESULTADOS_DIR.
+- Las claves son un BLAKE2b con una clave aleatoria del proceso: no sirven
+  para reconocer un archivo fuera de él.
+- Los errores no se guardan.
+- Los resultados guardados se comparten entre requests y no se deben
+  modificar.
+
+Variables de entorno:
+    CUOTAVISTA_CACHE_MB   presupuesto en MB (64; 0 lo desactiva)
+    CUOTAVISTA_CACHE_TTL  segundos que se conserva un resultado (1800)
+"""
+import hashlib
+import os
+
+from bancos.almacen import AlmacenTemporal
+from bancos.metricas.registro import registro
+
+
+MAX_BYTES_CACHE = int(float(os.environ.get("CUOTAVISTA_CACHE_MB", "64")) * 1024 * 1024)
+TTL_CACHE = float(os.environ.get("CUOTAVISTA_CACHE_TTL", str(30 * 60)))
+MAX_ENTRADAS_CACHE = 200
+
+# Clave del hash: distinta en cada proceso
+_SECRETO = os.urandom(32)
+
+
+def clave_cache(banco: str, version, *partes: bytes) -> str:
+    """Clave del cache para el contenido de un archivo (partes en orden)."""
+    h = hashlib.blake2b(key=_SECRETO, digest_size=32)
+    h.update(f"{banco}\0{version}\0".encode())
+    for parte in partes:
+        # Con el largo delante, partir distinto el mismo contenido da otra clave
+        h.update(len(parte).to_bytes(8, "little"))
+        h.update(parte)
+    return h.hexdigest()
+
+
+class CacheResultados:
+    """ResultadoAnalisis por clave de contenido, con TTL y presupuesto de bytes."""
+
+    def __init__(self, ttl: float = TTL_CACHE, max_bytes: int = MAX_BYTES_CACHE,
+                 max_entradas: int = MAX_ENTRADAS_CACHE):
+        self._almacen = AlmacenTemporal(ttl=ttl, max_bytes=max_bytes, max_entradas=max_entradas)
+
+    def obtener_o_calcular(self, banco: str, clave: str, calcular):
+        """Devuelve el resultado de la clave, o lo calcula con calcular() y lo guarda."""
+        resultado = self._almacen.obtener(clave)
+        if resultado is not None:
+            registro.sumar("cuotavista_cache_resultados_total", banco=banco, resultado="acierto")
+            return resultado
+
+        registro.sumar("cuotavista_cache_resultados_total", banco=banco, resultado="fallo")
+        resultado = calcular()
+        self._almacen.guardar(resultado, resultado.nbytes, clave=clave)
+        return resultado
+
+
+_cache = CacheResultados()
+
+
+def resultado_cacheado(banco: str, clave: str, calcular):
+    """Resultado del cache compartido del proceso (ver CacheResultados.obtener_o_calcular)."""
+    return _cache.obtener_o_calcular(banco, clave, calcular)
+
+
+def _test_cache():
+    """
+    Aciertos, claves distintas por banco/versión/contenido, errores y
+    presupuesto de CacheResultados.
+    Ejecutar con: python -m bancos.cache_resultados
+    """
+    from types import SimpleNamespace
+
+    llamadas = []
+
+    def calcular(valor: str, nbytes: int = 10):
+        def _calcular():
+            llamadas.append(valor)
+            return SimpleNamespace(valor=valor, nbytes=nbytes)
+        return _calcular
+
+    def fallar():
+        llamadas.append("error")
+        raise ValueError("archivo inválido")
+
+    casos = []
+    cache = CacheResultados(ttl=60, max_bytes=100, max_entradas=10)
+
+    clave = clave_cache("brou", 1, b"contenido", b".xls")
+    primero = cache.obtener_o_calcular("brou", clave, calcular("a"))
+    segundo = cache.obtener_o_calcular("brou", clave, calcular("b"))
+    casos.append(("El segundo pedido no recalcula", segundo is primero and llamadas == ["a"]))
+
+    casos.append(("La clave depende del banco, la versión y el contenido",
+                  len({clave,
+                       clave_cache("itau", 1, b"contenido", b".xls"),
+                       clave_cache("brou", 2, b"contenido", b".xls"),
+                       clave_cache("brou", 1, b"contenid", b"o.xls")}) == 4))
+
+    clave_error = clave_cache("itau", 1, b"roto")
+    for _ in range(2):
+        try:
+            cache.obtener_o_calcular("itau", clave_error, fallar)
+        except ValueError:
+            pass
+    casos.append(("Los errores no se guardan", llamadas.count("error") == 2))
+
+    llamadas.clear()
+    cache.obtener_o_calcular("itau", "grande", calcular("g", nbytes=101))
+    cache.obtener_o_calcular("itau", "grande", calcular("g", nbytes=101))
+    casos.append(("Más grande que el presupuesto se recalcula", llamadas == ["g", "g"]))
+
+    errores = 0
+    for descripcion, ok in casos:
+        errores += not ok
+        print(f"{'✓ PASS' if ok else '✗ FAIL'} | {descripcion}")
+
+    print(f"{len(casos) - errores}/{len(casos)} casos pasaron")
+    return errores == 0
+
+
+if __name__ == "__main__":
+    _test_cache()
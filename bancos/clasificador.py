@@ -0,0 +1,148 @@
+"""
+Clasificación de líneas por palabras clave con una sola pasada.
+
+Los parsers de PDF revisan cada línea contra varias listas de palabras
+(blacklist, marcadores de fin, conceptos válidos, excepciones). En lugar de
+un `palabra in linea` por palabra y por lista, ClasificadorLineas junta
+todas las palabras en una única expresión regular compilada, con forma de
+árbol de prefijos (las palabras que empiezan igual comparten la rama), y
+recorre la línea una sola vez. El costo por línea casi no crece al agregar
+palabras a las listas.
+
+Después de cada palabra encontrada la búsqueda sigue desde el carácter
+siguiente (no desde el final de la palabra), así que encuentra también
+palabras superpuestas: el resultado es el mismo que revisar cada palabra
+con `in`. La línea se pasa ya en mayúsculas (las listas están en mayúsculas).
+"""
+import re
+
+
+def _patron_arbol(nodo: dict) -> str:
+    """Alternativa regex para el árbol de prefijos nodo ("" marca fin de palabra)."""
+    ramas = [re.escape(letra) + _patron_arbol(hijo)
+             for letra, hijo in sorted(nodo.items()) if letra]
+    if not ramas:
+        return ""
+    patron = ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+    if "" in nodo:
+        # Una palabra termina acá y otras siguen
+        patron = "(?:" + patron + ")?"
+    return patron
+
+
+class ClasificadorLineas:
+    """
+    Categorías de palabras clave presentes en una línea.
+
+    Uso:
+        clasificador = ClasificadorLineas({
+            "fin": ["TOTAL DEV LEY", "SALDO CONTADO"],
+            "ruido": ["LIMITE", "TASA"],
+        })
+        clasificador.clasificar(linea.upper())   # "fin", "ruido" o None
+        clasificador.categorias(linea.upper())   # frozenset({"fin", "ruido"})
+
+    Las categorías se pasan en orden de prioridad: clasificar devuelve la
+    primera que aparece en la línea. Una palabra puede estar en varias.
+    """
+
+    def __init__(self, categorias: dict):
+        self.prioridad = list(categorias)
+
+        por_palabra = {}
+        for categoria, palabras in categorias.items():
+            for palabra in palabras:
+                por_palabra.setdefault(palabra, set()).add(categoria)
+
+        # En cada posición la regex devuelve la palabra más larga; las más
+        # cortas que son prefijo de ella también aparecen ahí
+        self._categorias = {
+            palabra: frozenset().union(*(cats for otra, cats in por_palabra.items()
+                                         if palabra.startswith(otra)))
+            for palabra in por_palabra
+        }
+
+        arbol = {}
+        for palabra in por_palabra:
+            nodo = arbol
+            for letra in palabra:
+                nodo = nodo.setdefault(letra, {})
+            nodo[""] = {}
+        # Sin lookahead ni grupos: re salta rápido las posiciones cuyo primer
+        # carácter no empieza ninguna palabra
+        self._buscar = re.compile(_patron_arbol(arbol)).search if arbol else None
+
+    def categorias(self, linea: str) -> frozenset:
+        """Todas las categorías con alguna palabra en la línea (ya en mayúsculas)."""
+        if self._buscar is None:
+            return frozenset()
+        match = self._buscar(linea)
+        if match is None:
+            return frozenset()
+        presentes = set()
+        while match is not None:
+            presentes |= self._categorias[match.group()]
+            match = self._buscar(linea, match.start() + 1)
+        return frozenset(presentes)
+
+    def clasificar(self, linea: str, defecto=None):
+        """La categoría de mayor prioridad presente en la línea, o defecto."""
+        presentes = self.categorias(linea)
+        for categoria in self.prioridad:
+            if categoria in presentes:
+                return categoria
+        return defecto
+
+
+def _test_clasificador():
+    """
+    Prioridad, palabras superpuestas y prefijos de ClasificadorLineas,
+    comparado con revisar cada palabra con `in`.
+    Ejecutar con: python -m bancos.clasificador
+    """
+    import random
+
+    listas = {
+        "inicio": ["SALDO ANTERIOR"],
+        "fin": ["TOTAL DEV LEY", "SALDO CONTADO", "P.MINIMO"],
+        "ruido": ["SALDO ANTERIOR", "SALDO CONTADO", "TOTAL DEV LEY", "LIMITE", "LÍMITE", "TASA"],
+        "concepto": ["IVA", "IVA 22%", "I.V.A", "LEY 18212"],
+    }
+    clasificador = ClasificadorLineas(listas)
+
+    def esperado(linea):
+        return frozenset(c for c, palabras in listas.items() if any(p in linea for p in palabras))
+
+    casos = [
+        ("Prioridad: inicio antes que ruido",
+         clasificador.clasificar("SALDO ANTERIOR 741,96") == "inicio"),
+        ("Marcador de fin",
+         clasificador.clasificar("TOTAL DEV LEY 19210 100,00") == "fin"),
+        ("Concepto",
+         clasificador.clasificar("10/01/2025 I.V.A. 22% $ 70,40") == "concepto"),
+        ("Sin palabras devuelve el defecto",
+         clasificador.clasificar("12/07/2024 579 MERCADOLIBRE 3.989,70", "candidato") == "candidato"),
+        ("Palabras superpuestas (TOTAL DEV LEY 18212)",
+         clasificador.categorias("TOTAL DEV LEY 18212") == {"fin", "ruido", "concepto"}),
+        ("Prefijo de otra palabra (IVA dentro de IVA 22%)",
+         clasificador.categorias("IVA 22%") == {"concepto"}),
+        ("Sin listas", ClasificadorLineas({}).clasificar("TASA") is None),
+    ]
+
+    r = random.Random(0)
+    fragmentos = [p for palabras in listas.values() for p in palabras] + ["A", " ", "1", "S", "LEY", "SALDO "]
+    lineas = ["".join(r.choice(fragmentos) for _ in range(r.randint(0, 6))) for _ in range(2000)]
+    casos.append(("Igual que revisar cada palabra (2000 líneas al azar)",
+                  all(clasificador.categorias(linea) == esperado(linea) for linea in lineas)))
+
+    errores = 0
+    for descripcion, ok in casos:
+        errores += not ok
+        print(f"{'✓ PASS' if ok else '✗ FAIL'} | {descripcion}")
+
+    print(f"{len(casos) - errores}/{len(casos)} casos pasaron")
+    return errores == 0
+
+
+if __name__ == "__main__":
+    _test_clasificador()
@@ -0,0 +1,221 @@
+"""
+Compresión de las respuestas de texto (HTML, JSON, CSV, JS, CSS).
+
+Se registra en app.py como after_request: según Accept-Encoding comprime
+con brotli (si el paquete está instalado) o gzip las respuestas de texto
+que superan TAMANO_MINIMO bytes.
+
+- Respuestas con cuerpo en memoria (render_template, jsonify): se
+  comprimen enteras y se actualiza Content-Length.
+- Respuestas en streaming (un generador): se comprime cada fragmento a
+  medida que se envía, con un flush por fragmento para que el cliente lo
+  reciba sin esperar al resto. No se conoce el tamaño de antemano, así
+  que no aplica el mínimo.
+- No se tocan las respuestas que ya tienen Content-Encoding (los assets
+  precomprimidos de /assets), las de send_file (direct_passthrough: las
+  sirve el servidor tal cual, y las que comprime bien ya vienen
+  comprimidas, como el .xlsx), las parciales (206), las sin cuerpo y las
+  que piden Cache-Control: no-transform.
+
+Niveles configurables por variables de entorno:
+    CUOTAVISTA_COMPRESION_MINIMO  bytes a partir de los que se comprime (1024)
+    CUOTAVISTA_NIVEL_GZIP         1-9 (6)
+    CUOTAVISTA_NIVEL_BROTLI       0-11 (5)
+"""
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from flask import request
+
+from bancos.metricas.registro import etapa
+
+
+TAMANO_MINIMO = int(os.environ.get("CUOTAVISTA_COMPRESION_MINIMO", "1024"))
+NIVEL_GZIP = int(os.environ.get("CUOTAVISTA_NIVEL_GZIP", "6"))
+NIVEL_BROTLI = int(os.environ.get("CUOTAVISTA_NIVEL_BROTLI", "5"))
+
+MIMETYPES_COMPRIMIBLES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+# wbits de zlib para escribir el formato gzip (encabezado y CRC)
+_WBITS_GZIP = 16 + zlib.MAX_WBITS
+
+
+def codificaciones_disponibles() -> list:
+    """Codificaciones que se ofrecen, en orden de preferencia."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def _es_comprimible(mimetype: str) -> bool:
+    return bool(mimetype) and (mimetype.startswith("text/") or mimetype in MIMETYPES_COMPRIMIBLES)
+
+
+class _Compresor:
+    """Interfaz común (comprimir fragmento / terminar) para gzip y brotli."""
+
+    def __init__(self, codificacion: str):
+        self.codificacion = codificacion
+        if codificacion == "br":
+            self._br = brotli.Compressor(quality=NIVEL_BROTLI)
+        else:
+            self._zlib = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, _WBITS_GZIP)
+
+    def comprimir(self, datos: bytes, flush: bool = False) -> bytes:
+        if self.codificacion == "br":
+            salida = self._br.process(datos)
+            return salida + self._br.flush() if flush else salida
+        salida = self._zlib.compress(datos)
+        return salida + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else salida
+
+    def terminar(self) -> bytes:
+        if self.codificacion == "br":
+            return self._br.finish()
+        return self._zlib.flush()
+
+
+def _comprimir_stream(fragmentos, compresor: _Compresor):
+    for fragmento in fragmentos:
+        if fragmento:
+            salida = compresor.comprimir(fragmento, flush=True)
+            if salida:
+                yield salida
+    yield compresor.terminar()
+
+
+def comprimir_respuesta(response):
+    """after_request: comprime la respuesta si corresponde (ver docstring del módulo)."""
+    response.vary.add("Accept-Encoding")
+
+    if (
+        response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or "no-transform" in response.headers.get("Cache-Control", "")
+        or not _es_comprimible(response.mimetype)
+    ):
+        return response
+
+    codificacion = request.accept_encodings.best_match(codificaciones_disponibles())
+    if codificacion is None:
+        return response
+
+    compresor = _Compresor(codificacion)
+
+    if response.is_streamed:
+        original = response.response
+        response.response = _comprimir_stream(response.iter_encoded(), compresor)
+        if hasattr(original, "close"):
+            response.call_on_close(original.close)
+        response.headers.pop("Content-Length", None)
+    else:
+        datos = response.get_data()
+        if len(datos) < TAMANO_MINIMO:
+            return response
+        with etapa("compresion"):
+            response.set_data(compresor.comprimir(datos) + compresor.terminar())
+
+    response.headers["Content-Encoding"] = codificacion
+    # El ETag fuerte identifica los bytes sin comprimir
+    if response.headers.get("ETag"):
+        etag, _ = response.get_etag()
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _test_compresion():
+    """
+    Negociación, mínimo, streaming y exclusiones de comprimir_respuesta.
+    Ejecutar con: python -m bancos.compresion
+    """
+    import gzip
+
+    from flask import Flask, Response
+
+    app = Flask(__name__)
+    app.after_request(comprimir_respuesta)
+    grande = "<tr><td>COMPRA 01/12</td><td>1.234,56</td></tr>\n" * 200
+
+    @app.route("/html")
+    def html():
+        return grande
+
+    @app.route("/chico")
+    def chico():
+        return "ok"
+
+    @app.route("/stream")
+    def stream():
+        return Response((f"linea {i}\n" for i in range(1000)), mimetype="text/csv")
+
+    @app.route("/binario")
+    def binario():
+        return Response(b"\0" * 5000, mimetype="application/octet-stream")
+
+    @app.route("/precomprimido")
+    def precomprimido():
+        return Response(gzip.compress(grande.encode()), mimetype="text/html",
+                        headers={"Content-Encoding": "gzip"})
+
+    cliente = app.test_client()
+    gz = {"Accept-Encoding": "gzip"}
+    casos = []
+
+    r = cliente.get("/html", headers=gz)
+    casos.append(("HTML grande con gzip",
+                  r.headers.get("Content-Encoding") == "gzip"
+                  and gzip.decompress(r.data).decode() == grande
+                  and int(r.headers["Content-Length"]) == len(r.data) < len(grande)))
+
+    r = cliente.get("/html")
+    casos.append(("Sin Accept-Encoding no comprime",
+                  "Content-Encoding" not in r.headers and r.get_data(as_text=True) == grande))
+
+    r = cliente.get("/html", headers={"Accept-Encoding": "gzip;q=0"})
+    casos.append(("gzip;q=0 no comprime", "Content-Encoding" not in r.headers))
+
+    r = cliente.get("/chico", headers=gz)
+    casos.append(("Debajo del mínimo no comprime", "Content-Encoding" not in r.headers))
+
+    r = cliente.get("/stream", headers=gz)
+    esperado = "".join(f"linea {i}\n" for i in range(1000))
+    casos.append(("Streaming se comprime por fragmentos",
+                  r.headers.get("Content-Encoding") == "gzip"
+                  and "Content-Length" not in r.headers
+                  and gzip.decompress(r.data).decode() == esperado))
+
+    r = cliente.get("/binario", headers=gz)
+    casos.append(("Binario no comprime", "Content-Encoding" not in r.headers))
+
+    r = cliente.get("/precomprimido", headers=gz)
+    casos.append(("Ya comprimido no se vuelve a comprimir",
+                  gzip.decompress(r.data).decode() == grande))
+
+    casos.append(("Vary: Accept-Encoding", "Accept-Encoding" in r.headers.get("Vary", "")))
+
+    if brotli is not None:
+        r = cliente.get("/html", headers={"Accept-Encoding": "gzip, br"})
+        casos.append(("Con brotli disponible prefiere br",
+                      r.headers.get("Content-Encoding") == "br"
+                      and brotli.decompress(r.data).decode() == grande))
+
+    errores = 0
+    for descripcion, ok in casos:
+        errores += not ok
+        print(f"{'✓ PASS' if ok else '✗ FAIL'} | {descripcion}")
+
+    print(f"{len(casos) - errores}/{len(casos)} casos pasaron")
+    return errores == 0
+
+
+if __name__ == "__main__":
+    _test_compresion()
@@ -0,0 +1,38 @@
+"""
+Generación del Excel de movimientos a demanda.
+"""
+from io import BytesIO
+
+from openpyxl import Workbook
+
+
+MIMETYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def generar_excel(df) -> BytesIO:
+    """
+    Genera el .xlsx de movimientos en memoria.
+
+    Usa el modo write_only de openpyxl, que escribe las filas a medida que
+    se agregan en lugar de armar toda la hoja en memoria.
+
+    Args:
+        df: DataFrame de movimientos (ResultadoAnalisis.movimientos)
+
+    Returns:
+        BytesIO posicionado al inicio, listo para send_file
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Movimientos")
+
+    ws.append([str(columna) for columna in df.columns])
+
+    # astype(object) deja tipos nativos de Python; NaN -> celda vacía
+    valores = df.astype(object).where(df.notna(), None)
+    for fila in valores.itertuples(index=False, name=None):
+        ws.append(fila)
+
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
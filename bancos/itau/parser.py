@@ -1,99 +1,207 @@
-import fitz  # PyMuPDF
-import re
-import pandas as pd
-
-def convertir_a_float(valor):
-    try:
-        return float(valor.replace(".", "").replace(",", "."))
-    except:
-        return None
-
-def extraer_movimientos_desde_pdf(ruta_pdf):
-    doc = fitz.open(ruta_pdf)
-    texto_completo = "\n".join([p.get_text() for p in doc])
-
-    inicio = texto_completo.find("SALDO DEL ESTADO DE CUENTA ANTERIOR")
-    fin = texto_completo.find("UD. HA GENERADO")
-
-    if inicio != -1 and fin != -1 and fin > inicio:
-        texto_movimientos = texto_completo[inicio:fin]
-    elif inicio != -1:
-        texto_movimientos = texto_completo[inicio:]
-    else:
-        texto_movimientos = texto_completo
-
-    lineas = texto_movimientos.strip().split("\n")
-    movimientos = []
-
-    i = 0
-    while i < len(lineas):
-        original_line = lineas[i].strip()
-
-        if not original_line or any(p in original_line.upper() for p in [
-            "SALDO DEL ESTADO", "SALDO CONTADO", "PAGOS", "MILLAS"
-        ]):
-            i += 1
-            continue
-
-        if "REDUCCIÓN DE IVA" in original_line.upper():
-            i += 1
-            continue
-
-        if re.fullmatch(r"[%\d\s\.,-]*", original_line) and not re.search(r"[A-Za-z]", original_line):
-            i += 1
-            continue
-
-        montos = re.findall(r"-?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}", original_line)
-        texto_limpio = re.sub(r"\d{1,3}(?:\.\d{3})*,\d{2}", "", original_line).strip()
-
-        fecha_match = re.match(r"(\d{2} \d{2} \d{2})", texto_limpio)
-        fecha = fecha_match.group(1) if fecha_match else ""
-        resto = texto_limpio[len(fecha):].strip() if fecha else texto_limpio
-
-        tarjeta_match = re.match(r"(\d{4})", resto)
-        tarjeta = tarjeta_match.group(1) if tarjeta_match else ""
-        detalle = resto[len(tarjeta):].strip() if tarjeta else resto
-
-        excepciones_validas = [
-            "SEGURO DE VIDA", 
-            "INTERESES COMPENSATORIOS", 
-            "INTERESES MORATORIOS"
-        ]
-
-        # ❌ Si no hay contenido útil
-        if not fecha and not tarjeta and not re.search(r"[A-Za-z]", detalle):
-            i += 1
-            continue
-
-        if not fecha and not tarjeta and all(p not in detalle.upper() for p in excepciones_validas):
-            i += 1
-            continue
-
-        # ⚠️ Si no hay montos y es una excepción, mirar la próxima línea
-        if not montos and any(p in detalle.upper() for p in excepciones_validas):
-            if i + 1 < len(lineas):
-                siguiente = lineas[i + 1]
-                montos = re.findall(r"-?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}", siguiente)
-                i += 1  # saltamos la línea siguiente porque ya la usamos
-
-        imp_origen, imp_pesos, imp_usd = None, None, None
-        if any(p in detalle.upper() for p in excepciones_validas):
-            if len(montos) == 2:
-                imp_pesos = convertir_a_float(montos[0])
-                imp_usd = convertir_a_float(montos[1])
-            elif len(montos) == 1:
-                imp_pesos = convertir_a_float(montos[0])
-        elif len(montos) == 2:
-            imp_origen = convertir_a_float(montos[0])
-            imp_usd = convertir_a_float(montos[1])
-        elif len(montos) == 1:
-            imp_pesos = convertir_a_float(montos[0])
-
-        movimientos.append([fecha, tarjeta, detalle, imp_origen, imp_pesos, imp_usd])
-        i += 1
-
-    df = pd.DataFrame(movimientos, columns=[
-        "Fecha", "Tarjeta", "Detalle", "Importe origen", "Importe $", "Importe U$S"
-    ])
-
-    return df
+import fitz  # PyMuPDF
+import re
+import pandas as pd
+
+from bancos.clasificador import ClasificadorLineas
+from bancos.metricas.registro import etapa, sumar_paginas
+from bancos.paralelo import usar_extraccion_paralela, extraer_paginas_en_paralelo
+from bancos.utils_comunes import LARGO_MAXIMO_LINEA, importes_a_float
+
+# Columnas de importes (se convierten a float todas juntas al final del parseo)
+COLUMNAS_IMPORTES = ["Importe origen", "Importe $", "Importe U$S"]
+
+MARCADOR_INICIO = "SALDO DEL ESTADO DE CUENTA ANTERIOR"
+MARCADOR_FIN = "UD. HA GENERADO"
+
+# Líneas que no son movimientos (saldos, pagos, millas, reducción de IVA)
+PALABRAS_OMITIR = ["SALDO DEL ESTADO", "SALDO CONTADO", "PAGOS", "MILLAS", "REDUCCIÓN DE IVA"]
+
+# Movimientos sin fecha ni tarjeta que igual se toman (el importe puede
+# venir en la línea siguiente)
+EXCEPCIONES_VALIDAS = ["SEGURO DE VIDA", "INTERESES COMPENSATORIOS", "INTERESES MORATORIOS"]
+
+# Una sola pasada por línea para las dos listas (líneas y detalles en mayúsculas)
+OMITIR, EXCEPCION = "omitir", "excepcion"
+CLASIFICADOR_LINEAS = ClasificadorLineas({OMITIR: PALABRAS_OMITIR, EXCEPCION: EXCEPCIONES_VALIDAS})
+
+# Importes en formato uruguayo: con el "-" adelante (montos de la línea) y
+# sin signo (lo que se saca de la línea para quedarse con el detalle)
+PATRON_MONTO = re.compile(r"-?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}")
+PATRON_IMPORTE = re.compile(r"\d{1,3}(?:\.\d{3})*,\d{2}")
+
+# Los dos patrones solo recorren bloques de dígitos, puntos, comas y "-", y
+# cada intento se queda dentro de un bloque: con bloques de hasta
+# LARGO_MAXIMO_BLOQUE caracteres el tiempo por línea es lineal. Un bloque
+# más largo (números pegados) no es un importe y queda como texto.
+LARGO_MAXIMO_BLOQUE = 40
+PATRON_BLOQUE = re.compile(r"[\d.,-]+")
+PATRON_BLOQUE_LARGO = re.compile(r"[\d.,-]{%d}" % (LARGO_MAXIMO_BLOQUE + 1))
+
+def abrir_pdf(origen):
+    """Abre un PDF desde una ruta, bytes o un buffer (file-like) sin pasar por disco."""
+    if isinstance(origen, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=bytes(origen), filetype="pdf")
+    if hasattr(origen, "read"):
+        return fitz.open(stream=origen.read(), filetype="pdf")
+    return fitz.open(origen)
+
+def _extraer_paginas_worker(file_bytes, password, desde, hasta):
+    """Worker del pool de procesos: reabre el PDF y extrae las páginas [desde, hasta)."""
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        return [doc[i].get_text() for i in range(desde, hasta)]
+
+def iterar_paginas(doc, file_bytes=None):
+    """
+    Genera el texto de cada página, extrayéndolo recién cuando se pide.
+
+    Deja de leer páginas después de la que contiene MARCADOR_FIN (a partir
+    del inicio de los movimientos): lo que sigue son millas y legales.
+    Si se pasan los bytes del PDF y la extracción paralela está activa,
+    las páginas de PDFs largos se extraen en el pool de procesos.
+    """
+    if file_bytes is not None and usar_extraccion_paralela(len(doc)):
+        textos = extraer_paginas_en_paralelo(_extraer_paginas_worker, file_bytes, None, len(doc))
+    else:
+        textos = (page.get_text() for page in doc)
+
+    inicio_visto = False
+    try:
+        for texto in textos:
+            yield texto
+
+            desde = 0
+            if not inicio_visto:
+                desde = texto.find(MARCADOR_INICIO)
+                inicio_visto = desde != -1
+            if inicio_visto and MARCADOR_FIN in texto[desde:]:
+                return
+    finally:
+        textos.close()
+
+def extraer_texto_movimientos(origen):
+    """
+    Extrae el texto de la sección de movimientos de un PDF de Itaú.
+
+    Args:
+        origen: Bytes del PDF, un buffer (BytesIO, FileStorage) o una ruta en disco
+    """
+    if hasattr(origen, "read"):
+        origen = origen.read()
+    file_bytes = bytes(origen) if isinstance(origen, (bytes, bytearray, memoryview)) else None
+
+    with etapa("extraccion_texto", "itau"), abrir_pdf(origen) as doc:
+        paginas = list(iterar_paginas(doc, file_bytes))
+    sumar_paginas("itau", len(paginas))
+    texto_completo = "\n".join(paginas)
+
+    inicio = texto_completo.find(MARCADOR_INICIO)
+    fin = texto_completo.find(MARCADOR_FIN)
+
+    if inicio != -1 and fin != -1 and fin > inicio:
+        texto_movimientos = texto_completo[inicio:fin]
+    elif inicio != -1:
+        texto_movimientos = texto_completo[inicio:]
+    else:
+        texto_movimientos = texto_completo
+
+    return texto_movimientos
+
+def separar_montos(linea):
+    """
+    Importes de la línea (como texto) y la línea sin ellos.
+
+    Lo mismo que PATRON_MONTO.findall y PATRON_IMPORTE.sub sobre la línea
+    entera, salvo que los bloques de más de LARGO_MAXIMO_BLOQUE caracteres
+    se dejan como están.
+    """
+    if PATRON_BLOQUE_LARGO.search(linea) is None:
+        return PATRON_MONTO.findall(linea), PATRON_IMPORTE.sub("", linea)
+
+    montos, partes, desde = [], [], 0
+    for bloque in PATRON_BLOQUE.finditer(linea):
+        if bloque.end() - bloque.start() > LARGO_MAXIMO_BLOQUE:
+            continue
+        montos += PATRON_MONTO.findall(bloque.group())
+        partes += [linea[desde:bloque.start()], PATRON_IMPORTE.sub("", bloque.group())]
+        desde = bloque.end()
+    partes.append(linea[desde:])
+    return montos, "".join(partes)
+
+@etapa("parseo", "itau")
+def extraer_movimientos(texto_movimientos):
+    """Parsea las líneas de la sección de movimientos y devuelve el DataFrame."""
+    lineas = texto_movimientos.strip().split("\n")
+    movimientos = []
+
+    i = 0
+    while i < len(lineas):
+        original_line = lineas[i].strip()
+
+        # Las líneas demasiado largas son texto roto: no se les buscan importes
+        if (not original_line or len(original_line) > LARGO_MAXIMO_LINEA
+                or OMITIR in CLASIFICADOR_LINEAS.categorias(original_line.upper())):
+            i += 1
+            continue
+
+        if re.fullmatch(r"[%\d\s\.,-]*", original_line) and not re.search(r"[A-Za-z]", original_line):
+            i += 1
+            continue
+
+        montos, texto_limpio = separar_montos(original_line)
+        texto_limpio = texto_limpio.strip()
+
+        fecha_match = re.match(r"(\d{2} \d{2} \d{2})", texto_limpio)
+        fecha = fecha_match.group(1) if fecha_match else ""
+        resto = texto_limpio[len(fecha):].strip() if fecha else texto_limpio
+
+        tarjeta_match = re.match(r"(\d{4})", resto)
+        tarjeta = tarjeta_match.group(1) if tarjeta_match else ""
+        detalle = resto[len(tarjeta):].strip() if tarjeta else resto
+
+        es_excepcion = EXCEPCION in CLASIFICADOR_LINEAS.categorias(detalle.upper())
+
+        # ❌ Si no hay contenido útil
+        if not fecha and not tarjeta and not re.search(r"[A-Za-z]", detalle):
+            i += 1
+            continue
+
+        if not fecha and not tarjeta and not es_excepcion:
+            i += 1
+            continue
+
+        # ⚠️ Si no hay montos y es una excepción, mirar la próxima línea
+        if not montos and es_excepcion:
+            if i + 1 < len(lineas):
+                siguiente = lineas[i + 1]
+                montos = separar_montos(siguiente)[0] if len(siguiente) <= LARGO_MAXIMO_LINEA else []
+                i += 1  # saltamos la línea siguiente porque ya la usamos
+
+        # Los importes quedan como texto hasta el final
+        imp_origen, imp_pesos, imp_usd = None, None, None
+        if es_excepcion:
+            if len(montos) == 2:
+                imp_pesos, imp_usd = montos
+            elif len(montos) == 1:
+                imp_pesos = montos[0]
+        elif len(montos) == 2:
+            imp_origen, imp_usd = montos
+        elif len(montos) == 1:
+            imp_pesos = montos[0]
+
+        movimientos.append([fecha, tarjeta, detalle, imp_origen, imp_pesos, imp_usd])
+        i += 1
+
+    df = pd.DataFrame(movimientos, columns=["Fecha", "Tarjeta", "Detalle"] + COLUMNAS_IMPORTES)
+    for columna in COLUMNAS_IMPORTES:
+        df[columna] = importes_a_float(df[columna])[0]
+
+    return df
+
+def extraer_movimientos_desde_pdf(origen):
+    """
+    Extrae los movimientos de un PDF de Itaú.
+
+    Args:
+        origen: Bytes del PDF, un buffer (BytesIO, FileStorage) o una ruta en disco
+    """
+    return extraer_movimientos(extraer_texto_movimientos(origen))
@@ -0,0 +1,268 @@
+"""
+Análisis de varios estados de cuenta a la vez (lote).
+
+Recibe varios archivos sueltos o zips, posiblemente de distintos bancos y
+tarjetas, detecta el banco de cada uno, los analiza en paralelo en el
+pool de procesos (bancos.paralelo) y combina las proyecciones de cuotas
+mes a mes.
+
+Cada worker devuelve solo el resumen del estado de cuenta (totales y
+proyección, sin la tabla de movimientos) para que el ida y vuelta entre
+procesos sea chico.
+"""
+from io import BytesIO
+import os
+import zipfile
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from bancos.paralelo import obtener_pool, MAX_PROCESOS
+from bancos.procesamiento import procesar_brou, procesar_itau, analizar_santander
+from bancos.itau.parser import MARCADOR_INICIO
+from bancos.santander.parser import (
+    EstadoCuentaSantander,
+    PasswordRequiredError,
+    InvalidPasswordError,
+    SantanderPDFError,
+    MARCADORES_FIN
+)
+
+
+EXTENSIONES_EXCEL = (".xls", ".xlsx")
+EXTENSIONES_LOTE = EXTENSIONES_EXCEL + (".pdf",)
+
+# Límites del lote (también sobre el contenido descomprimido de los zips)
+MAX_ARCHIVOS_LOTE = 24
+MAX_BYTES_LOTE = 50 * 1024 * 1024
+
+TOTALES_SUMABLES = [
+    "pesos", "dolares", "pesos_con_saldo_anterior", "cuotas_pesos", "cuotas_dolares",
+    "corrientes_pesos", "corrientes_dolares", "devoluciones", "saldo_anterior",
+]
+
+
+class LoteInvalidoError(ValueError):
+    """El lote está vacío, es demasiado grande o tiene un zip inválido."""
+    pass
+
+
+def leer_archivos_lote(archivos) -> list:
+    """
+    Expande los archivos subidos a una lista de (nombre_archivo, file_bytes).
+
+    Args:
+        archivos: Iterable de (nombre_archivo, file_bytes); los .zip se abren
+            y se toman sus Excel y PDF (sin carpetas ni archivos ocultos)
+
+    Raises:
+        LoteInvalidoError: Si no hay archivos válidos o se superan los límites
+    """
+    lote = []
+    total_bytes = 0
+
+    def verificar_limites(tamano):
+        if len(lote) >= MAX_ARCHIVOS_LOTE or total_bytes + tamano > MAX_BYTES_LOTE:
+            raise LoteInvalidoError(
+                f"El lote supera el máximo de {MAX_ARCHIVOS_LOTE} archivos "
+                f"o {MAX_BYTES_LOTE // (1024 * 1024)} MB."
+            )
+
+    def agregar(nombre, datos):
+        nonlocal total_bytes
+        verificar_limites(len(datos))
+        total_bytes += len(datos)
+        lote.append((nombre, datos))
+
+    for nombre_archivo, file_bytes in archivos:
+        if not nombre_archivo.lower().endswith(".zip"):
+            agregar(nombre_archivo, file_bytes)
+            continue
+
+        try:
+            with zipfile.ZipFile(BytesIO(file_bytes)) as zip_lote:
+                for info in zip_lote.infolist():
+                    nombre = os.path.basename(info.filename)
+                    if (info.is_dir() or nombre.startswith(".") or "__MACOSX" in info.filename
+                            or not nombre.lower().endswith(EXTENSIONES_LOTE)):
+                        continue
+                    # Controlar el tamaño declarado antes de descomprimir
+                    verificar_limites(info.file_size)
+                    agregar(nombre, zip_lote.read(info))
+        except zipfile.BadZipFile:
+            raise LoteInvalidoError(f"El zip {nombre_archivo} está dañado.")
+
+    if not lote:
+        raise LoteInvalidoError("No se encontró ningún estado de cuenta (.xls, .xlsx o .pdf).")
+    return lote
+
+
+def detectar_banco(nombre_archivo: str, file_bytes: bytes):
+    """
+    Detecta el banco de un estado de cuenta: "brou", "itau", "santander" o None.
+
+    Los Excel son de BROU. En los PDF, uno encriptado es de Santander; si
+    no, se mira el texto de la primera página.
+    """
+    nombre = nombre_archivo.lower()
+    if nombre.endswith(EXTENSIONES_EXCEL):
+        return "brou"
+    if not nombre.endswith(".pdf"):
+        return None
+
+    try:
+        with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+            if doc.needs_pass:
+                return "santander"
+            texto = doc[0].get_text().upper() if doc.page_count else ""
+    except Exception:
+        return None
+
+    if "SANTANDER" in texto:
+        return "santander"
+    if "ITAU" in texto or "ITAÚ" in texto or MARCADOR_INICIO in texto:
+        return "itau"
+    if any(marcador in texto for marcador in MARCADORES_FIN):
+        return "santander"
+    return None
+
+
+def _abrir_santander(file_bytes: bytes, passwords: list) -> EstadoCuentaSantander:
+    """Abre un PDF Santander probando las contraseñas en orden."""
+    estado = EstadoCuentaSantander(file_bytes)
+    if not estado.esta_encriptado:
+        return estado
+    if not passwords:
+        raise PasswordRequiredError("El PDF requiere contraseña.")
+
+    for password in passwords:
+        try:
+            estado.desencriptar(password)
+            return estado
+        except InvalidPasswordError:
+            continue
+    raise InvalidPasswordError("Ninguna de las contraseñas es correcta.")
+
+
+def procesar_archivo(nombre_archivo: str, file_bytes: bytes, passwords: list = None,
+                     banco: str = None):
+    """
+    Procesa un estado de cuenta de cualquier banco (detectándolo si no se indica).
+
+    Returns:
+        (banco, ResultadoAnalisis)
+
+    Raises:
+        ValueError si no se detecta el banco o el Excel no se puede depurar,
+        SantanderPDFError y subclases para los PDF Santander
+    """
+    banco = banco or detectar_banco(nombre_archivo, file_bytes)
+
+    if banco == "brou":
+        return banco, procesar_brou(file_bytes, nombre_archivo)
+    if banco == "itau":
+        return banco, procesar_itau(file_bytes)
+    if banco == "santander":
+        return banco, analizar_santander(_abrir_santander(file_bytes, passwords or []))
+    raise ValueError("No se pudo detectar el banco del archivo.")
+
+
+def error_archivo(error: Exception) -> dict:
+    """Traduce un error de procesar_archivo a {"error_type", "message"}."""
+    if isinstance(error, PasswordRequiredError):
+        return {"error_type": "password_required", "message": "El PDF requiere contraseña."}
+    if isinstance(error, InvalidPasswordError):
+        return {"error_type": "invalid_password", "message": "Ninguna de las contraseñas es correcta."}
+    if isinstance(error, SantanderPDFError):
+        return {"error_type": "pdf_error", "message": str(error)}
+    if isinstance(error, ValueError):
+        return {"error_type": "invalid_file", "message": str(error)}
+    return {"error_type": "unexpected", "message": f"Error inesperado: {str(error)}"}
+
+
+def analizar_archivo_lote(nombre_archivo: str, file_bytes: bytes, passwords: list,
+                          banco: str = None) -> dict:
+    """
+    Analiza un archivo del lote y devuelve su resumen (sin movimientos).
+
+    Es una función de módulo para poder ejecutarla en el pool de procesos.
+    Los errores se devuelven en el resumen, no se lanzan.
+    """
+    banco = banco or detectar_banco(nombre_archivo, file_bytes)
+    try:
+        banco, resultado = procesar_archivo(nombre_archivo, file_bytes, passwords, banco)
+    except Exception as e:
+        return {"nombre_archivo": nombre_archivo, "banco": banco, "success": False, **error_archivo(e)}
+
+    datos = resultado.a_dict(limite=0)
+    datos["cantidad_movimientos"] = datos.pop("movimientos")["total"]
+    return {"nombre_archivo": nombre_archivo, "banco": banco, "success": True, **datos}
+
+
+def combinar_proyecciones(importes: list) -> dict:
+    """
+    Suma las proyecciones de varios estados de cuenta mes a mes.
+
+    Args:
+        importes: Lista de importe_mes (índice = cuotas restantes) de cada uno
+
+    Returns:
+        {"cuotas_restantes", "importe_mes", "saldo_mes"} combinados
+    """
+    meses = max((len(importe) for importe in importes), default=1)
+    importe_mes = np.zeros(meses)
+    for importe in importes:
+        importe_mes[:len(importe)] += importe
+    saldo_mes = importe_mes[::-1].cumsum()[::-1]
+
+    return {
+        "cuotas_restantes": list(range(meses)),
+        "importe_mes": importe_mes.tolist(),
+        "saldo_mes": saldo_mes.tolist(),
+    }
+
+
+def analizar_lote(archivos: list, passwords: list = None, banco: str = None) -> dict:
+    """
+    Analiza un lote de estados de cuenta y combina sus proyecciones.
+
+    Args:
+        archivos: Lista de (nombre_archivo, file_bytes), ya expandida (ver leer_archivos_lote)
+        passwords: Contraseñas a probar en los PDF Santander encriptados
+        banco: Fuerza el banco de todos los archivos (si no, se detecta)
+
+    Returns:
+        {"estados": [resumen de cada archivo], "totales": {...}, "proyeccion": {...}}
+    """
+    passwords = passwords or []
+
+    if len(archivos) > 1 and MAX_PROCESOS > 1:
+        pool = obtener_pool()
+        futuros = [
+            pool.submit(analizar_archivo_lote, nombre, datos, passwords, banco)
+            for nombre, datos in archivos
+        ]
+        estados = [futuro.result() for futuro in futuros]
+    else:
+        estados = [analizar_archivo_lote(nombre, datos, passwords, banco) for nombre, datos in archivos]
+
+    correctos = [estado for estado in estados if estado["success"]]
+    totales = {
+        clave: float(sum(estado["totales"][clave] for estado in correctos))
+        for clave in TOTALES_SUMABLES
+    }
+    cuotas_mes_actual = {
+        clave: sum(estado["cuotas_mes_actual"][clave] for estado in correctos)
+        for clave in ("cantidad", "pesos", "dolares")
+    }
+
+    return {
+        "cantidad_estados": len(estados),
+        "cantidad_errores": len(estados) - len(correctos),
+        "totales": totales,
+        "cuotas_mes_actual": cuotas_mes_actual,
+        "proyeccion": combinar_proyecciones(
+            [estado["proyeccion"]["importe_mes"] for estado in correctos]
+        ),
+        "estados": estados,
+    }
@@ -0,0 +1,2 @@
+# Métricas - Cuotavista
+# Tiempos por etapa, Server-Timing y endpoint /metrics
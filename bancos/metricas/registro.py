@@ -0,0 +1,184 @@
+"""
+Métricas del procesamiento: tiempos por etapa, bytes, páginas y errores.
+
+Cada etapa (desencriptar, extraccion_texto, parseo, lectura_excel,
+analisis, html, excel, compresion) se mide con el context manager etapa(), que
+también sirve de decorador:
+
+    with etapa("analisis", "itau"):
+        resultado = analizar_movimientos(df)
+
+    @etapa("parseo", "itau")
+    def extraer_movimientos(texto): ...
+
+Cada medición se acumula en un histograma por banco y etapa, y además en
+la lista de etapas del request actual (si hay uno), que se devuelve en el
+encabezado Server-Timing. El registro se expone en formato de texto de
+Prometheus en /metrics (ver bancos/metricas/routes.py).
+
+El registro vive en la memoria de cada proceso: con varios workers de
+gunicorn cada scrape de /metrics ve solo el worker que lo atendió, y lo
+que se procesa en el pool de procesos (lotes) no se cuenta.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+
+# Límites superiores de los buckets de los histogramas (segundos)
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Descripción y tipo de cada métrica (el orden es el de /metrics)
+METRICAS = {
+    "cuotavista_etapa_segundos": ("histogram", "Duración de cada etapa del procesamiento"),
+    "cuotavista_procesamiento_segundos": ("histogram", "Duración del procesamiento completo de un archivo"),
+    "cuotavista_bytes_procesados_total": ("counter", "Bytes de archivos procesados"),
+    "cuotavista_paginas_procesadas_total": ("counter", "Páginas de PDF de las que se extrajo texto"),
+    "cuotavista_errores_total": ("counter", "Archivos que fallaron al procesarse, por tipo de error"),
+    "cuotavista_respuestas_total": ("counter", "Respuestas de los endpoints de cada banco, por código HTTP"),
+    "cuotavista_cache_resultados_total": ("counter", "Búsquedas en el cache de resultados, por resultado (acierto o fallo)"),
+}
+
+# Etapas medidas en el request actual: lista de (nombre, segundos) o None fuera de un request
+_etapas_request = ContextVar("cuotavista_etapas_request", default=None)
+
+# Indica si ya se está midiendo un procesamiento completo (para no contarlo dos veces)
+_en_procesamiento = ContextVar("cuotavista_en_procesamiento", default=False)
+
+
+class Registro:
+    """Contadores e histogramas con etiquetas, thread-safe."""
+
+    def __init__(self, buckets: tuple = BUCKETS_SEGUNDOS):
+        self.buckets = buckets
+        # nombre -> {etiquetas (tupla ordenada de pares) -> valor}
+        self._contadores = {}
+        # nombre -> {etiquetas -> [cuentas por bucket..., suma, cantidad]}
+        self._histogramas = {}
+        self._lock = threading.Lock()
+
+    def sumar(self, nombre: str, valor: float = 1, **etiquetas) -> None:
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            serie = self._contadores.setdefault(nombre, {})
+            serie[clave] = serie.get(clave, 0) + valor
+
+    def observar(self, nombre: str, valor: float, **etiquetas) -> None:
+        clave = tuple(sorted(etiquetas.items()))
+        # Bucket del valor; los acumulados se calculan al exportar
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._histogramas.setdefault(nombre, {})
+            datos = serie.get(clave)
+            if datos is None:
+                datos = serie[clave] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            datos[indice] += 1
+            datos[-2] += valor
+            datos[-1] += 1
+
+    def texto_prometheus(self) -> str:
+        """Exporta el registro en el formato de texto de Prometheus (0.0.4)."""
+        with self._lock:
+            contadores = {nombre: dict(serie) for nombre, serie in self._contadores.items()}
+            histogramas = {nombre: {clave: list(datos) for clave, datos in serie.items()}
+                           for nombre, serie in self._histogramas.items()}
+
+        lineas = []
+        for nombre, (tipo, ayuda) in METRICAS.items():
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            if tipo == "counter":
+                for clave, valor in sorted(contadores.get(nombre, {}).items()):
+                    lineas.append(f"{nombre}{_etiquetas(clave)} {_numero(valor)}")
+                continue
+
+            for clave, datos in sorted(histogramas.get(nombre, {}).items()):
+                acumulado = 0
+                for limite, cuenta in zip(self.buckets + ("+Inf",), datos):
+                    acumulado += cuenta
+                    lineas.append(f"{nombre}_bucket{_etiquetas(clave, le=limite)} {acumulado}")
+                lineas.append(f"{nombre}_sum{_etiquetas(clave)} {_numero(datos[-2])}")
+                lineas.append(f"{nombre}_count{_etiquetas(clave)} {datos[-1]}")
+
+        return "\n".join(lineas) + "\n"
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(clave: tuple, **extra) -> str:
+    pares = list(clave) + list(extra.items())
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in pares) + "}"
+
+
+def _numero(valor) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+registro = Registro()
+
+
+@contextmanager
+def etapa(nombre: str, banco: str = ""):
+    """Mide una etapa del procesamiento (context manager o decorador)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        registro.observar("cuotavista_etapa_segundos", segundos, banco=banco, etapa=nombre)
+        etapas = _etapas_request.get()
+        if etapas is not None:
+            etapas.append((nombre, segundos))
+
+
+@contextmanager
+def procesamiento(banco: str, n_bytes: int):
+    """
+    Mide el procesamiento completo de un archivo: duración, bytes y, si
+    lanza una excepción, el error (por clase). Si ya se está midiendo un
+    procesamiento (una función de procesamiento que llama a otra), no
+    cuenta de nuevo.
+    """
+    if _en_procesamiento.get():
+        yield
+        return
+
+    marca = _en_procesamiento.set(True)
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        registro.sumar("cuotavista_errores_total", banco=banco, tipo=type(e).__name__)
+        raise
+    finally:
+        _en_procesamiento.reset(marca)
+        registro.observar("cuotavista_procesamiento_segundos", time.perf_counter() - inicio, banco=banco)
+        registro.sumar("cuotavista_bytes_procesados_total", n_bytes, banco=banco)
+
+
+def sumar_paginas(banco: str, n_paginas: int) -> None:
+    """Cuenta páginas de PDF de las que se extrajo texto."""
+    registro.sumar("cuotavista_paginas_procesadas_total", n_paginas, banco=banco)
+
+
+def iniciar_request() -> None:
+    """Empieza a juntar las etapas del request actual (para Server-Timing)."""
+    _etapas_request.set([])
+
+
+def server_timing(total: float = None) -> str:
+    """
+    Valor del encabezado Server-Timing con las etapas del request actual
+    (en milisegundos), o "" si no se midió ninguna.
+    """
+    etapas = _etapas_request.get() or []
+    partes = [f"{nombre};dur={segundos * 1000:.1f}" for nombre, segundos in etapas]
+    if partes and total is not None:
+        partes.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(partes)
@@ -0,0 +1,53 @@
+# bancos/metricas/routes.py
+
+import hmac
+import os
+import time
+
+from flask import Blueprint, Response, request, g
+
+from bancos.metricas.registro import registro, iniciar_request, server_timing
+from bancos.procesamiento import BANCOS
+
+metricas_bp = Blueprint("metricas", __name__)
+
+# Si está definido, /metrics exige "Authorization: Bearer <token>"
+TOKEN_METRICAS = os.environ.get("CUOTAVISTA_METRICAS_TOKEN")
+
+
+def _banco_del_request():
+    """Banco al que corresponde el request (blueprint del banco o /api/v1/<banco>)."""
+    if request.blueprint in BANCOS:
+        return request.blueprint
+    banco = (request.view_args or {}).get("banco")
+    return banco if banco in BANCOS else None
+
+
+@metricas_bp.before_app_request
+def _iniciar_medicion():
+    g.inicio_request = time.perf_counter()
+    iniciar_request()
+
+
+@metricas_bp.after_app_request
+def _agregar_server_timing(response):
+    inicio = g.get("inicio_request")
+    valor = server_timing(time.perf_counter() - inicio if inicio is not None else None)
+    if valor:
+        response.headers["Server-Timing"] = valor
+
+    banco = _banco_del_request()
+    if banco is not None:
+        registro.sumar("cuotavista_respuestas_total", banco=banco, codigo=str(response.status_code))
+    return response
+
+
+@metricas_bp.route("/metrics", methods=["GET"])
+def metricas():
+    """Métricas del proceso en formato de texto de Prometheus."""
+    if TOKEN_METRICAS:
+        esperado = f"Bearer {TOKEN_METRICAS}"
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), esperado):
+            return "No autorizado", 401
+
+    return Response(registro.texto_prometheus(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,91 @@
+"""
+Extracción de texto de PDFs en paralelo (opcional).
+
+Para estados de cuenta largos, las páginas se reparten entre un pool de
+procesos: cada worker reabre el PDF desde los mismos bytes, extrae su
+rango de páginas y el texto se devuelve en el orden original.
+
+Se activa con la variable de entorno CUOTAVISTA_EXTRACCION_PARALELA=1 y
+solo se usa a partir de MIN_PAGINAS_PARALELO páginas; los PDFs chicos
+siguen extrayéndose en el mismo proceso.
+
+Los workers se crean con el método "forkserver": el servidor web ya tiene
+hilos corriendo (gunicorn, la cola de trabajos) y hacer fork de un proceso
+con hilos puede dejar locks tomados en el hijo. El forkserver precarga los
+parsers, así cada worker nuevo no los vuelve a importar. Como con
+"spawn", el script principal que use el pool tiene que estar protegido
+con if __name__ == "__main__" (app.py y gunicorn ya lo están).
+"""
+from concurrent.futures import ProcessPoolExecutor
+import math
+import multiprocessing
+import os
+import threading
+
+
+EXTRACCION_PARALELA = os.environ.get("CUOTAVISTA_EXTRACCION_PARALELA", "0") == "1"
+MIN_PAGINAS_PARALELO = int(os.environ.get("CUOTAVISTA_MIN_PAGINAS_PARALELO", "10"))
+MAX_PROCESOS = int(os.environ.get("CUOTAVISTA_PROCESOS", os.cpu_count() or 2))
+
+# Módulos que el forkserver importa una vez antes de crear workers
+MODULOS_PRECARGA = ["bancos.itau.parser", "bancos.santander.parser", "bancos.lotes"]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def inicializar_worker() -> None:
+    """
+    Initializer de los pools de procesos (este y el de la línea de
+    comandos): dentro de un worker no se extrae en paralelo (no se anidan pools).
+    """
+    global EXTRACCION_PARALELA
+    EXTRACCION_PARALELA = False
+
+
+def obtener_pool() -> ProcessPoolExecutor:
+    """Devuelve el pool de procesos compartido, creándolo la primera vez."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            contexto = multiprocessing.get_context("forkserver")
+            contexto.set_forkserver_preload(MODULOS_PRECARGA)
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROCESOS, mp_context=contexto,
+                                        initializer=inicializar_worker)
+        return _pool
+
+
+def usar_extraccion_paralela(n_paginas: int) -> bool:
+    """Indica si conviene extraer en paralelo un PDF de n_paginas."""
+    return EXTRACCION_PARALELA and MAX_PROCESOS > 1 and n_paginas >= MIN_PAGINAS_PARALELO
+
+
+def extraer_paginas_en_paralelo(worker, file_bytes: bytes, password, n_paginas: int):
+    """
+    Genera el texto de cada página en orden, extrayendo en el pool de procesos.
+
+    Args:
+        worker: Función de módulo worker(file_bytes, password, desde, hasta)
+            que devuelve la lista de textos de las páginas [desde, hasta)
+        file_bytes: Bytes del PDF (cada worker lo reabre)
+        password: Contraseña del PDF o None
+        n_paginas: Cantidad total de páginas
+
+    Las páginas se reparten en bloques chicos (unos dos por proceso) para
+    que, si quien consume corta antes (marcador de fin), los bloques que
+    todavía no empezaron se cancelen.
+    """
+    pool = obtener_pool()
+    tamano = max(1, math.ceil(n_paginas / (MAX_PROCESOS * 2)))
+
+    futuros = [
+        pool.submit(worker, file_bytes, password, desde, min(desde + tamano, n_paginas))
+        for desde in range(0, n_paginas, tamano)
+    ]
+
+    try:
+        for futuro in futuros:
+            yield from futuro.result()
+    finally:
+        for futuro in futuros:
+            futuro.cancel()
@@ -0,0 +1,144 @@
+"""
+Procesamiento completo de un estado de cuenta: parseo + análisis.
+
+Cada banco tiene una función que recibe los bytes del archivo y devuelve
+un ResultadoAnalisis. Las usan los blueprints y todo lo que procesa
+archivos fuera del request (trabajos asincrónicos, API, lotes).
+
+Los resultados se guardan en el cache por contenido
+(bancos.cache_resultados): el mismo archivo subido de nuevo no se vuelve a
+procesar.
+"""
+import os
+
+from io import BytesIO
+
+from flask import render_template, url_for
+import pandas as pd
+
+from bancos.analisis import analizar_movimientos, ResultadoAnalisis
+from bancos.almacen import guardar_resultado
+from bancos.cache_resultados import clave_cache, resultado_cacheado
+from bancos.metricas.registro import etapa, procesamiento
+from bancos.brou.parser import depurar_archivo
+from bancos.itau.parser import extraer_movimientos_desde_pdf
+from bancos.santander.parser import EstadoCuentaSantander
+
+
+# Datos de presentación de cada banco
+BANCOS = {
+    "brou": {"nombre": "BROU", "color": "blue"},
+    "itau": {"nombre": "Itaú", "color": "orange"},
+    "santander": {"nombre": "Santander", "color": "red"},
+}
+
+# Versión del parser y del análisis de cada banco, parte de la clave del
+# cache de resultados: subirla cuando un cambio modifica los resultados
+VERSIONES_PARSER = {
+    "brou": 2,
+    "itau": 2,
+    "santander": 2,
+}
+
+
+def procesar_brou(file_bytes: bytes, nombre_archivo: str) -> ResultadoAnalisis:
+    """Procesa un Excel de BROU. Lanza ValueError si no se puede depurar."""
+    # La extensión define con qué motor se lee el Excel
+    extension = os.path.splitext(nombre_archivo or "")[1].encode()
+    clave = clave_cache("brou", VERSIONES_PARSER["brou"], file_bytes, extension)
+    return resultado_cacheado("brou", clave, lambda: _procesar_brou(file_bytes, nombre_archivo))
+
+
+def _procesar_brou(file_bytes: bytes, nombre_archivo: str) -> ResultadoAnalisis:
+    with procesamiento("brou", len(file_bytes)):
+        with etapa("lectura_excel", "brou"):
+            df = _depurar_brou(file_bytes, nombre_archivo)
+        with etapa("analisis", "brou"):
+            return analizar_movimientos(df)
+
+
+def _depurar_brou(file_bytes: bytes, nombre_archivo: str) -> pd.DataFrame:
+    result = depurar_archivo(BytesIO(file_bytes), nombre_archivo)
+    # El parser puede retornar df o (None, error_msg)
+    if isinstance(result, tuple):
+        df, error_msg = result
+        if df is None:
+            raise ValueError(f"El archivo no se pudo procesar: {error_msg}")
+    else:
+        df = result
+    if df is None:
+        raise ValueError("El archivo no se pudo procesar correctamente.")
+    return df
+
+
+def procesar_itau(file_bytes: bytes) -> ResultadoAnalisis:
+    """Procesa un PDF de Itaú."""
+    clave = clave_cache("itau", VERSIONES_PARSER["itau"], file_bytes)
+    return resultado_cacheado("itau", clave, lambda: _procesar_itau(file_bytes))
+
+
+def _procesar_itau(file_bytes: bytes) -> ResultadoAnalisis:
+    with procesamiento("itau", len(file_bytes)):
+        df = extraer_movimientos_desde_pdf(file_bytes)
+        with etapa("analisis", "itau"):
+            return analizar_movimientos(df)
+
+
+def analizar_santander(estado: EstadoCuentaSantander) -> ResultadoAnalisis:
+    """Analiza un PDF de Santander ya abierto (y desencriptado)."""
+    clave = clave_cache("santander", VERSIONES_PARSER["santander"], *estado.huella)
+    return resultado_cacheado("santander", clave, lambda: _analizar_santander(estado))
+
+
+def _analizar_santander(estado: EstadoCuentaSantander) -> ResultadoAnalisis:
+    with procesamiento("santander", len(estado.file_bytes)):
+        # Movimientos, validación y resumen salen de una única extracción de texto
+        df = estado.df
+        resumen = estado.resumen
+        with etapa("analisis", "santander"):
+            df["Importe $"] = pd.to_numeric(df["Importe $"], errors="coerce").fillna(0)
+            df["Importe U$S"] = pd.to_numeric(df["Importe U$S"], errors="coerce").fillna(0)
+
+            return analizar_movimientos(
+                df, separar_devoluciones=True, resumen=resumen, validacion=estado.validacion
+            )
+
+
+def procesar_santander(file_bytes: bytes, password: str = None) -> ResultadoAnalisis:
+    """Procesa un PDF de Santander. Lanza SantanderPDFError y subclases."""
+    with procesamiento("santander", len(file_bytes)):
+        return analizar_santander(EstadoCuentaSantander(file_bytes, password))
+
+
+def procesar_estado_cuenta(banco: str, file_bytes: bytes, nombre_archivo: str,
+                           password: str = None) -> ResultadoAnalisis:
+    """Procesa un estado de cuenta de cualquier banco soportado."""
+    if banco == "brou":
+        return procesar_brou(file_bytes, nombre_archivo)
+    if banco == "itau":
+        return procesar_itau(file_bytes)
+    if banco == "santander":
+        return procesar_santander(file_bytes, password)
+    raise ValueError(f"Banco no soportado: {banco}")
+
+
+def renderizar_resultado(resultado: ResultadoAnalisis, nombre_archivo: str, banco: str,
+                         token: str = None):
+    """
+    Renderiza resultado.html. Si no se indica el token del resultado ya
+    guardado, lo guarda (para el Excel).
+    """
+    # El Excel se genera recién cuando se descarga y los movimientos se piden por páginas
+    token = token or guardar_resultado(resultado)
+    nombre_excel = f"{token}.xlsx"
+
+    contexto = resultado.contexto_plantilla(
+        nombre_archivo=nombre_archivo,
+        nombre_excel=nombre_excel,
+        nombre_banco=BANCOS[banco]["nombre"],
+        banco_color=BANCOS[banco]["color"],
+    )
+    contexto["url_movimientos"] = url_for("movimientos", token=token)
+
+    with etapa("html", banco):
+        return render_template("resultado.html", **contexto)
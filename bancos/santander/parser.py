@@ -13,9 +13,16 @@ REGLAS DE PARSING (v2 - fail-safe):
 
 from pypdf import PdfReader
 from io import BytesIO
+from functools import cached_property
+import numpy as np
 import pandas as pd
 import re
 
+from bancos.clasificador import ClasificadorLineas
+from bancos.metricas.registro import etapa, sumar_paginas
+from bancos.utils_comunes import LARGO_MAXIMO_LINEA, importe_a_float, importes_a_float
+from bancos.paralelo import usar_extraccion_paralela, extraer_paginas_en_paralelo
+
 
 # ============================================================================
 # BLACKLIST: Palabras que indican líneas de resumen/metadata (NO transacciones)
@@ -48,12 +55,22 @@ BLACKLIST_PALABRAS = [
     "NÚMERO DE CUENTA",
 ]
 
+# Marcadores de fin de la sección de movimientos (CORTE del parseo)
+MARCADORES_FIN = ['TOTAL DEV LEY', 'SALDO CONTADO', 'IMPORTE TOTAL', 'P.MINIMO', 'P.CONTADO']
+
 # Patrón FUERTE para transacciones válidas:
 # fecha (dd/mm/yyyy) + espacio + tarjeta (3 dígitos) + espacio + detalle + espacio + importe
+#
+# Tiempo lineal en el largo de la línea: el detalle empieza y termina en un
+# carácter que no es espacio, así que cada tramo de espacios se recorre una
+# sola vez (desde el carácter anterior) y el importe se prueba al final de
+# cada tramo (en los espacios falla en el primer carácter). Con (.+?)\s+ el detalle podía terminar en cada espacio de un
+# tramo largo y la línea tardaba tiempo cuadrático. Los movimientos que
+# encuentra son los mismos.
 PATRON_TRANSACCION_FUERTE = re.compile(
     r'^(\d{2}/\d{2}/\d{4})\s+'    # Fecha dd/mm/yyyy + espacio obligatorio
     r'(\d{3})\s+'                  # Tarjeta exactamente 3 dígitos + espacio
-    r'(.+?)\s+'                    # Detalle (captura mínima)
+    r'(\S.*?)(?<=\S)\s+'           # Detalle (captura mínima, sin espacios en los bordes)
     r'([\d]{1,3}(?:\.[\d]{3})*,[\d]{2}-?)\s*$'  # Importe formato uruguayo
 )
 
@@ -72,13 +89,28 @@ CONCEPTOS_VALIDOS = [
     'IVA 22%',
 ]
 
-# Patrón controlado para conceptos válidos SIN tarjeta
+# Clasificación de cada línea (en mayúsculas) con una sola pasada, por
+# prioridad: inicio de movimientos, fin (CORTE), ruido, concepto válido.
+# Sin ninguna palabra clave la línea es candidata a transacción.
+INICIO, FIN, RUIDO, CONCEPTO, CANDIDATO = "inicio", "fin", "ruido", "concepto", "candidato"
+CLASIFICADOR_LINEAS = ClasificadorLineas({
+    INICIO: ["SALDO ANTERIOR"],
+    FIN: MARCADORES_FIN,
+    RUIDO: BLACKLIST_PALABRAS,
+    CONCEPTO: CONCEPTOS_VALIDOS,
+})
+
+# Patrón controlado para conceptos válidos SIN tarjeta (lineal, como el fuerte)
 PATRON_CONCEPTO_SIN_TARJETA = re.compile(
     r'^(\d{2}/\d{2}/\d{4})\s+'    # Fecha
-    r'(.+?)\s+'                      # Detalle
+    r'(\S.*?)(?<=\S)\s+'             # Detalle
     r'([\d]{1,3}(?:\.[\d]{3})*,[\d]{2}-?)\s*$'  # Importe uy
 )
 
+# Importe al final de la línea TOTAL DEV LEY. Solo se prueba desde el inicio
+# de cada número (no desde cada dígito), así el tiempo es lineal
+PATRON_IMPORTE_FINAL = re.compile(r'(?<![\d.,])([\d.,]+-?)\s*$')
+
 
 class SantanderPDFError(Exception):
     """Excepción base para errores de procesamiento de PDF Santander."""
@@ -111,13 +143,15 @@ def es_linea_ruido(linea: str) -> bool:
     Returns:
         True si la línea debe descartarse, False si puede ser transacción.
     """
-    linea_upper = linea.upper()
-    
     # 1. Blacklist de palabras clave
-    for palabra in BLACKLIST_PALABRAS:
-        if palabra in linea_upper:
-            return True
+    if RUIDO in CLASIFICADOR_LINEAS.categorias(linea.upper()):
+        return True
     
+    return _es_ruido_por_formato(linea)
+
+
+def _es_ruido_por_formato(linea: str) -> bool:
+    """Reglas de ruido que no dependen de palabras clave (ver es_linea_ruido)."""
     # 2. Línea sin letras (solo números, puntuación, espacios)
     if not re.search(r'[A-Za-z]', linea):
         return True
@@ -130,6 +164,10 @@ def es_linea_ruido(linea: str) -> bool:
     if len(linea.strip()) < 15:
         return True
     
+    # 5. Línea demasiado larga: texto roto, no se le aplican los patrones
+    if len(linea) > LARGO_MAXIMO_LINEA:
+        return True
+    
     return False
 
 
@@ -140,27 +178,17 @@ def parse_importe(monto_str: str) -> float:
     Formato uruguayo: 1.234,56 (punto = miles, coma = decimales)
     Negativo: trailing "-" (ej: 741,96-)
     
+    Para columnas enteras usar importes_a_float (utils_comunes), que aplica
+    las mismas reglas de una sola vez.
+    
     Args:
         monto_str: String con el monto (ej: "1.234,56-")
     
     Returns:
-        Float con signo correcto (ej: -1234.56)
+        Float con signo correcto (ej: -1234.56), 0.0 si no es un monto
     """
-    monto_str = monto_str.strip()
-    
-    # Detectar negativo (trailing -)
-    negativo = monto_str.endswith('-')
-    if negativo:
-        monto_str = monto_str[:-1]
-    
-    # Convertir formato: quitar puntos de miles, cambiar coma por punto
-    monto_str = monto_str.replace(".", "").replace(",", ".")
-    
-    try:
-        valor = float(monto_str)
-        return -valor if negativo else valor
-    except ValueError:
-        return 0.0
+    valor = importe_a_float(monto_str)
+    return 0.0 if np.isnan(valor) else valor
 
 
 def validar_detalle(detalle: str) -> bool:
@@ -218,12 +246,53 @@ def check_pdf_encrypted(file_bytes: bytes) -> bool:
         return True
 
 
+def _extraer_paginas_worker(file_bytes: bytes, password: str, desde: int, hasta: int) -> list:
+    """Worker del pool de procesos: reabre el PDF y extrae las páginas [desde, hasta)."""
+    reader = PdfReader(BytesIO(file_bytes))
+    if reader.is_encrypted:
+        reader.decrypt(password or "")
+    return [reader.pages[i].extract_text() or "" for i in range(desde, hasta)]
+
+
+def iterar_paginas(reader: PdfReader, hasta_fin: bool = True,
+                   file_bytes: bytes = None, password: str = None):
+    """
+    Genera el texto de cada página, extrayéndolo recién cuando se pide.
+    
+    Con hasta_fin=True deja de leer páginas después de la primera que
+    contiene un marcador de fin (MARCADORES_FIN): el resto del PDF
+    (legales, publicidad) no se usa y no vale la pena extraerlo.
+    
+    Si se pasan los bytes del PDF y la extracción paralela está activa,
+    las páginas de PDFs largos se extraen en el pool de procesos.
+    """
+    n_paginas = len(reader.pages)
+    if file_bytes is not None and usar_extraccion_paralela(n_paginas):
+        textos = extraer_paginas_en_paralelo(_extraer_paginas_worker, file_bytes, password, n_paginas)
+    else:
+        textos = (page.extract_text() or "" for page in reader.pages)
+    
+    try:
+        for texto in textos:
+            yield texto
+            
+            if hasta_fin:
+                texto_upper = texto.upper()
+                if any(marcador in texto_upper for marcador in MARCADORES_FIN):
+                    return
+    finally:
+        textos.close()
+
+
 def extraer_texto_completo(reader: PdfReader) -> str:
-    """Extrae todo el texto del PDF."""
-    texto = ""
-    for page in reader.pages:
-        texto += page.extract_text() or ""
-    return texto
+    """Extrae todo el texto del PDF (una página por bloque de líneas)."""
+    return "\n".join(iterar_paginas(reader, hasta_fin=False))
+
+
+def extraer_texto_movimientos(reader: PdfReader, file_bytes: bytes = None,
+                              password: str = None) -> str:
+    """Extrae el texto del PDF hasta la página del marcador de fin inclusive."""
+    return "\n".join(iterar_paginas(reader, file_bytes=file_bytes, password=password))
 
 
 def _es_devolucion_ley(detalle: str) -> bool:
@@ -257,9 +326,6 @@ def extraer_movimientos(texto: str) -> tuple:
     lineas = texto.split('\n')
     en_movimientos = False
     
-    # Marcadores de inicio/fin de sección de movimientos
-    MARCADORES_FIN = ['TOTAL DEV LEY', 'SALDO CONTADO', 'IMPORTE TOTAL', 'P.MINIMO', 'P.CONTADO']
-    
     for linea in lineas:
         linea_original = linea
         linea = linea.strip()
@@ -268,40 +334,35 @@ def extraer_movimientos(texto: str) -> tuple:
         if not linea:
             continue
         
+        linea_upper = linea.upper()
+        clase = CLASIFICADOR_LINEAS.clasificar(linea_upper, CANDIDATO)
+        
         # Detectar inicio de sección de movimientos
-        if 'SALDO ANTERIOR' in linea.upper():
+        if clase == INICIO:
             en_movimientos = True
             continue  # No procesar esta línea como movimiento
         
         # Detectar fin de sección (CORTE)
-        linea_upper = linea.upper()
-        es_fin = False
-        for marcador in MARCADORES_FIN:
-            if marcador in linea_upper:
-                # Guardar TOTAL DEV LEY si existe
-                if 'TOTAL DEV LEY' in linea_upper:
-                    match_total = re.search(r'([\d.,]+(?:-)?)\s*$', linea)
-                    if match_total:
-                        total_dev_ley_pdf = abs(parse_importe(match_total.group(1)))
-                es_fin = True
-                break
-        
-        if es_fin:
+        if clase == FIN:
+            # Guardar TOTAL DEV LEY si existe
+            if 'TOTAL DEV LEY' in linea_upper:
+                match_total = PATRON_IMPORTE_FINAL.search(linea)
+                if match_total:
+                    total_dev_ley_pdf = abs(parse_importe(match_total.group(1)))
             break
         
         if not en_movimientos:
             continue
         
-        # FILTRO 1: Es línea de ruido?
-        if es_linea_ruido(linea):
+        # FILTRO 1: Es línea de ruido? (blacklist ya clasificada, o formato)
+        if clase == RUIDO or _es_ruido_por_formato(linea):
             continue
         
         # FILTRO 2: Aplicar patrón FUERTE
         match = PATRON_TRANSACCION_FUERTE.match(linea)
         if not match:
             # Si no cumple el patrón fuerte, evaluar si es concepto válido SIN tarjeta
-            linea_up = linea_upper
-            if any(conc in linea_up for conc in CONCEPTOS_VALIDOS):
+            if clase == CONCEPTO:
                 match_conc = PATRON_CONCEPTO_SIN_TARJETA.match(linea)
                 if match_conc:
                     fecha_c, detalle_c, monto_c = match_conc.groups()
@@ -311,7 +372,7 @@ def extraer_movimientos(texto: str) -> tuple:
                             'Fecha': fecha_c,
                             'Tarjeta': '',
                             'Detalle': detalle_c,
-                            'Importe $': parse_importe(monto_c),
+                            'Importe $': monto_c,
                             'Importe U$S': 0.0
                         })
                         continue
@@ -334,7 +395,7 @@ def extraer_movimientos(texto: str) -> tuple:
             'Fecha': fecha,
             'Tarjeta': tarjeta,
             'Detalle': detalle,
-            'Importe $': parse_importe(monto_str),
+            'Importe $': monto_str,
             'Importe U$S': 0.0
         })
     
@@ -343,6 +404,9 @@ def extraer_movimientos(texto: str) -> tuple:
     
     if df.empty:
         df = pd.DataFrame(columns=['Fecha', 'Tarjeta', 'Detalle', 'Importe $', 'Importe U$S'])
+    else:
+        # Los importes se convierten todos juntos (los patrones ya validaron el formato)
+        df['Importe $'] = importes_a_float(df['Importe $'])[0]
     
     validacion = _calcular_validacion_devoluciones(df, total_dev_ley_pdf)
     
@@ -378,34 +442,145 @@ def _calcular_validacion_devoluciones(df: pd.DataFrame, total_dev_ley_pdf: float
     return validacion
 
 
+# Campos del resumen y su patrón (el importe es el grupo 1)
+PATRONES_RESUMEN = {
+    'saldo_anterior': re.compile(r'SALDO ANTERIOR\s+([\d.,]+)'),
+    'saldo_contado': re.compile(r'SALDO CONTADO\s+([\d.,]+)'),
+    'pago_minimo': re.compile(r'P\.?Minimo:?\s*([\d.,]+)', re.IGNORECASE),
+    'pago_contado': re.compile(r'P\.?Contado:?\s*([\d.,]+)', re.IGNORECASE),
+}
+
+
+def campos_resumen_faltantes(texto: str) -> list:
+    """Campos del resumen que todavía no aparecen en el texto."""
+    return [campo for campo, patron in PATRONES_RESUMEN.items() if not patron.search(texto)]
+
+
 def extraer_resumen(texto: str) -> dict:
     """Extrae campos de resumen del texto del PDF."""
-    resumen = {
-        'saldo_anterior': 0.0,
-        'saldo_contado': 0.0,
-        'pago_minimo': 0.0,
-        'pago_contado': 0.0
-    }
-    
-    match = re.search(r'SALDO ANTERIOR\s+([\d.,]+)', texto)
-    if match:
-        resumen['saldo_anterior'] = parse_importe(match.group(1))
-    
-    match = re.search(r'SALDO CONTADO\s+([\d.,]+)', texto)
-    if match:
-        resumen['saldo_contado'] = parse_importe(match.group(1))
+    resumen = {campo: 0.0 for campo in PATRONES_RESUMEN}
     
-    match = re.search(r'P\.?Minimo:?\s*([\d.,]+)', texto, re.IGNORECASE)
-    if match:
-        resumen['pago_minimo'] = parse_importe(match.group(1))
-    
-    match = re.search(r'P\.?Contado:?\s*([\d.,]+)', texto, re.IGNORECASE)
-    if match:
-        resumen['pago_contado'] = parse_importe(match.group(1))
+    for campo, patron in PATRONES_RESUMEN.items():
+        match = patron.search(texto)
+        if match:
+            resumen[campo] = parse_importe(match.group(1))
     
     return resumen
 
 
+class EstadoCuentaSantander:
+    """
+    Estado de cuenta Santander parseado una sola vez.
+
+    Abre el PDF una única vez, lo desencripta (si hace falta) y extrae el
+    texto una sola vez. Movimientos, resumen y validación se calculan a
+    demanda a partir de ese mismo texto.
+
+    Uso:
+        estado = EstadoCuentaSantander(file_bytes)
+        if estado.esta_encriptado:
+            estado.desencriptar(password)
+        df = estado.df
+        resumen = estado.resumen
+    """
+
+    def __init__(self, file_bytes: bytes, password: str = None):
+        self.file_bytes = file_bytes
+        self._password = None
+        try:
+            self.reader = PdfReader(BytesIO(file_bytes))
+        except Exception as e:
+            raise InvalidPDFError(f"Archivo inválido: no se pudo leer como PDF. Error: {str(e)}")
+
+        self.esta_encriptado = self.reader.is_encrypted
+        self._desencriptado = not self.esta_encriptado
+
+        if password:
+            self.desencriptar(password)
+
+    def desencriptar(self, password: str) -> None:
+        """Desencripta el PDF. No extrae texto."""
+        if self._desencriptado:
+            return
+
+        if not password:
+            raise PasswordRequiredError("El PDF está encriptado.")
+
+        try:
+            with etapa("desencriptar", "santander"):
+                decrypt_result = self.reader.decrypt(password)
+            if decrypt_result == 0:
+                raise InvalidPasswordError("Contraseña incorrecta.")
+        except InvalidPasswordError:
+            raise
+        except Exception as e:
+            raise InvalidPasswordError(f"Contraseña incorrecta. Error: {str(e)}")
+
+        self._desencriptado = True
+        # Solo en memoria, para que los workers de extracción paralela reabran el PDF
+        self._password = password
+
+    @cached_property
+    def huella(self) -> tuple:
+        """
+        Partes que identifican el PDF para el cache de resultados: los bytes
+        del archivo y el contenido desencriptado de la primera página (que
+        la extracción de texto lee igual). Sin la contraseña no se puede
+        armar la clave de un resultado guardado.
+        """
+        if not self._desencriptado:
+            raise PasswordRequiredError("El PDF está encriptado.")
+        contenido = self.reader.pages[0].get_contents() if len(self.reader.pages) else None
+        return self.file_bytes, contenido.get_data() if contenido is not None else b""
+
+    @cached_property
+    def paginas(self) -> list:
+        """Texto de cada página hasta la del marcador de fin inclusive."""
+        if not self._desencriptado:
+            raise PasswordRequiredError("El PDF está encriptado.")
+        with etapa("extraccion_texto", "santander"):
+            paginas = list(iterar_paginas(self.reader, file_bytes=self.file_bytes, password=self._password))
+        sumar_paginas("santander", len(paginas))
+        return paginas
+
+    @cached_property
+    def texto(self) -> str:
+        """Texto hasta el fin de los movimientos (incluye el resumen de esa página)."""
+        return "\n".join(self.paginas)
+
+    @cached_property
+    def _movimientos(self) -> tuple:
+        texto = self.texto
+        with etapa("parseo", "santander"):
+            return extraer_movimientos(texto)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._movimientos[0]
+
+    @property
+    def validacion(self) -> dict:
+        return self._movimientos[1]
+
+    @cached_property
+    def resumen(self) -> dict:
+        """
+        Campos del resumen. Si el marcador de fin cierra una página y el
+        resumen sigue en la siguiente, se leen más páginas hasta encontrar
+        todos los campos (o terminar el PDF).
+        """
+        texto = self.texto
+        pagina = len(self.paginas)
+        while campos_resumen_faltantes(texto) and pagina < len(self.reader.pages):
+            texto += "\n" + (self.reader.pages[pagina].extract_text() or "")
+            pagina += 1
+        return extraer_resumen(texto)
+
+    @property
+    def total_pages(self) -> int:
+        return len(self.reader.pages)
+
+
 def extraer_movimientos_desde_pdf(file_bytes: bytes, password: str = None) -> tuple:
     """
     Función principal para extraer movimientos de un PDF de Santander.
@@ -413,26 +588,20 @@ def extraer_movimientos_desde_pdf(file_bytes: bytes, password: str = None) -> tu
     Returns:
         Tuple (DataFrame, validacion_dict)
     """
-    reader = desencriptar_pdf(file_bytes, password)
-    texto = extraer_texto_completo(reader)
-    return extraer_movimientos(texto)
+    estado = EstadoCuentaSantander(file_bytes, password)
+    return estado.df, estado.validacion
 
 
 def procesar_pdf_santander(file_bytes: bytes, password: str = None) -> dict:
     """Procesa un PDF de Santander completo."""
-    reader = desencriptar_pdf(file_bytes, password)
-    was_encrypted = hasattr(reader, '_encryption') and reader._encryption is not None
-    
-    texto = extraer_texto_completo(reader)
-    df, validacion = extraer_movimientos(texto)
-    resumen = extraer_resumen(texto)
+    estado = EstadoCuentaSantander(file_bytes, password)
     
     return {
-        'df': df,
-        'resumen': resumen,
-        'validacion': validacion,
-        'total_pages': len(reader.pages),
-        'was_encrypted': was_encrypted
+        'df': estado.df,
+        'resumen': estado.resumen,
+        'validacion': estado.validacion,
+        'total_pages': estado.total_pages,
+        'was_encrypted': estado.esta_encriptado
     }
 
 
@@ -469,6 +638,7 @@ def _test_parser():
         ("08/01/2026 INTERESES FINANCIEROS 320,00", True, 320.0, "Intereses sin tarjeta"),
         ("09/01/2026 MULTA POR MORA LEY 18212 150,00", True, 150.0, "Multa por mora sin tarjeta"),
         ("10/01/2026 I.V.A. 22% $ 70,40", True, 70.40, "IVA 22% sin tarjeta"),
+        ("15/01/2026 579 " + "TIENDA " * 60 + "1.234,56", False, None, "Línea demasiado larga"),
     ]
     
     errores = 0
@@ -489,7 +659,7 @@ def _test_parser():
         else:
             # Simular lógica de conceptos válidos sin tarjeta
             linea_up = linea.upper() if linea else ""
-            if not es_ruido and any(conc in linea_up for conc in CONCEPTOS_VALIDOS):
+            if not es_ruido and CONCEPTO in CLASIFICADOR_LINEAS.categorias(linea_up):
                 match_conc = PATRON_CONCEPTO_SIN_TARJETA.match(linea)
                 if match_conc:
                     f, d, m = match_conc.groups()
@@ -522,5 +692,36 @@ def _test_parser():
     return errores == 0
 
 
+def _test_resumen_salto_pagina():
+    """
+    El resumen tiene que encontrarse aunque empiece en la página siguiente
+    al marcador de fin (TOTAL DEV LEY al final de una página).
+    Ejecutar con: python -c "from bancos.santander.parser import _test_resumen_salto_pagina; _test_resumen_salto_pagina()"
+    """
+    import fitz  # PyMuPDF, solo para armar el PDF de prueba
+
+    paginas = [
+        ["ESTADO DE CUENTA SANTANDER", "SALDO ANTERIOR 741,96",
+         "15/01/2026 579 TIENDA MOSCA 1/3 1.234,56", "TOTAL DEV LEY 19210 0,00"],
+        ["SALDO CONTADO 15.000,00", "P.Minimo: 500,00 P.Contado: 15.000,00"],
+        ["Condiciones generales."],
+    ]
+    doc = fitz.open()
+    for lineas in paginas:
+        pagina = doc.new_page()
+        for i, linea in enumerate(lineas):
+            pagina.insert_text((30, 40 + 11 * i), linea, fontsize=8)
+    estado = EstadoCuentaSantander(doc.tobytes())
+
+    esperado = {'saldo_anterior': 741.96, 'saldo_contado': 15000.0,
+                'pago_minimo': 500.0, 'pago_contado': 15000.0}
+    ok = estado.resumen == esperado and len(estado.paginas) == 1 and len(estado.df) == 1
+
+    print(f"{'✓ PASS' if ok else '✗ FAIL'} | Resumen en la página siguiente al marcador de fin")
+    print(f"       Obtenido: {estado.resumen}, páginas de movimientos={len(estado.paginas)}")
+    return ok
+
+
 if __name__ == "__main__":
     _test_parser()
+    _test_resumen_salto_pagina()
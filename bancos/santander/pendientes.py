@@ -0,0 +1,304 @@
+# bancos/santander/pendientes.py
+
+"""
+Almacén de PDFs Santander pendientes de contraseña.
+
+Entre /upload y /process-with-password el PDF (todavía encriptado) queda
+guardado unos minutos. Hay dos backends con la misma interfaz:
+
+- PendientesMemoria: en la memoria del proceso, con presupuesto de bytes,
+  vencimiento ordenado en heap y acceso thread-safe (AlmacenTemporal).
+- PendientesDirectorio: archivos en un directorio local compartido, para
+  que cualquier worker de gunicorn pueda completar el paso de la
+  contraseña. Solo guarda PDFs encriptados, nunca texto en claro.
+
+crear_almacen_pendientes() elige el backend: si está definida la variable
+de entorno CUOTAVISTA_PENDIENTES_DIR se usa ese directorio, si no memoria.
+"""
+
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from bancos.almacen import AlmacenTemporal, INTERVALO_LIMPIEZA_DIRECTORIO
+
+
+# Tiempo para ingresar la contraseña (segundos)
+TTL_PENDIENTES = 5 * 60
+
+# Intentos de contraseña por PDF pendiente antes de pedir que se suba de nuevo
+MAX_INTENTOS_PASSWORD = 5
+
+# Presupuesto de PDFs pendientes
+MAX_BYTES_PENDIENTES = 64 * 1024 * 1024
+MAX_PENDIENTES = 200
+
+_PATRON_TEMP_ID = re.compile(r'[0-9a-f]{32}')
+
+
+class PendientesMemoria:
+    """PDFs pendientes en la memoria del proceso."""
+
+    def __init__(self, ttl: float = TTL_PENDIENTES, max_bytes: int = MAX_BYTES_PENDIENTES,
+                 max_pendientes: int = MAX_PENDIENTES):
+        self._almacen = AlmacenTemporal(ttl=ttl, max_bytes=max_bytes, max_entradas=max_pendientes)
+        self._lock = threading.Lock()
+
+    def guardar(self, file_bytes: bytes, filename: str) -> str:
+        """Guarda el PDF y devuelve el temp_id."""
+        pendiente = {
+            'file_bytes': file_bytes,
+            'filename': filename,
+            'intentos': 0,
+        }
+        return self._almacen.guardar(pendiente, len(file_bytes))
+
+    def obtener(self, temp_id: str):
+        """Devuelve {'file_bytes', 'filename', 'intentos'} o None si no existe o venció."""
+        return self._almacen.obtener(temp_id)
+
+    def registrar_intento(self, temp_id: str) -> int:
+        """Suma un intento fallido de contraseña y devuelve el total."""
+        with self._lock:
+            pendiente = self._almacen.obtener(temp_id)
+            if pendiente is None:
+                return MAX_INTENTOS_PASSWORD
+            pendiente['intentos'] += 1
+            return pendiente['intentos']
+
+    def eliminar(self, temp_id: str) -> None:
+        self._almacen.eliminar(temp_id)
+
+
+class PendientesDirectorio:
+    """
+    PDFs pendientes como archivos en un directorio compartido entre workers.
+
+    Cada pendiente son dos archivos: <temp_id>.pdf con los bytes y
+    <temp_id>.json con los metadatos. Se escriben con rename atómico y el
+    .json se escribe último, así un pendiente a medio guardar no se lee.
+    Los intentos de contraseña se actualizan con un flock sobre
+    <temp_id>.lock, para que dos workers no pisen el contador.
+
+    Los vencidos se borran recorriendo el directorio como mucho cada
+    INTERVALO_LIMPIEZA_DIRECTORIO segundos; entre recorridos el presupuesto
+    se controla con un índice en memoria de lo guardado por este proceso.
+    """
+
+    def __init__(self, directorio: str, ttl: float = TTL_PENDIENTES,
+                 max_bytes: int = MAX_BYTES_PENDIENTES, max_pendientes: int = MAX_PENDIENTES):
+        self.directorio = directorio
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_pendientes = max_pendientes
+        # Índice aproximado de lo guardado desde el último recorrido del
+        # directorio (no cuenta lo que guardan otros workers ni lo borrado)
+        self._bytes_indice = 0
+        self._cantidad_indice = 0
+        self._ultima_limpieza = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directorio, mode=0o700, exist_ok=True)
+
+    def _ruta(self, temp_id: str, extension: str) -> str:
+        return os.path.join(self.directorio, f"{temp_id}.{extension}")
+
+    def _escribir(self, ruta: str, datos: bytes) -> None:
+        temporal = f"{ruta}.{uuid.uuid4().hex}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+
+    def guardar(self, file_bytes: bytes, filename: str) -> str:
+        """Guarda el PDF y devuelve el temp_id."""
+        temp_id = uuid.uuid4().hex
+        self._limpiar_si_corresponde(len(file_bytes))
+
+        meta = {'filename': filename, 'timestamp': time.time(), 'intentos': 0}
+        self._escribir(self._ruta(temp_id, 'pdf'), file_bytes)
+        self._escribir(self._ruta(temp_id, 'json'), json.dumps(meta).encode('utf-8'))
+        return temp_id
+
+    def _leer_meta(self, temp_id: str):
+        try:
+            with open(self._ruta(temp_id, 'json'), 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def obtener(self, temp_id: str):
+        """Devuelve {'file_bytes', 'filename', 'intentos'} o None si no existe o venció."""
+        if not _PATRON_TEMP_ID.fullmatch(temp_id or ''):
+            return None
+
+        meta = self._leer_meta(temp_id)
+        if meta is None:
+            return None
+
+        if time.time() - meta['timestamp'] > self.ttl:
+            self.eliminar(temp_id)
+            return None
+
+        try:
+            with open(self._ruta(temp_id, 'pdf'), 'rb') as f:
+                file_bytes = f.read()
+        except OSError:
+            return None
+
+        return {
+            'file_bytes': file_bytes,
+            'filename': meta['filename'],
+            'intentos': meta.get('intentos', 0),
+        }
+
+    def registrar_intento(self, temp_id: str) -> int:
+        """Suma un intento fallido de contraseña y devuelve el total."""
+        if not _PATRON_TEMP_ID.fullmatch(temp_id or ''):
+            return MAX_INTENTOS_PASSWORD
+
+        # Sin metadatos no hay pendiente: no crear un .lock huérfano
+        if not os.path.exists(self._ruta(temp_id, 'json')):
+            return MAX_INTENTOS_PASSWORD
+        try:
+            lock = open(self._ruta(temp_id, 'lock'), 'a')
+        except OSError:
+            return MAX_INTENTOS_PASSWORD
+
+        # Leer, sumar y escribir con el lock tomado (exclusivo entre procesos)
+        with lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            meta = self._leer_meta(temp_id)
+            if meta is None:
+                self.eliminar(temp_id)
+                return MAX_INTENTOS_PASSWORD
+
+            meta['intentos'] = meta.get('intentos', 0) + 1
+            self._escribir(self._ruta(temp_id, 'json'), json.dumps(meta).encode('utf-8'))
+            return meta['intentos']
+
+    def eliminar(self, temp_id: str) -> None:
+        if not _PATRON_TEMP_ID.fullmatch(temp_id or ''):
+            return
+        # Primero el .json: sin metadatos el pendiente ya no se puede leer
+        for extension in ('json', 'pdf', 'lock'):
+            try:
+                os.remove(self._ruta(temp_id, extension))
+            except OSError:
+                pass
+
+    def _limpiar_si_corresponde(self, bytes_nuevos: int) -> None:
+        """
+        Recorre el directorio cada INTERVALO_LIMPIEZA_DIRECTORIO segundos, o
+        antes si según el índice el nuevo PDF no entra en el presupuesto.
+        """
+        ahora = time.time()
+        with self._lock:
+            if (ahora - self._ultima_limpieza < INTERVALO_LIMPIEZA_DIRECTORIO
+                    and self._bytes_indice + bytes_nuevos <= self.max_bytes
+                    and self._cantidad_indice < self.max_pendientes):
+                self._bytes_indice += bytes_nuevos
+                self._cantidad_indice += 1
+                return
+            self._ultima_limpieza = ahora
+            self._limpiar(ahora, bytes_nuevos)
+
+    def _limpiar(self, ahora: float, bytes_nuevos: int) -> None:
+        """Borra los vencidos (y restos) y, si no hay lugar, los más viejos."""
+        vigentes = []
+
+        for nombre in os.listdir(self.directorio):
+            temp_id, _, extension = nombre.partition('.')
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                continue
+
+            # Vencidos, restos de escrituras interrumpidas y locks huérfanos
+            if ahora - estado.st_mtime > self.ttl:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+            elif extension == 'pdf':
+                vigentes.append((estado.st_mtime, temp_id, estado.st_size))
+
+        vigentes.sort()
+        total = sum(tamano for _, _, tamano in vigentes)
+        while vigentes and (
+            total + bytes_nuevos > self.max_bytes or len(vigentes) >= self.max_pendientes
+        ):
+            _, temp_id, tamano = vigentes.pop(0)
+            self.eliminar(temp_id)
+            total -= tamano
+
+        # Índice hasta el próximo recorrido: lo que quedó más el PDF nuevo
+        self._bytes_indice = total + bytes_nuevos
+        self._cantidad_indice = len(vigentes) + 1
+
+
+def crear_almacen_pendientes():
+    """Crea el almacén de pendientes según CUOTAVISTA_PENDIENTES_DIR."""
+    directorio = os.environ.get("CUOTAVISTA_PENDIENTES_DIR")
+    if directorio:
+        return PendientesDirectorio(directorio)
+    return PendientesMemoria()
+
+
+def _test_pendientes():
+    """
+    Guardar, leer, contar intentos, eliminar y vencer en los dos backends.
+    Ejecutar con: python -c "from bancos.santander.pendientes import _test_pendientes; _test_pendientes()"
+    """
+    import tempfile
+    from unittest import mock
+
+    casos = []
+    with tempfile.TemporaryDirectory() as directorio:
+        almacenes = {
+            'memoria': PendientesMemoria(ttl=60),
+            'directorio': PendientesDirectorio(directorio, ttl=60),
+        }
+        for nombre, almacen in almacenes.items():
+            temp_id = almacen.guardar(b'%PDF-1.4 prueba', 'estado.pdf')
+            pendiente = almacen.obtener(temp_id)
+            casos.append((f"{nombre}: guarda y devuelve bytes y nombre",
+                          pendiente is not None and pendiente['file_bytes'] == b'%PDF-1.4 prueba'
+                          and pendiente['filename'] == 'estado.pdf' and pendiente['intentos'] == 0))
+
+            intentos = [almacen.registrar_intento(temp_id) for _ in range(3)]
+            casos.append((f"{nombre}: cuenta los intentos de contraseña",
+                          intentos == [1, 2, 3] and almacen.obtener(temp_id)['intentos'] == 3))
+
+            almacen.eliminar(temp_id)
+            casos.append((f"{nombre}: eliminado no se devuelve y agota los intentos",
+                          almacen.obtener(temp_id) is None
+                          and almacen.registrar_intento(temp_id) == MAX_INTENTOS_PASSWORD))
+
+            casos.append((f"{nombre}: temp_id inválido",
+                          almacen.obtener('../../etc/passwd') is None and almacen.obtener('') is None))
+
+            # Vencimiento: se adelanta el reloj que usa cada backend
+            temp_id = almacen.guardar(b'x', 'vence.pdf')
+            reloj = 'monotonic' if nombre == 'memoria' else 'time'
+            adelantado = getattr(time, reloj)() + 61
+            with mock.patch.object(time, reloj, lambda: adelantado):
+                casos.append((f"{nombre}: vence a los ttl segundos", almacen.obtener(temp_id) is None))
+
+        casos.append(("directorio: no quedan archivos de pendientes eliminados",
+                      not any(n.endswith(('.pdf', '.json', '.lock')) for n in os.listdir(directorio))))
+
+    errores = 0
+    for descripcion, ok in casos:
+        errores += not ok
+        print(f"{'✓ PASS' if ok else '✗ FAIL'} | {descripcion}")
+
+    print(f"{len(casos) - errores}/{len(casos)} casos pasaron")
+    return errores == 0
+
+
+if __name__ == "__main__":
+    _test_pendientes()
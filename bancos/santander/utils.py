@@ -2,6 +2,6 @@
 Utilidades para el módulo Santander.
 Re-exporta funciones comunes desde utils_comunes.
 """
-from bancos.utils_comunes import es_cuota, numero_cuotas, calculo_totales
+from bancos.utils_comunes import es_cuota, numero_cuotas, calculo_totales, detectar_cuotas
 
-__all__ = ['es_cuota', 'numero_cuotas', 'calculo_totales']
+__all__ = ['es_cuota', 'numero_cuotas', 'calculo_totales', 'detectar_cuotas']
@@ -0,0 +1,2 @@
+# Trabajos asincrónicos - Cuotavista
+# Análisis en segundo plano con consulta de estado
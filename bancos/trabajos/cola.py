@@ -0,0 +1,305 @@
+"""
+Cola de trabajos de análisis en segundo plano.
+
+El upload encola el procesamiento y responde enseguida con el id del
+trabajo; un pool acotado de hilos ejecuta las funciones de
+bancos.procesamiento y el cliente consulta el estado hasta que está listo.
+
+Estados: pendiente -> procesando -> listo | error
+         pendiente/procesando -> cancelado | vencido
+
+- Si hay demasiados trabajos sin terminar, encolar lanza ColaLlenaError.
+- Cada trabajo tiene un tiempo máximo desde que se encola. Un hilo no se
+  puede interrumpir, así que al consultarlo vencido se marca como tal y su
+  resultado se descarta cuando termine.
+- Cancelar saca de la cola un trabajo pendiente; si ya está procesando,
+  se marca y su resultado se descarta igual que uno vencido.
+- El lugar en la cola se libera recién cuando el hilo termina (o el
+  trabajo sale de la cola sin empezar), no cuando se marca vencido o
+  cancelado: así el límite refleja lo que el pool tiene realmente ocupado.
+
+El registro de trabajos vive en la memoria del proceso: con varios
+workers de gunicorn, la consulta de estado tiene que llegar al mismo
+worker que recibió el upload (un solo worker con hilos, o sesiones
+pegajosas en el balanceador).
+
+El resultado de un trabajo listo se guarda en el almacén de resultados
+(bancos.almacen); el trabajo solo conserva el token.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import os
+import threading
+import time
+import uuid
+
+from bancos.almacen import AlmacenTemporal, guardar_resultado
+
+
+MAX_TRABAJADORES = int(os.environ.get("CUOTAVISTA_TRABAJADORES", "2"))
+
+# Trabajos sin terminar (pendientes + procesando) antes de rechazar nuevos
+MAX_EN_COLA = int(os.environ.get("CUOTAVISTA_MAX_EN_COLA", "20"))
+
+# Tiempo máximo de un trabajo desde que se encola (segundos)
+TIMEOUT_TRABAJO = float(os.environ.get("CUOTAVISTA_TIMEOUT_TRABAJO", "120"))
+
+# Tiempo que se conserva el estado de un trabajo (segundos)
+TTL_TRABAJOS = 10 * 60
+MAX_TRABAJOS = 1000
+
+PENDIENTE = "pendiente"
+PROCESANDO = "procesando"
+LISTO = "listo"
+ERROR = "error"
+CANCELADO = "cancelado"
+VENCIDO = "vencido"
+
+ESTADOS_ACTIVOS = (PENDIENTE, PROCESANDO)
+
+
+class ColaLlenaError(Exception):
+    """Hay demasiados trabajos sin terminar."""
+    pass
+
+
+@dataclass
+class Trabajo:
+    """Estado de un trabajo de análisis."""
+    id: str
+    banco: str
+    nombre_archivo: str
+    timeout: float
+    estado: str = PENDIENTE
+    creado: float = field(default_factory=time.monotonic)
+    iniciado: float = None
+    terminado: float = None
+    # Token del resultado en el almacén de resultados (si está listo)
+    token: str = None
+    mensaje: str = None
+    futuro: object = field(default=None, repr=False)
+
+    @property
+    def activo(self) -> bool:
+        return self.estado in ESTADOS_ACTIVOS
+
+    @property
+    def vencido(self) -> bool:
+        return self.activo and time.monotonic() - self.creado > self.timeout
+
+    def a_dict(self) -> dict:
+        """Datos públicos del trabajo (sin el resultado)."""
+        fin = self.terminado or time.monotonic()
+        return {
+            "job_id": self.id,
+            "banco": self.banco,
+            "nombre_archivo": self.nombre_archivo,
+            "estado": self.estado,
+            "segundos": round(fin - self.creado, 3),
+            "mensaje": self.mensaje,
+        }
+
+
+class ColaTrabajos:
+    """Pool acotado de hilos más el registro de trabajos con TTL."""
+
+    def __init__(self, max_trabajadores: int = MAX_TRABAJADORES, max_en_cola: int = MAX_EN_COLA,
+                 timeout: float = TIMEOUT_TRABAJO, ttl: float = TTL_TRABAJOS,
+                 max_trabajos: int = MAX_TRABAJOS):
+        self.max_en_cola = max_en_cola
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_trabajadores,
+                                        thread_name_prefix="cuotavista-trabajo")
+        # El tamaño no importa (el resultado va al almacén de resultados), solo la cantidad
+        self._trabajos = AlmacenTemporal(ttl=ttl, max_bytes=max_trabajos, max_entradas=max_trabajos)
+        self._activos = 0
+        self._lock = threading.Lock()
+
+    def encolar(self, banco: str, nombre_archivo: str, funcion, *args,
+                timeout: float = None) -> Trabajo:
+        """
+        Encola funcion(*args), que debe devolver un ResultadoAnalisis.
+
+        Raises:
+            ColaLlenaError: Si ya hay max_en_cola trabajos sin terminar
+        """
+        with self._lock:
+            if self._activos >= self.max_en_cola:
+                raise ColaLlenaError("Hay demasiados análisis en curso. Probá de nuevo en un momento.")
+            self._activos += 1
+
+        trabajo = Trabajo(
+            id=uuid.uuid4().hex,
+            banco=banco,
+            nombre_archivo=nombre_archivo,
+            timeout=timeout or self.timeout,
+        )
+        self._trabajos.guardar(trabajo, 1, clave=trabajo.id)
+        trabajo.futuro = self._pool.submit(self._ejecutar, trabajo, funcion, args)
+        # Se llama cuando el hilo termina o cuando el futuro se cancela sin empezar
+        trabajo.futuro.add_done_callback(self._liberar)
+        return trabajo
+
+    def _liberar(self, futuro) -> None:
+        """Libera el lugar en la cola de un trabajo que ya no ocupa el pool."""
+        with self._lock:
+            self._activos -= 1
+
+    def obtener(self, trabajo_id: str):
+        """Devuelve el trabajo (marcándolo vencido si corresponde) o None."""
+        trabajo = self._trabajos.obtener(trabajo_id)
+        if trabajo is not None and trabajo.vencido:
+            self._terminar(trabajo, VENCIDO, mensaje="El análisis tardó demasiado.")
+        return trabajo
+
+    def cancelar(self, trabajo_id: str):
+        """Cancela el trabajo si todavía no terminó. Devuelve el trabajo o None."""
+        trabajo = self.obtener(trabajo_id)
+        if trabajo is not None:
+            self._terminar(trabajo, CANCELADO)
+        return trabajo
+
+    def _terminar(self, trabajo: Trabajo, estado: str, token: str = None,
+                  mensaje: str = None) -> bool:
+        """Pasa un trabajo activo a un estado final. Devuelve False si ya había terminado."""
+        with self._lock:
+            if not trabajo.activo:
+                return False
+            trabajo.estado = estado
+            trabajo.token = token
+            trabajo.mensaje = mensaje
+            trabajo.terminado = time.monotonic()
+
+        # Si todavía no empezó, sale de la cola del pool
+        if trabajo.futuro is not None:
+            trabajo.futuro.cancel()
+        return True
+
+    def _ejecutar(self, trabajo: Trabajo, funcion, args) -> None:
+        """Corre en un hilo del pool."""
+        with self._lock:
+            if not trabajo.activo:
+                return
+            trabajo.estado = PROCESANDO
+            trabajo.iniciado = time.monotonic()
+
+        if trabajo.vencido:
+            self._terminar(trabajo, VENCIDO, mensaje="El análisis tardó demasiado.")
+            return
+
+        try:
+            resultado = funcion(*args)
+        except ValueError as e:
+            self._terminar(trabajo, ERROR, mensaje=str(e))
+            return
+        except Exception as e:
+            self._terminar(trabajo, ERROR, mensaje="Error inesperado: " + str(e))
+            return
+
+        # Cancelado o vencido mientras procesaba: el resultado se descarta
+        if trabajo.activo and not trabajo.vencido:
+            try:
+                token = guardar_resultado(resultado)
+            except Exception as e:
+                self._terminar(trabajo, ERROR, mensaje="Error inesperado: " + str(e))
+                return
+            self._terminar(trabajo, LISTO, token=token)
+        else:
+            self._terminar(trabajo, VENCIDO, mensaje="El análisis tardó demasiado.")
+
+
+_cola = None
+_cola_lock = threading.Lock()
+
+
+def obtener_cola() -> ColaTrabajos:
+    """Devuelve la cola compartida, creándola la primera vez."""
+    global _cola
+    with _cola_lock:
+        if _cola is None:
+            _cola = ColaTrabajos()
+        return _cola
+
+
+def _test_cola():
+    """
+    Estados finales, cancelación, vencimiento y liberación de lugares de ColaTrabajos.
+    Ejecutar con: python -c "from bancos.trabajos.cola import _test_cola; _test_cola()"
+    """
+    from types import SimpleNamespace
+
+    from bancos.almacen import obtener_resultado
+
+    def esperar(condicion, limite: float = 5.0) -> bool:
+        fin = time.monotonic() + limite
+        while not condicion():
+            if time.monotonic() > fin:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def fallar():
+        raise ValueError("archivo inválido")
+
+    casos = []
+    cola = ColaTrabajos(max_trabajadores=1, max_en_cola=2, timeout=5)
+
+    # Cualquier objeto con nbytes sirve de ResultadoAnalisis para el almacén
+    resultado = SimpleNamespace(nbytes=1)
+    trabajo = cola.encolar("brou", "ok.xls", lambda: resultado)
+    esperar(lambda: not trabajo.activo)
+    casos.append(("Termina listo y el resultado queda en el almacén",
+                  trabajo.estado == LISTO and obtener_resultado(trabajo.token) is resultado))
+
+    trabajo = cola.encolar("brou", "error.xls", fallar)
+    esperar(lambda: not trabajo.activo)
+    casos.append(("ValueError termina en error con su mensaje",
+                  trabajo.estado == ERROR and trabajo.mensaje == "archivo inválido"))
+
+    # Un trabajo ocupa el único hilo y otro espera: la cola está llena
+    liberar = threading.Event()
+    ocupado = cola.encolar("itau", "lento.pdf", liberar.wait)
+    esperar(lambda: ocupado.estado == PROCESANDO)
+    pendiente = cola.encolar("itau", "pendiente.pdf", lambda: "x")
+    try:
+        cola.encolar("itau", "rechazado.pdf", lambda: "x")
+        llena = False
+    except ColaLlenaError:
+        llena = True
+    casos.append(("Con max_en_cola trabajos sin terminar rechaza nuevos", llena))
+
+    # Cancelar el pendiente lo saca de la cola y libera su lugar
+    cola.cancelar(pendiente.id)
+    casos.append(("Cancelar un pendiente libera su lugar",
+                  pendiente.estado == CANCELADO and esperar(lambda: cola._activos == 1)))
+
+    # Cancelar el que procesa no libera el lugar hasta que el hilo termina
+    cola.cancelar(ocupado.id)
+    sigue_ocupado = cola._activos == 1
+    liberar.set()
+    casos.append(("Cancelado mientras procesa ocupa su lugar hasta terminar",
+                  sigue_ocupado and esperar(lambda: cola._activos == 0)
+                  and ocupado.estado == CANCELADO and ocupado.token is None))
+
+    # Vencido: se marca al consultarlo y el resultado se descarta
+    liberar = threading.Event()
+    lento = cola.encolar("santander", "vence.pdf", liberar.wait, timeout=0.05)
+    time.sleep(0.1)
+    vencido = cola.obtener(lento.id).estado == VENCIDO
+    liberar.set()
+    casos.append(("Pasado el timeout queda vencido sin resultado",
+                  vencido and esperar(lambda: cola._activos == 0) and lento.token is None))
+
+    casos.append(("Id inexistente", cola.obtener("no-existe") is None))
+
+    errores = 0
+    for descripcion, ok in casos:
+        errores += not ok
+        print(f"{'✓ PASS' if ok else '✗ FAIL'} | {descripcion}")
+
+    print(f"{len(casos) - errores}/{len(casos)} casos pasaron")
+    return errores == 0
+
+
+if __name__ == "__main__":
+    _test_cola()
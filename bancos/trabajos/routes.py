@@ -0,0 +1,93 @@
+# bancos/trabajos/routes.py
+
+from flask import Blueprint, request, render_template, jsonify, redirect, url_for
+from bancos.almacen import obtener_resultado
+from bancos.procesamiento import renderizar_resultado
+from bancos.trabajos.cola import obtener_cola, ColaLlenaError, LISTO, ERROR
+
+trabajos_bp = Blueprint("trabajos", __name__)
+
+
+def modo_asincronico() -> bool:
+    """Indica si el upload pidió modo trabajo (?modo=async o campo modo del form)."""
+    return request.values.get("modo") == "async"
+
+
+def encolar_y_responder(banco: str, nombre_archivo: str, funcion, *args):
+    """
+    Encola el análisis y responde 202 con el id del trabajo y la URL de
+    estado, o 503 si la cola está llena.
+    """
+    try:
+        trabajo = obtener_cola().encolar(banco, nombre_archivo, funcion, *args)
+    except ColaLlenaError as e:
+        return jsonify({
+            "success": False,
+            "error_type": "busy",
+            "message": str(e)
+        }), 503
+
+    estado_url = url_for("trabajos.estado_trabajo", trabajo_id=trabajo.id)
+    return jsonify({
+        "success": True,
+        "job_id": trabajo.id,
+        "estado": trabajo.estado,
+        "estado_url": estado_url,
+    }), 202, {"Location": estado_url}
+
+
+def _no_encontrado():
+    return jsonify({
+        "success": False,
+        "error_type": "not_found",
+        "message": "El trabajo no existe o ya venció."
+    }), 404
+
+
+@trabajos_bp.route("/<trabajo_id>", methods=["GET"])
+def estado_trabajo(trabajo_id):
+    """
+    Estado del trabajo en JSON. Con ?redirigir=1, si está listo redirige
+    (303) a la página de resultado.
+    """
+    trabajo = obtener_cola().obtener(trabajo_id)
+    if trabajo is None:
+        return _no_encontrado()
+
+    resultado_url = url_for("trabajos.resultado_trabajo", trabajo_id=trabajo.id)
+    if trabajo.estado == LISTO and request.args.get("redirigir") == "1":
+        return redirect(resultado_url, code=303)
+
+    datos = trabajo.a_dict()
+    if trabajo.estado == LISTO:
+        datos["resultado_url"] = resultado_url
+    return jsonify(datos)
+
+
+@trabajos_bp.route("/<trabajo_id>/resultado", methods=["GET"])
+def resultado_trabajo(trabajo_id):
+    """Página de resultado de un trabajo terminado."""
+    trabajo = obtener_cola().obtener(trabajo_id)
+    if trabajo is None:
+        return render_template("error.html", mensaje="El análisis no existe o ya venció."), 404
+
+    if trabajo.estado == ERROR:
+        return render_template("error.html", mensaje=trabajo.mensaje), 400
+
+    if trabajo.estado != LISTO:
+        return jsonify(trabajo.a_dict()), 409
+
+    resultado = obtener_resultado(trabajo.token)
+    if resultado is None:
+        return render_template("error.html", mensaje="El resultado ya venció. Subí el archivo de nuevo."), 404
+
+    return renderizar_resultado(resultado, trabajo.nombre_archivo, trabajo.banco, token=trabajo.token)
+
+
+@trabajos_bp.route("/<trabajo_id>/cancelar", methods=["POST"])
+def cancelar_trabajo(trabajo_id):
+    """Cancela un trabajo pendiente o en proceso."""
+    trabajo = obtener_cola().cancelar(trabajo_id)
+    if trabajo is None:
+        return _no_encontrado()
+    return jsonify(trabajo.a_dict())
@@ -1,7 +1,45 @@
 """
 Funciones comunes para el análisis de cuotas de tarjetas de crédito.
-Usadas por los módulos BROU e Itaú.
+Usadas por los módulos BROU, Itaú y Santander.
 """
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# Columnas que agrega detectar_cuotas, en el orden en que se agregan al df
+COLUMNAS_CUOTAS = ["cuotas_pagas", "cuotas_totales", "cuotas_restantes", "es_cuota"]
+
+# Largo máximo de una línea del texto de un PDF para buscarle un movimiento.
+# Las más largas (texto roto o armado a propósito) se descartan sin aplicarles
+# los patrones. Una línea de movimiento (fecha, tarjeta, detalle, importes)
+# es mucho más corta.
+LARGO_MAXIMO_LINEA = 400
+
+# Texto entre las dos últimas "/" (o desde el inicio) y texto después de la última "/".
+# Solo se prueba desde el inicio de cada tramo entre barras, así cada tramo
+# se recorre un número fijo de veces: tiempo lineal aun sin ninguna "/"
+_PATRON_PARTES_CUOTA = r"(?:^|(?<=/))([^/]*)/([^/]*)$"
+
+# Último token (sin espacios) del texto, probado solo desde el inicio de cada token
+_PATRON_ULTIMO_TOKEN = r"(?<!\S)(\S+)$"
+
+# Importe en formato uruguayo: puntos de miles, coma decimal y "-" adelante o atrás
+# (signo inicial, número, signo final). Los puntos se descartan donde estén,
+# como hacían los parsers; el número además tiene que tener algún dígito.
+_PATRON_IMPORTE = r"^(-?)([\d.]*(?:,[\d.]*)?)(-?)$"
+_REGEX_IMPORTE = re.compile(_PATRON_IMPORTE)
+_REGEX_DIGITO = re.compile(r"\d")
+
+# "1.234,56" -> "1234.56"
+_TABLA_IMPORTE = str.maketrans({".": None, ",": "."})
+
+# Para la conversión rápida: quita los signos además de los puntos, y
+# borra todos los caracteres que puede tener un lote de importes válidos
+_TABLA_IMPORTE_SIN_SIGNO = str.maketrans({".": None, ",": ".", "-": None})
+_TABLA_CARACTERES_IMPORTE = str.maketrans(dict.fromkeys("0123456789.,-\n"))
+_MENOS, _SALTO = ord("-"), ord("\n")
 
 
 def es_cuota(descripcion):
@@ -70,6 +108,184 @@ def numero_cuotas(descripcion):
     return None, None
 
 
+def detectar_cuotas(descripciones, max_restantes=11):
+    """
+    Versión vectorizada de numero_cuotas + es_cuota para una columna entera.
+    
+    Hace una sola pasada de regex sobre las descripciones distintas (las
+    descripciones repetidas se calculan una única vez y se reutilizan) y
+    devuelve los mismos valores que aplicar numero_cuotas/es_cuota fila a fila.
+    
+    Args:
+        descripciones: Serie con las descripciones de los movimientos
+        max_restantes: Máximo de cuotas restantes para considerar la fila cuota
+        
+    Returns:
+        DataFrame con el mismo índice y las columnas de COLUMNAS_CUOTAS.
+        "es_cuota" es "SI" si hay patrón X/Y y 0 <= restantes <= max_restantes.
+    """
+    # Memo: se procesa cada descripción distinta una sola vez
+    codigos, unicas = pd.factorize(descripciones, use_na_sentinel=True)
+    unicas = pd.Series(unicas, dtype=object).astype(str).str.strip()
+
+    partes = unicas.str.extract(_PATRON_PARTES_CUOTA)
+    tiene_barra = partes[0].notna()
+    antes = partes[0].fillna("").str.strip()
+    despues = partes[1].fillna("")
+
+    # Número de cuota: último token si hay espacios, si no los últimos 2 dígitos
+    ultimo_token = antes.str.extract(_PATRON_ULTIMO_TOKEN)[0].fillna("")
+    num1 = antes.str.replace(r"\D", "", regex=True).str[-2:]
+    con_espacio = antes.str.contains(" ", regex=False)
+    num1 = num1.where(~con_espacio, ultimo_token.str.replace(r"\D", "", regex=True))
+
+    # Total de cuotas: primeros 2 dígitos después de la barra
+    num2 = despues.str.replace(r"\D", "", regex=True).str[:2]
+
+    valido = tiene_barra & (num1 != "") & (num2 != "")
+    pagas = pd.to_numeric(num1.where(valido), errors="coerce")
+    totales = pd.to_numeric(num2.where(valido), errors="coerce")
+    restantes = totales - pagas
+    es_cuota_unicas = np.where(valido & restantes.between(0, max_restantes), "SI", "NO")
+
+    # Expandir a todas las filas; las descripciones nulas (código -1) quedan sin cuota
+    fila_nula = len(unicas)
+    indices = np.where(codigos < 0, fila_nula, codigos)
+    pagas = np.append(pagas.to_numpy(dtype=float), np.nan)[indices]
+    totales = np.append(totales.to_numpy(dtype=float), np.nan)[indices]
+    es_cuota_filas = np.append(es_cuota_unicas, "NO")[indices]
+
+    return pd.DataFrame({
+        "cuotas_pagas": pagas,
+        "cuotas_totales": totales,
+        "cuotas_restantes": totales - pagas,
+        "es_cuota": es_cuota_filas.astype(object),
+    }, index=descripciones.index)
+
+
+def importe_a_float(texto) -> float:
+    """
+    Convierte un importe en formato uruguayo a float.
+    Ejemplo: "1.234,56-" -> -1234.56
+    
+    Versión escalar de importes_a_float, con las mismas reglas.
+    
+    Returns:
+        El importe, o NaN si el texto no es un importe
+    """
+    match = _REGEX_IMPORTE.match(texto.strip())
+    if match is None or (match.group(1) and match.group(3)) or not _REGEX_DIGITO.search(match.group(2)):
+        return np.nan
+    valor = float(match.group(2).translate(_TABLA_IMPORTE))
+    return -valor if match.group(1) or match.group(3) else valor
+
+
+def importes_a_float(valores):
+    """
+    Convierte una columna de importes en formato uruguayo a float en una
+    sola pasada vectorizada.
+    
+    Acepta separador de miles ".", coma decimal y signo "-" al principio
+    ("-340,00") o al final ("741,96-", créditos de Santander). Los números
+    (celdas numéricas de Excel) se dejan como están.
+    
+    Si todos los valores no nulos son importes sin espacios (lo normal),
+    se convierten de una vez sobre el texto unido (_importes_rapido); si
+    no, valor por valor distinto con regex (_importes_general).
+    
+    Args:
+        valores: Serie, lista o array con los importes (texto, números o nulos)
+        
+    Returns:
+        Tupla (importes, errores) de arrays del largo de valores: importes
+        float64 con NaN donde no hay importe, y errores True donde había un
+        valor que no es un importe (los nulos y los textos vacíos no son error).
+    """
+    valores = np.asarray(valores, dtype=object)
+    nulos = pd.isna(valores)
+    rapido = _importes_rapido(valores[~nulos] if nulos.any() else valores)
+    if rapido is None:
+        return _importes_general(pd.Series(valores, dtype=object))
+
+    importes = np.full(len(valores), np.nan)
+    importes[~nulos] = rapido
+    return importes, np.zeros(len(valores), dtype=bool)
+
+
+def _importes_rapido(textos):
+    """
+    Importes de textos que solo tienen dígitos, ".", "," y un "-" inicial o
+    final, o None si alguno no cumple (o no es texto).
+    
+    Une los textos con saltos de línea, ubica los signos con numpy sobre
+    los bytes del texto unido y convierte todo con una sola llamada.
+    """
+    if len(textos) == 0:
+        return np.empty(0)
+    try:
+        unidos = "\n".join(textos)
+    except TypeError:
+        return None
+    if unidos.translate(_TABLA_CARACTERES_IMPORTE):
+        return None
+
+    signos = np.ones(len(textos))
+    datos = np.frombuffer(unidos.encode("ascii"), dtype=np.uint8)
+    menos = np.flatnonzero(datos == _MENOS)
+    if len(menos):
+        anterior = datos[np.maximum(menos - 1, 0)]
+        siguiente = datos[np.minimum(menos + 1, len(datos) - 1)]
+        al_inicio = (menos == 0) | (anterior == _SALTO)
+        al_final = (menos == len(datos) - 1) | (siguiente == _SALTO)
+        # Un signo en el medio, o solo ("-"), no es un importe
+        if not np.all(al_inicio ^ al_final):
+            return None
+        # Texto al que pertenece cada signo: saltos de línea antes del signo
+        indices = np.searchsorted(np.flatnonzero(datos == _SALTO), menos)
+        if len(np.unique(indices)) != len(indices):
+            return None
+        signos[indices] = -1.0
+
+    try:
+        numeros = np.array(unidos.translate(_TABLA_IMPORTE_SIN_SIGNO).split("\n"), dtype=float)
+    except ValueError:
+        # Textos vacíos o sin dígitos, más de una coma
+        return None
+    return numeros * signos
+
+
+def _importes_general(serie: pd.Series):
+    """importes_a_float para cualquier contenido, valor por valor distinto (como detectar_cuotas)."""
+    codigos, unicas = pd.factorize(serie, use_na_sentinel=True)
+    unicas = pd.Series(unicas, dtype=object)
+    importes = np.full(len(unicas), np.nan)
+    errores = np.zeros(len(unicas), dtype=bool)
+
+    tipos = unicas.map(type)
+    es_texto = (tipos == str).to_numpy()
+    es_numero = tipos.isin((int, float, np.int64, np.float64)).to_numpy()
+    importes[es_numero] = unicas[es_numero].to_numpy(dtype=float)
+    errores[~es_texto & ~es_numero] = True
+
+    textos = unicas[es_texto].str.strip()
+    partes = textos.str.extract(_PATRON_IMPORTE)
+    negativo_inicio = (partes[0] == "-").to_numpy()
+    negativo_fin = (partes[2] == "-").to_numpy()
+    con_digitos = partes[1].str.contains(r"\d", na=False).to_numpy(dtype=bool)
+    valido = con_digitos & ~(negativo_inicio & negativo_fin)
+    numeros = pd.to_numeric(partes[1][valido].str.translate(_TABLA_IMPORTE)).to_numpy(dtype=float)
+    signos = np.where(negativo_inicio | negativo_fin, -1.0, 1.0)[valido]
+
+    importes_texto = np.full(len(textos), np.nan)
+    importes_texto[valido] = numeros * signos
+    importes[es_texto] = importes_texto
+    errores[es_texto] = ~valido & (textos != "").to_numpy()
+
+    # Expandir a todas las filas; los nulos (código -1) quedan NaN sin error
+    indices = np.where(codigos < 0, len(unicas), codigos)
+    return np.append(importes, np.nan)[indices], np.append(errores, False)[indices]
+
+
 def calculo_totales(df, mask=None):
     """
     Calcula totales de importes en pesos y dólares.
@@ -88,3 +304,129 @@ def calculo_totales(df, mask=None):
     total_dolares = round(df["Importe U$S"].sum(), 2)
 
     return total_pesos, total_dolares
+
+
+# ============================================================================
+# TESTS RÁPIDOS - detectar_cuotas vs. numero_cuotas/es_cuota fila a fila
+# ============================================================================
+
+CORPUS_CUOTAS = [
+    "COMPRA TIENDA 3/12",
+    "· COMPRAS WEB 10/12",
+    "· COMPRAS WEB 4/6",
+    "MERCADOPAGO 9/10",
+    "TIENDA MOSCA 1/3",
+    "TIENDA 1/24",
+    "ELECTRICOS 12/12",
+    "COMPRA 13/12",
+    "COMPRA3/12",
+    "COMPRA 123/12",
+    "COMPRA1234/012",
+    "FARMACIA 01/06 URUGUAY",
+    "PAGO 5/ 10",
+    "SUBE 2 /3",
+    "X 1/2/3",
+    "FECHA 12/05/2024",
+    "NETFLIX.COM",
+    "PAGOS",
+    "TOTAL 1/2",
+    "CARGA / SUBE",
+    "A/B",
+    "/",
+    "1/",
+    "/2",
+    "   ESPACIOS 2/4   ",
+    "ABC 12X/3",
+    "AB 12CD X/3",
+    "",
+]
+
+
+def _test_detectar_cuotas():
+    """
+    Compara detectar_cuotas con numero_cuotas/es_cuota sobre CORPUS_CUOTAS.
+    Ejecutar con: python -c "from bancos.utils_comunes import _test_detectar_cuotas; _test_detectar_cuotas()"
+    """
+    serie = pd.Series(CORPUS_CUOTAS + CORPUS_CUOTAS[:5])
+    resultado = detectar_cuotas(serie)
+    errores = 0
+
+    for i, descripcion in serie.items():
+        pagas, totales = numero_cuotas(descripcion)
+        restantes = totales - pagas if pagas is not None else None
+        flag = "SI" if es_cuota(descripcion) == "SI" and restantes is not None and 0 <= restantes <= 11 else "NO"
+        fila = resultado.loc[i]
+
+        obtenido = (
+            None if pd.isna(fila["cuotas_pagas"]) else int(fila["cuotas_pagas"]),
+            None if pd.isna(fila["cuotas_totales"]) else int(fila["cuotas_totales"]),
+            fila["es_cuota"],
+        )
+        ok = obtenido == (pagas, totales, flag)
+        if not ok:
+            errores += 1
+            print(f"✗ FAIL | '{descripcion}' esperado={(pagas, totales, flag)} obtenido={obtenido}")
+
+    print(f"{len(serie) - errores}/{len(serie)} casos coinciden")
+    return errores == 0
+
+
+# ============================================================================
+# TESTS RÁPIDOS - importes_a_float
+# ============================================================================
+
+CORPUS_IMPORTES = [
+    ("1.234,56", 1234.56, False),
+    ("-340,00", -340.0, False),
+    ("741,96-", -741.96, False),
+    ("31.064,60", 31064.6, False),
+    ("12", 12.0, False),
+    (",50", 0.5, False),
+    (" 300,52 ", 300.52, False),
+    ("", np.nan, False),
+    (None, np.nan, False),
+    (np.nan, np.nan, False),
+    (2.5, 2.5, False),
+    (7, 7.0, False),
+    ("-5-", np.nan, True),
+    ("1,2,3", np.nan, True),
+    ("1-2", np.nan, True),
+    ("-", np.nan, True),
+    ("abc", np.nan, True),
+    ("$ 100,00", np.nan, True),
+]
+
+
+def _test_importes():
+    """
+    importes_a_float (camino rápido y general) e importe_a_float sobre CORPUS_IMPORTES.
+    Ejecutar con: python -c "from bancos.utils_comunes import _test_importes; _test_importes()"
+    """
+    valores = [valor for valor, _, _ in CORPUS_IMPORTES]
+    esperados = np.array([importe for _, importe, _ in CORPUS_IMPORTES])
+    errores_esperados = np.array([error for _, _, error in CORPUS_IMPORTES])
+
+    casos = []
+    importes, errores = importes_a_float(valores)
+    casos.append(("Columna con valores inválidos (camino general)",
+                  np.array_equal(importes, esperados, equal_nan=True)
+                  and np.array_equal(errores, errores_esperados)))
+
+    validos = ["1.234,56", "-340,00", "741,96-", "12", ",50"]
+    importes, errores = importes_a_float(validos)
+    casos.append(("Columna de importes válidos (camino rápido)",
+                  np.array_equal(importes, [importe_a_float(v) for v in validos]) and not errores.any()))
+
+    escalares = [importe_a_float(valor) for valor, _, _ in CORPUS_IMPORTES if isinstance(valor, str)]
+    casos.append(("importe_a_float da lo mismo que la versión vectorizada",
+                  np.array_equal(escalares, [i for (v, i, _) in CORPUS_IMPORTES if isinstance(v, str)], equal_nan=True)))
+
+    casos.append(("Vacío", all(len(a) == 0 for a in importes_a_float([]))))
+
+    errores = 0
+    for descripcion, ok in casos:
+        errores += not ok
+        print(f"{'✓ PASS' if ok else '✗ FAIL'} | {descripcion}")
+
+    print(f"{len(casos) - errores}/{len(casos)} casos pasaron")
+    return errores == 0
@@ -0,0 +1,2 @@
+# Benchmarks - Cuotavista
+# Generadores de estados de cuenta sintéticos y mediciones por etapa
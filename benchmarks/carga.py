@@ -0,0 +1,402 @@
+"""
+Prueba de carga contra los endpoints reales de la aplicación.
+
+Uso:
+    python -m benchmarks.carga [--workers 2] [--threads 1] [--concurrencia 8]
+        [--duracion 30 | --solicitudes 200] [--mezcla brou=1,itau=1,santander=1]
+        [--filas 300] [--paginas-extra 0] [--url http://host:puerto]
+        [--cache] [--salida carga.json]
+
+Levanta la aplicación con gunicorn en un puerto libre (con los workers y
+threads indicados) y la carga desde --concurrencia hilos, cada uno
+eligiendo al azar según --mezcla uno de estos flujos con estados de cuenta
+sintéticos (benchmarks/generadores.py):
+
+    brou       POST /brou/resultado con un Excel
+    itau       POST /itau/resultado con un PDF
+    santander  POST /santander/upload con un PDF encriptado y después
+               POST /santander/process-with-password con su contraseña
+
+Con --url se carga un servidor que ya está corriendo en lugar de levantar
+uno (sin medición de memoria).
+
+Como se sube siempre el mismo archivo de cada banco, el servidor se
+levanta con el cache de resultados desactivado (CUOTAVISTA_CACHE_MB=0)
+para medir el procesamiento; con --cache queda activo.
+
+Informa por flujo y por paso: solicitudes, errores (respuestas >= 400 o
+fallas de conexión), throughput y latencias p50/p95/p99, más el pico de
+memoria (RSS) de cada worker de gunicorn, tomado de /proc (solo Linux).
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+from benchmarks.generadores import generar_excel_brou, generar_pdf_itau, generar_pdf_santander
+
+
+FLUJOS = ("brou", "itau", "santander")
+PASSWORD = "carga"
+
+# Segundos que se espera a que gunicorn responda antes de abortar
+TIMEOUT_ARRANQUE = 30
+
+# Cada cuánto se lee la memoria de los workers (segundos)
+INTERVALO_MEMORIA = 0.5
+
+
+def _multipart(campos: dict, archivos: dict) -> tuple:
+    """Arma un cuerpo multipart/form-data. Devuelve (bytes, content_type)."""
+    separador = uuid.uuid4().hex
+    partes = []
+    for nombre, valor in campos.items():
+        partes.append(
+            f'--{separador}\r\nContent-Disposition: form-data; name="{nombre}"\r\n\r\n{valor}\r\n'.encode()
+        )
+    for nombre, (nombre_archivo, datos) in archivos.items():
+        partes.append(
+            f'--{separador}\r\nContent-Disposition: form-data; name="{nombre}"; '
+            f'filename="{nombre_archivo}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode()
+            + datos + b"\r\n"
+        )
+    partes.append(f"--{separador}--\r\n".encode())
+    return b"".join(partes), f"multipart/form-data; boundary={separador}"
+
+
+def _post(url: str, campos: dict = None, archivos: dict = None, timeout: float = 120) -> tuple:
+    """POST y lectura completa de la respuesta. Devuelve (codigo, cuerpo, segundos)."""
+    if archivos:
+        cuerpo, tipo = _multipart(campos or {}, archivos)
+    else:
+        cuerpo, tipo = urllib.parse.urlencode(campos or {}).encode(), "application/x-www-form-urlencoded"
+
+    pedido = urllib.request.Request(url, data=cuerpo, method="POST", headers={"Content-Type": tipo})
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(pedido, timeout=timeout) as respuesta:
+            datos = respuesta.read()
+            codigo = respuesta.status
+    except urllib.error.HTTPError as e:
+        datos = e.read()
+        codigo = e.code
+    except (urllib.error.URLError, OSError):
+        datos, codigo = b"", None
+    return codigo, datos, time.perf_counter() - inicio
+
+
+class Mediciones:
+    """Latencias y errores por paso, thread-safe."""
+
+    def __init__(self):
+        self.latencias = {}
+        self.errores = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, paso: str, segundos: float, ok: bool) -> None:
+        with self._lock:
+            self.latencias.setdefault(paso, []).append(segundos)
+            self.errores[paso] = self.errores.get(paso, 0) + (not ok)
+
+
+def _ok(codigo) -> bool:
+    return codigo is not None and codigo < 400
+
+
+def flujo_brou(url: str, datos: dict, mediciones: Mediciones) -> None:
+    codigo, _, segundos = _post(f"{url}/brou/resultado", archivos={"file": ("carga.xlsx", datos["brou"])})
+    mediciones.registrar("brou", segundos, _ok(codigo))
+
+
+def flujo_itau(url: str, datos: dict, mediciones: Mediciones) -> None:
+    codigo, _, segundos = _post(f"{url}/itau/resultado", archivos={"archivo": ("carga.pdf", datos["itau"])})
+    mediciones.registrar("itau", segundos, _ok(codigo))
+
+
+def flujo_santander(url: str, datos: dict, mediciones: Mediciones) -> None:
+    """Upload del PDF encriptado y después el paso de la contraseña."""
+    codigo, cuerpo, subida = _post(f"{url}/santander/upload",
+                                   archivos={"archivo": ("carga.pdf", datos["santander"])})
+    temp_id = None
+    if _ok(codigo):
+        try:
+            temp_id = json.loads(cuerpo).get("temp_id")
+        except ValueError:
+            pass
+    mediciones.registrar("santander_upload", subida, temp_id is not None)
+    if temp_id is None:
+        mediciones.registrar("santander", subida, False)
+        return
+
+    codigo, _, password = _post(f"{url}/santander/process-with-password",
+                                campos={"temp_id": temp_id, "password": PASSWORD})
+    mediciones.registrar("santander_password", password, _ok(codigo))
+    mediciones.registrar("santander", subida + password, _ok(codigo))
+
+
+FUNCIONES_FLUJO = {"brou": flujo_brou, "itau": flujo_itau, "santander": flujo_santander}
+
+
+def leer_mezcla(texto: str) -> dict:
+    """'brou=1,itau=2' -> {'brou': 1.0, 'itau': 2.0}."""
+    mezcla = {}
+    for parte in texto.split(","):
+        flujo, _, peso = parte.strip().partition("=")
+        if flujo not in FLUJOS:
+            raise argparse.ArgumentTypeError(f"flujo desconocido: {flujo}")
+        mezcla[flujo] = float(peso or 1)
+    if not any(mezcla.values()):
+        raise argparse.ArgumentTypeError("la mezcla no tiene ningún flujo con peso")
+    return mezcla
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(workers: int, threads: int, directorio_pendientes: str = None,
+                     cache: bool = False) -> tuple:
+    """Levanta gunicorn en un puerto libre. Devuelve (proceso, url)."""
+    puerto = _puerto_libre()
+    entorno = dict(os.environ)
+    if not cache:
+        entorno["CUOTAVISTA_CACHE_MB"] = "0"
+    if directorio_pendientes:
+        entorno["CUOTAVISTA_PENDIENTES_DIR"] = directorio_pendientes
+
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{puerto}",
+         "--workers", str(workers), "--threads", str(threads), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=entorno,
+    )
+    url = f"http://127.0.0.1:{puerto}"
+
+    limite = time.monotonic() + TIMEOUT_ARRANQUE
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError("gunicorn terminó al arrancar")
+        try:
+            with urllib.request.urlopen(url + "/", timeout=2):
+                return proceso, url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+
+    proceso.terminate()
+    raise RuntimeError(f"gunicorn no respondió en {TIMEOUT_ARRANQUE} s")
+
+
+def _hijos(pid: int) -> list:
+    """PIDs de los procesos hijos (los workers de gunicorn), leyendo /proc."""
+    hijos = []
+    for nombre in os.listdir("/proc"):
+        if not nombre.isdigit():
+            continue
+        try:
+            with open(f"/proc/{nombre}/stat") as f:
+                # El nombre del comando va entre paréntesis y puede tener espacios
+                campos = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(campos[1]) == pid:
+            hijos.append(int(nombre))
+    return hijos
+
+
+def _pico_rss(pid: int):
+    """Pico de memoria residente del proceso en bytes (VmHWM), o None."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linea in f:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class MonitorMemoria(threading.Thread):
+    """Registra el pico de RSS de cada worker mientras dura la carga."""
+
+    def __init__(self, pid_master: int):
+        super().__init__(daemon=True)
+        self.pid_master = pid_master
+        self.picos = {}
+        self._parar = threading.Event()
+
+    def run(self) -> None:
+        while not self._parar.is_set():
+            self.muestrear()
+            self._parar.wait(INTERVALO_MEMORIA)
+
+    def muestrear(self) -> None:
+        for pid in _hijos(self.pid_master):
+            pico = _pico_rss(pid)
+            if pico is not None:
+                self.picos[pid] = max(self.picos.get(pid, 0), pico)
+
+    def parar(self) -> dict:
+        self._parar.set()
+        self.join()
+        self.muestrear()
+        return self.picos
+
+
+def _percentil(ordenados: list, p: float) -> float:
+    """Percentil por rango más cercano de una lista ordenada."""
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def resumir(mediciones: Mediciones, segundos: float) -> dict:
+    """Solicitudes, errores, throughput y percentiles por paso."""
+    resumen = {}
+    for paso, latencias in sorted(mediciones.latencias.items()):
+        ordenadas = sorted(latencias)
+        resumen[paso] = {
+            "solicitudes": len(ordenadas),
+            "errores": mediciones.errores[paso],
+            "tasa_error": mediciones.errores[paso] / len(ordenadas),
+            "por_segundo": len(ordenadas) / segundos,
+            "p50": _percentil(ordenadas, 50),
+            "p95": _percentil(ordenadas, 95),
+            "p99": _percentil(ordenadas, 99),
+            "max": ordenadas[-1],
+        }
+    return resumen
+
+
+def cargar(url: str, datos: dict, mezcla: dict, concurrencia: int,
+           duracion: float = None, solicitudes: int = None, seed: int = 0) -> tuple:
+    """
+    Corre los flujos desde concurrencia hilos hasta cumplir la duración o
+    la cantidad de flujos. Devuelve (mediciones, segundos).
+    """
+    mediciones = Mediciones()
+    flujos, pesos = zip(*mezcla.items())
+    restantes = [solicitudes]
+    lock = threading.Lock()
+    fin = time.monotonic() + duracion if duracion else None
+
+    def hilo(numero: int) -> None:
+        r = random.Random(seed + numero)
+        while True:
+            if fin is not None and time.monotonic() >= fin:
+                return
+            if solicitudes is not None:
+                with lock:
+                    if restantes[0] <= 0:
+                        return
+                    restantes[0] -= 1
+            FUNCIONES_FLUJO[r.choices(flujos, pesos)[0]](url, datos, mediciones)
+
+    hilos = [threading.Thread(target=hilo, args=(i,)) for i in range(concurrencia)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return mediciones, time.perf_counter() - inicio
+
+
+def imprimir_reporte(salida: dict) -> None:
+    meta = salida["meta"]
+    print(f"{meta['segundos']:.1f} s, {meta['flujos_por_segundo']:.2f} flujos/s "
+          f"(workers={meta['parametros']['workers']}, threads={meta['parametros']['threads']}, "
+          f"concurrencia={meta['parametros']['concurrencia']})")
+    print(f"{'paso':20} {'n':>6} {'err %':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for paso, datos in salida["resultados"].items():
+        print(f"{paso:20} {datos['solicitudes']:6d} {datos['tasa_error'] * 100:6.1f} {datos['por_segundo']:7.2f} "
+              f"{datos['p50'] * 1000:8.1f} {datos['p95'] * 1000:8.1f} {datos['p99'] * 1000:8.1f}")
+    for pid, pico in salida["memoria_workers"].items():
+        print(f"worker {pid}: pico RSS {pico / 1024 / 1024:.1f} MB")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga de los endpoints de análisis.")
+    parser.add_argument("--workers", type=int, default=2, help="Workers de gunicorn")
+    parser.add_argument("--threads", type=int, default=1, help="Threads por worker de gunicorn")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Clientes simultáneos")
+    limite = parser.add_mutually_exclusive_group()
+    limite.add_argument("--duracion", type=float, help="Segundos de carga (30 por defecto)")
+    limite.add_argument("--solicitudes", type=int, help="Cantidad total de flujos")
+    parser.add_argument("--mezcla", type=leer_mezcla, default="brou=1,itau=1,santander=1",
+                        help="Peso de cada flujo, por ejemplo brou=2,santander=1")
+    parser.add_argument("--filas", type=int, default=300, help="Movimientos por estado de cuenta")
+    parser.add_argument("--paginas-extra", type=int, default=0, help="Páginas legales al final de los PDF")
+    parser.add_argument("--url", help="Servidor ya levantado (no se inicia gunicorn)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Dejar activo el cache de resultados del servidor")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+    if args.duracion is None and args.solicitudes is None:
+        args.duracion = 30.0
+
+    datos = {
+        "brou": generar_excel_brou(args.filas, args.seed),
+        "itau": generar_pdf_itau(args.filas, args.seed, paginas_extra=args.paginas_extra),
+        "santander": generar_pdf_santander(args.filas, args.seed, paginas_extra=args.paginas_extra,
+                                           password=PASSWORD),
+    }
+
+    proceso, monitor, url = None, None, args.url
+    temporal = None
+    if url is None:
+        # Upload y contraseña pueden caer en workers distintos
+        if args.workers > 1 and not os.environ.get("CUOTAVISTA_PENDIENTES_DIR"):
+            temporal = tempfile.TemporaryDirectory(prefix="cuotavista-carga-")
+        proceso, url = iniciar_servidor(args.workers, args.threads, temporal and temporal.name,
+                                        args.cache)
+        if os.path.isdir("/proc"):
+            monitor = MonitorMemoria(proceso.pid)
+            monitor.start()
+
+    try:
+        mediciones, segundos = cargar(url, datos, args.mezcla, args.concurrencia,
+                                      args.duracion, args.solicitudes, args.seed)
+    finally:
+        picos = monitor.parar() if monitor else {}
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+        if temporal is not None:
+            temporal.cleanup()
+
+    flujos = sum(len(mediciones.latencias.get(flujo, [])) for flujo in FLUJOS)
+    parametros = {**vars(args), "mezcla": args.mezcla}
+    salida = {
+        "meta": {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "cpus": os.cpu_count(),
+            "parametros": parametros,
+            "segundos": segundos,
+            "flujos_por_segundo": flujos / segundos,
+        },
+        "resultados": resumir(mediciones, segundos),
+        "memoria_workers": {str(pid): pico for pid, pico in sorted(picos.items())},
+    }
+
+    imprimir_reporte(salida)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(salida, f, indent=2, ensure_ascii=False)
+
+    errores = sum(datos_paso["errores"] for datos_paso in salida["resultados"].values())
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Generadores deterministas de estados de cuenta sintéticos.
+
+Con la misma semilla generan siempre el mismo archivo, así las mediciones
+se pueden comparar entre corridas. Imitan el formato que esperan los
+parsers de cada banco:
+
+- BROU: Excel con el encabezado de movimientos en la segunda fila "Fecha"
+  (como los que exporta el homebanking). Se genera .xlsx con openpyxl,
+  que pandas lee con openpyxl y no con xlrd: el camino .xls se mide aparte
+  con el archivo de ejemplo de static/.
+- Itaú y Santander: líneas de texto como las que devuelve la extracción
+  del PDF, y PDFs (opcionalmente encriptados) con esas líneas.
+"""
+from io import BytesIO
+import random
+
+import fitz  # PyMuPDF
+from openpyxl import Workbook
+
+
+COMERCIOS = [
+    "SUPERMERCADO DISCO", "FARMACIA PIGALLE", "TIENDA MOSCA", "NETFLIX.COM UY",
+    "ANCAP SERVICENTRO", "MERCADOLIBRE", "TIENDA INGLESA", "UTE FACTURA",
+    "RESTAURANTE LA PASIVA", "PEDIDOSYA",
+]
+
+# Fracción de movimientos en cuotas y planes posibles
+PROPORCION_CUOTAS = 0.4
+PLANES_CUOTAS = [2, 3, 6, 10, 12]
+
+LINEAS_POR_PAGINA = 64
+
+
+def _importe(r: random.Random, maximo: int = 9) -> str:
+    """Importe con miles y decimales en formato uruguayo (1.234,56)."""
+    miles = r.randint(0, maximo)
+    if miles:
+        return f"{miles}.{r.randint(0, 999):03d},{r.randint(0, 99):02d}"
+    return f"{r.randint(1, 999)},{r.randint(0, 99):02d}"
+
+
+def _detalle(r: random.Random, separador_total: str = "{}") -> str:
+    """Comercio, con sufijo de cuota (n/total) en una parte de los movimientos."""
+    detalle = r.choice(COMERCIOS)
+    if r.random() < PROPORCION_CUOTAS:
+        total = r.choice(PLANES_CUOTAS)
+        detalle += f" {r.randint(1, total)}/{separador_total.format(total)}"
+    return detalle
+
+
+def generar_excel_brou(filas: int, seed: int = 0) -> bytes:
+    """Excel BROU (.xlsx) con filas movimientos."""
+    r = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Estado de Cuenta")
+
+    # Cabecera del homebanking: la primera "Fecha" es la del reporte
+    ws.append(["Banco de la República Oriental del Uruguay"])
+    ws.append(["Fecha:", "01/10/2024"])
+    ws.append(["Detalle de Tarjeta"])
+    ws.append(["MASTERCARD"])
+    ws.append([])
+    ws.append(["Estado de Cuenta"])
+    ws.append(["Fecha", "Descripción", None, "Importe Origen", "Importe $", "Importe U$S"])
+    ws.append([None, "SALDOS ANTERIORES", None, None, _importe(r), _importe(r, 0)])
+
+    for _ in range(filas):
+        fecha = f"{r.randint(1, 28):02d}/{r.randint(1, 12):02d}/2024"
+        if r.random() < 0.1:
+            ws.append([fecha, _detalle(r), None, _importe(r, 0), None, _importe(r, 0)])
+        else:
+            ws.append([fecha, _detalle(r), None, None, _importe(r), None])
+
+    # Fila de cierre (depurar_archivo descarta la última)
+    ws.append(["Total", None, None, None, None, None])
+
+    salida = BytesIO()
+    wb.save(salida)
+    return salida.getvalue()
+
+
+def lineas_itau(filas: int, seed: int = 0) -> list:
+    """Líneas de texto de un estado de cuenta Itaú con filas movimientos."""
+    r = random.Random(seed)
+    lineas = [
+        "ESTADO DE CUENTA ITAU VOLAR",
+        f"SALDO DEL ESTADO DE CUENTA ANTERIOR {_importe(r)}",
+        f"PAGOS {_importe(r)}",
+    ]
+    for _ in range(filas):
+        fecha = f"{r.randint(1, 28):02d} {r.randint(1, 12):02d} 24"
+        detalle = _detalle(r, "{:02d}")
+        if r.random() < 0.15:
+            # Compra en dólares: importe origen e importe U$S
+            lineas.append(f"{fecha} 1234 {detalle} {_importe(r, 0)} {_importe(r, 0)}")
+        else:
+            lineas.append(f"{fecha} 1234 {detalle} {_importe(r)}")
+
+    lineas += [
+        "SEGURO DE VIDA", _importe(r, 0),
+        f"INTERESES COMPENSATORIOS {_importe(r, 0)}",
+        f"REDUCCIÓN DE IVA {_importe(r, 0)}",
+        f"{_importe(r)} 22%",
+        "UD. HA GENERADO 1234 MILLAS",
+    ]
+    return lineas
+
+
+def lineas_santander(filas: int, seed: int = 0) -> list:
+    """Líneas de texto de un estado de cuenta Santander con filas movimientos."""
+    r = random.Random(seed)
+    lineas = [
+        "ESTADO DE CUENTA SANTANDER",
+        "28/01/2025 770068579200 41.090",
+        "SALDO ANTERIOR 741,96",
+        "07/12/2024 399 PAGOS 741,96-",
+    ]
+    for _ in range(filas):
+        fecha = f"{r.randint(1, 28):02d}/{r.randint(1, 12):02d}/2024"
+        lineas.append(f"{fecha} 579 {_detalle(r)} {_importe(r)}")
+
+    lineas += [
+        "10/01/2025 579 DEV LEY INCL FINANC 100,00-",
+        "08/01/2025 INTERESES FINANCIEROS 320,00",
+        "10/01/2025 I.V.A. 22% $ 70,40",
+        "TOTAL DEV LEY 19210 100,00",
+        "SALDO CONTADO 15.000,00",
+        "P.Minimo: 500,00 P.Contado: 15.000,00",
+    ]
+    return lineas
+
+
+def generar_pdf(lineas: list, lineas_por_pagina: int = LINEAS_POR_PAGINA,
+                password: str = None, paginas_extra: int = 0) -> bytes:
+    """
+    PDF con las líneas repartidas en páginas.
+
+    Args:
+        lineas: Texto de cada línea
+        lineas_por_pagina: Líneas por página (define la cantidad de páginas)
+        password: Si se indica, el PDF se encripta (RC4 128, como pypdf sin cryptography)
+        paginas_extra: Páginas de texto legal al final, después del fin de movimientos
+    """
+    doc = fitz.open()
+    paginas = [lineas[i:i + lineas_por_pagina] for i in range(0, len(lineas), lineas_por_pagina)]
+    paginas += [["Condiciones generales y texto legal."] * lineas_por_pagina] * paginas_extra
+
+    for lineas_pagina in paginas:
+        pagina = doc.new_page()
+        y = 40
+        for linea in lineas_pagina:
+            pagina.insert_text((30, y), linea, fontsize=8)
+            y += 11
+
+    opciones = {}
+    if password:
+        opciones = dict(encryption=fitz.PDF_ENCRYPT_RC4_128, user_pw=password, owner_pw=password + "-owner")
+    datos = doc.tobytes(**opciones)
+    doc.close()
+    return datos
+
+
+def generar_pdf_itau(filas: int, seed: int = 0, **opciones) -> bytes:
+    """PDF Itaú con filas movimientos (opciones: ver generar_pdf)."""
+    return generar_pdf(lineas_itau(filas, seed), **opciones)
+
+
+def generar_pdf_santander(filas: int, seed: int = 0, **opciones) -> bytes:
+    """PDF Santander con filas movimientos (opciones: ver generar_pdf)."""
+    return generar_pdf(lineas_santander(filas, seed), **opciones)
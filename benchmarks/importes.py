@@ -0,0 +1,144 @@
+"""
+Throughput de la conversión de importes: importes_a_float contra las
+conversiones que tenía cada parser antes de compartirla.
+
+Uso:
+    python -m benchmarks.importes [--cantidad 100000] [--repeticiones 5]
+        [--salida importes.json]
+
+Casos (cada uno con --cantidad importes sintéticos en formato uruguayo):
+    brou       columna del Excel con importes y vacíos (NaN). Antes:
+               str.replace dos veces + apply(pd.to_numeric) por celda
+    itau       importes sueltos con "-" adelante. Antes: convertir_a_float
+               por importe
+    santander  importes sueltos con "-" al final en los créditos. Antes:
+               parse_importe por línea
+
+Para cada caso se informa la mediana en segundos, importes por segundo y
+la aceleración, y se verifica que las dos versiones den lo mismo.
+"""
+import argparse
+import json
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generadores import _importe
+from benchmarks.micro import medir
+from bancos.utils_comunes import importes_a_float
+
+
+# ============================================================================
+# Conversiones anteriores (copiadas de los parsers, como referencia)
+# ============================================================================
+
+def brou_anterior(columna: pd.Series) -> pd.Series:
+    return (
+        columna
+        .fillna("")
+        .astype(str)
+        .str.replace(".", "", regex=False)
+        .str.replace(",", ".", regex=False)
+        .apply(pd.to_numeric, errors="coerce")
+    )
+
+
+def convertir_a_float(valor):
+    try:
+        return float(valor.replace(".", "").replace(",", "."))
+    except:  # noqa: E722 (así era en el parser de Itaú)
+        return None
+
+
+def itau_anterior(montos: list) -> list:
+    return [convertir_a_float(monto) for monto in montos]
+
+
+def parse_importe(monto_str: str) -> float:
+    monto_str = monto_str.strip()
+    negativo = monto_str.endswith('-')
+    if negativo:
+        monto_str = monto_str[:-1]
+    monto_str = monto_str.replace(".", "").replace(",", ".")
+    try:
+        valor = float(monto_str)
+        return -valor if negativo else valor
+    except ValueError:
+        return 0.0
+
+
+def santander_anterior(montos: list) -> list:
+    return [parse_importe(monto) for monto in montos]
+
+
+# ============================================================================
+# Datos
+# ============================================================================
+
+def datos_brou(cantidad: int, r: random.Random) -> pd.Series:
+    """Columna object como la del Excel: 30% de celdas vacías."""
+    return pd.Series([_importe(r) if r.random() > 0.3 else np.nan for _ in range(cantidad)],
+                     dtype=object)
+
+
+def datos_itau(cantidad: int, r: random.Random) -> list:
+    return [("-" if r.random() < 0.1 else "") + _importe(r) for _ in range(cantidad)]
+
+
+def datos_santander(cantidad: int, r: random.Random) -> list:
+    return [_importe(r) + ("-" if r.random() < 0.1 else "") for _ in range(cantidad)]
+
+
+CASOS = {
+    "brou": (datos_brou, brou_anterior),
+    "itau": (datos_itau, itau_anterior),
+    "santander": (datos_santander, santander_anterior),
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Throughput de la conversión de importes.")
+    parser.add_argument("--cantidad", type=int, default=100_000, help="Importes por caso")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    iguales = True
+    print(f"{'caso':10} {'anterior':>14} {'vectorizado':>14} {'aceleración':>12}", file=sys.stderr)
+    for caso, (generar, anterior) in CASOS.items():
+        datos = generar(args.cantidad, random.Random(args.seed))
+
+        esperado = np.asarray(anterior(datos), dtype=float)
+        obtenido = importes_a_float(datos)[0]
+        iguales &= np.array_equal(esperado, obtenido, equal_nan=True)
+
+        mediciones = {
+            "anterior": medir(anterior, lambda: (datos,), args.repeticiones),
+            "vectorizado": medir(importes_a_float, lambda: (datos,), args.repeticiones),
+        }
+        for medicion in mediciones.values():
+            medicion["importes_por_segundo"] = args.cantidad / medicion["mediana"]
+        aceleracion = mediciones["anterior"]["mediana"] / mediciones["vectorizado"]["mediana"]
+        resultados[caso] = {**mediciones, "aceleracion": aceleracion}
+
+        print(f"{caso:10} {mediciones['anterior']['importes_por_segundo']:>10,.0f} i/s "
+              f"{mediciones['vectorizado']['importes_por_segundo']:>10,.0f} i/s "
+              f"{aceleracion:>11.1f}x", file=sys.stderr)
+
+    if not iguales:
+        print("Las conversiones no coinciden", file=sys.stderr)
+
+    texto = json.dumps({"parametros": vars(args), "resultados": resultados}, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+
+    return 0 if iguales else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
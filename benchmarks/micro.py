@@ -0,0 +1,236 @@
+"""
+Micro-benchmarks por etapa del procesamiento de cada banco.
+
+Uso:
+    python -m benchmarks.micro [--filas 2000] [--repeticiones 5]
+        [--bancos brou,itau,santander] [--sin-encriptar] [--paginas-extra 0]
+        [--lineas-por-pagina 64] [--salida resultados.json]
+        [--comparar base.json] [--tolerancia 0.15]
+
+Etapas medidas (según el banco):
+    desencriptar      abrir el PDF Santander y probar la contraseña
+    lectura_xlsx      leer y depurar el Excel BROU sintético (.xlsx, openpyxl)
+    lectura_xls       leer y depurar el .xls de ejemplo de static/ (xlrd, el
+                      formato que exporta el homebanking; tamaño fijo)
+    extraccion_texto  extraer el texto de las páginas del PDF
+    parseo_lineas     convertir el texto en el DataFrame de movimientos
+    cuotas            detectar cuotas en los detalles
+    analisis          analizar_movimientos completo (incluye la detección de cuotas)
+    html              contexto + render de resultado.html
+    excel             generar el .xlsx de descarga
+
+Cada etapa se mide sobre datos ya preparados por la etapa anterior (la
+preparación no se cuenta) y se informan mínimo, mediana y media en
+segundos. El resultado se guarda en JSON; con --comparar se muestra la
+relación contra una corrida anterior y se sale con código 1 si alguna
+etapa empeoró más que la tolerancia.
+"""
+import argparse
+from io import BytesIO
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.generadores import (
+    generar_excel_brou,
+    generar_pdf_itau,
+    generar_pdf_santander,
+    LINEAS_POR_PAGINA,
+)
+from bancos.analisis import analizar_movimientos
+from bancos.brou.parser import depurar_archivo
+from bancos.excel import generar_excel
+from bancos.itau import parser as parser_itau
+from bancos.santander import parser as parser_santander
+from bancos.utils_comunes import detectar_cuotas
+
+
+BANCOS = ("brou", "itau", "santander")
+
+# Único .xls disponible: no hay con qué generar .xls sintéticos (xlwt)
+EJEMPLO_XLS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "static", "ejemplo_estado_cuenta.xls")
+PASSWORD = "benchmark"
+
+
+def medir(funcion, preparar=None, repeticiones: int = 5) -> dict:
+    """
+    Mide funcion(*preparar()) repeticiones veces.
+
+    preparar (opcional) arma argumentos nuevos para cada repetición, fuera
+    del tiempo medido (por ejemplo, un PDF recién abierto).
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        args = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        funcion(*args)
+        tiempos.append(time.perf_counter() - inicio)
+
+    return {
+        "min": min(tiempos),
+        "mediana": statistics.median(tiempos),
+        "media": statistics.fmean(tiempos),
+        "repeticiones": repeticiones,
+    }
+
+
+def _renderizar_html(resultado, app):
+    from flask import render_template
+
+    with app.test_request_context():
+        contexto = resultado.contexto_plantilla("benchmark", "benchmark.xlsx", "Benchmark", "blue")
+        return render_template("resultado.html", **contexto)
+
+
+def _etapas_comunes(df, separar_devoluciones: bool, app, repeticiones: int) -> dict:
+    """cuotas, analisis, html y excel a partir del DataFrame del parser."""
+    detalle = df["Detalle"] if "Detalle" in df.columns else df["Descripción"]
+    resultado = analizar_movimientos(df, separar_devoluciones=separar_devoluciones)
+
+    return {
+        "cuotas": medir(detectar_cuotas, lambda: (detalle,), repeticiones),
+        "analisis": medir(
+            lambda d: analizar_movimientos(d, separar_devoluciones=separar_devoluciones),
+            lambda: (df.copy(),), repeticiones,
+        ),
+        "html": medir(_renderizar_html, lambda: (resultado, app), repeticiones),
+        "excel": medir(generar_excel, lambda: (resultado.movimientos,), repeticiones),
+    }
+
+
+def benchmark_brou(args, app) -> dict:
+    datos = generar_excel_brou(args.filas)
+    with open(EJEMPLO_XLS, "rb") as f:
+        datos_xls = f.read()
+    etapas = {
+        "lectura_xlsx": medir(depurar_archivo, lambda: (BytesIO(datos), "benchmark.xlsx"),
+                              args.repeticiones),
+        "lectura_xls": medir(depurar_archivo, lambda: (BytesIO(datos_xls), "ejemplo_estado_cuenta.xls"),
+                             args.repeticiones),
+    }
+    df = depurar_archivo(BytesIO(datos), "benchmark.xlsx")
+    etapas.update(_etapas_comunes(df, False, app, args.repeticiones))
+    return {"bytes": len(datos), "etapas": etapas}
+
+
+def benchmark_itau(args, app) -> dict:
+    datos = generar_pdf_itau(args.filas, lineas_por_pagina=args.lineas_por_pagina,
+                             paginas_extra=args.paginas_extra)
+    texto = parser_itau.extraer_texto_movimientos(datos)
+    etapas = {
+        "extraccion_texto": medir(parser_itau.extraer_texto_movimientos, lambda: (datos,), args.repeticiones),
+        "parseo_lineas": medir(parser_itau.extraer_movimientos, lambda: (texto,), args.repeticiones),
+    }
+    etapas.update(_etapas_comunes(parser_itau.extraer_movimientos(texto), False, app, args.repeticiones))
+    return {"bytes": len(datos), "etapas": etapas}
+
+
+def benchmark_santander(args, app) -> dict:
+    password = None if args.sin_encriptar else PASSWORD
+    datos = generar_pdf_santander(args.filas, lineas_por_pagina=args.lineas_por_pagina,
+                                  paginas_extra=args.paginas_extra, password=password)
+
+    def abrir():
+        return (parser_santander.EstadoCuentaSantander(datos, password).reader, datos, password)
+
+    texto = parser_santander.extraer_texto_movimientos(*abrir())
+    etapas = {
+        "desencriptar": medir(parser_santander.EstadoCuentaSantander, lambda: (datos, password),
+                              args.repeticiones),
+        "extraccion_texto": medir(parser_santander.extraer_texto_movimientos, abrir, args.repeticiones),
+        "parseo_lineas": medir(parser_santander.extraer_movimientos, lambda: (texto,), args.repeticiones),
+    }
+    df = parser_santander.extraer_movimientos(texto)[0]
+    etapas.update(_etapas_comunes(df, True, app, args.repeticiones))
+    return {"bytes": len(datos), "encriptado": password is not None, "etapas": etapas}
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual: dict, anterior: dict, tolerancia: float) -> list:
+    """Imprime la relación actual/anterior por etapa y devuelve las que empeoraron."""
+    regresiones = []
+    for banco, datos in actual["resultados"].items():
+        etapas_anteriores = anterior.get("resultados", {}).get(banco, {}).get("etapas", {})
+        for etapa, medicion in datos["etapas"].items():
+            if etapa not in etapas_anteriores:
+                continue
+            base = etapas_anteriores[etapa]["mediana"]
+            relacion = medicion["mediana"] / base if base else float("inf")
+            marca = ""
+            if relacion > 1 + tolerancia:
+                marca = "  <-- regresión"
+                regresiones.append(f"{banco}.{etapa}")
+            print(f"{banco:10} {etapa:17} {base * 1000:9.2f} ms -> {medicion['mediana'] * 1000:9.2f} ms"
+                  f"  x{relacion:.2f}{marca}")
+    return regresiones
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks por etapa.")
+    parser.add_argument("--filas", type=int, default=2000, help="Movimientos por estado de cuenta")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--bancos", default=",".join(BANCOS))
+    parser.add_argument("--sin-encriptar", action="store_true", help="PDF Santander sin contraseña")
+    parser.add_argument("--paginas-extra", type=int, default=0, help="Páginas legales al final de los PDF")
+    parser.add_argument("--lineas-por-pagina", type=int, default=LINEAS_POR_PAGINA)
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.15,
+                        help="Empeoramiento relativo de la mediana que cuenta como regresión")
+    args = parser.parse_args(argv)
+
+    from app import app
+
+    funciones = {"brou": benchmark_brou, "itau": benchmark_itau, "santander": benchmark_santander}
+    resultados = {}
+    for banco in args.bancos.split(","):
+        banco = banco.strip()
+        resultados[banco] = funciones[banco](args, app)
+        for etapa, medicion in resultados[banco]["etapas"].items():
+            print(f"{banco:10} {etapa:17} {medicion['mediana'] * 1000:9.2f} ms (min {medicion['min'] * 1000:.2f})",
+                  file=sys.stderr)
+
+    salida = {
+        "meta": {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _commit_actual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "parametros": vars(args),
+        },
+        "resultados": resultados,
+    }
+
+    texto = json.dumps(salida, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = comparar(salida, json.load(f), args.tolerancia)
+        if regresiones:
+            print("Regresiones: " + ", ".join(regresiones), file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
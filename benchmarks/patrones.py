@@ -0,0 +1,156 @@
+"""
+Tiempo por línea de los patrones de los parsers con líneas patológicas:
+los patrones actuales contra los que tenían antes de hacerlos lineales.
+
+Uso:
+    python -m benchmarks.patrones [--largos 250 500 1000 2000]
+        [--repeticiones 3] [--salida patrones.json]
+
+Casos (cada uno con líneas de cada largo pedido, sin el límite
+LARGO_MAXIMO_LINEA, que los parsers aplican antes de estos patrones):
+    santander_espacios  movimiento con muchos espacios antes del final, sin
+                        importe (PATRON_TRANSACCION_FUERTE)
+    santander_concepto  lo mismo sin tarjeta (PATRON_CONCEPTO_SIN_TARJETA)
+    santander_total     TOTAL DEV LEY con un número larguísimo que no cierra
+                        la línea (PATRON_IMPORTE_FINAL)
+    itau_digitos        movimiento con un bloque de dígitos sin coma
+                        (separar_montos: findall de montos y sub del detalle)
+    itau_miles          lo mismo con grupos de miles (1.234.234...) sin coma
+    cuotas_barras       descripción sin "/" (patrón de cuotas de detectar_cuotas)
+    cuotas_token        descripción con un token larguísimo antes del último
+
+Para cada caso y largo se informa el tiempo por línea de cada versión y,
+por caso, el exponente de crecimiento (t ~ largo^k, entre el largo más chico
+y el más grande): cerca de 1 es lineal, cerca de 2 cuadrático. Sale con
+código 1 si las versiones dan distinto o si la actual no es lineal (k > 1.5).
+"""
+import argparse
+import json
+import math
+import re
+import sys
+
+from benchmarks.micro import medir
+from bancos.itau.parser import separar_montos
+from bancos.santander.parser import (
+    PATRON_CONCEPTO_SIN_TARJETA, PATRON_IMPORTE_FINAL, PATRON_TRANSACCION_FUERTE,
+)
+from bancos.utils_comunes import _PATRON_PARTES_CUOTA, _PATRON_ULTIMO_TOKEN
+
+
+# Caracteres procesados por medición (las líneas cortas se repiten)
+CARACTERES_POR_MEDICION = 16_000
+
+# Exponente a partir del que el crecimiento no se considera lineal
+EXPONENTE_MAXIMO = 1.5
+
+
+# ============================================================================
+# Patrones anteriores (copiados de los parsers, como referencia)
+# ============================================================================
+
+FUERTE_ANTERIOR = re.compile(
+    r'^(\d{2}/\d{2}/\d{4})\s+(\d{3})\s+(.+?)\s+([\d]{1,3}(?:\.[\d]{3})*,[\d]{2}-?)\s*$')
+CONCEPTO_ANTERIOR = re.compile(
+    r'^(\d{2}/\d{2}/\d{4})\s+(.+?)\s+([\d]{1,3}(?:\.[\d]{3})*,[\d]{2}-?)\s*$')
+TOTAL_ANTERIOR = re.compile(r'([\d.,]+(?:-)?)\s*$')
+MONTO_ANTERIOR = re.compile(r"-?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}")
+IMPORTE_ANTERIOR = re.compile(r"\d{1,3}(?:\.\d{3})*,\d{2}")
+PARTES_CUOTA_ANTERIOR = re.compile(r"([^/]*)/([^/]*)$")
+ULTIMO_TOKEN_ANTERIOR = re.compile(r"(\S+)$")
+
+
+def _grupos(patron, metodo="match"):
+    def buscar(linea):
+        match = getattr(patron, metodo)(linea)
+        return match.groups() if match else None
+    return buscar
+
+
+def separar_montos_anterior(linea):
+    return MONTO_ANTERIOR.findall(linea), IMPORTE_ANTERIOR.sub("", linea)
+
+
+# caso: (línea de largo n, anterior, actual)
+CASOS = {
+    "santander_espacios": (
+        lambda n: "01/01/2024 123 A" + " " * n + "X",
+        _grupos(FUERTE_ANTERIOR), _grupos(PATRON_TRANSACCION_FUERTE)),
+    "santander_concepto": (
+        lambda n: "01/01/2024 IVA" + " " * n + "X",
+        _grupos(CONCEPTO_ANTERIOR), _grupos(PATRON_CONCEPTO_SIN_TARJETA)),
+    "santander_total": (
+        lambda n: "TOTAL DEV LEY " + "1" * n + "X",
+        _grupos(TOTAL_ANTERIOR, "search"), _grupos(PATRON_IMPORTE_FINAL, "search")),
+    "itau_digitos": (
+        lambda n: "16 07 24 1234 A " + "1" * n,
+        separar_montos_anterior, separar_montos),
+    "itau_miles": (
+        lambda n: "16 07 24 1234 A 1" + ".234" * (n // 4),
+        separar_montos_anterior, separar_montos),
+    "cuotas_barras": (
+        lambda n: "COMPRA " + "A" * n,
+        _grupos(PARTES_CUOTA_ANTERIOR, "search"), _grupos(re.compile(_PATRON_PARTES_CUOTA), "search")),
+    "cuotas_token": (
+        lambda n: "A" * n + " 3",
+        _grupos(ULTIMO_TOKEN_ANTERIOR, "search"), _grupos(re.compile(_PATRON_ULTIMO_TOKEN), "search")),
+}
+
+
+def _por_linea(funcion, linea: str, repeticiones: int) -> float:
+    """Mediana del tiempo por línea, repitiendo la línea hasta CARACTERES_POR_MEDICION."""
+    lineas = [linea] * max(1, CARACTERES_POR_MEDICION // len(linea))
+
+    def procesar():
+        for l in lineas:
+            funcion(l)
+
+    return medir(procesar, repeticiones=repeticiones)["mediana"] / len(lineas)
+
+
+def _exponente(largos: list, tiempos: list) -> float:
+    return math.log(tiempos[-1] / tiempos[0]) / math.log(largos[-1] / largos[0])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo por línea de los patrones con líneas patológicas.")
+    parser.add_argument("--largos", type=int, nargs="+", default=[250, 500, 1000, 2000],
+                        help="Largos de línea (caracteres)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+    largos = sorted(args.largos)
+
+    resultados = {}
+    ok = True
+    print(f"{'caso':20} {'largo':>6} {'anterior':>14} {'actual':>14}", file=sys.stderr)
+    for caso, (generar, anterior, actual) in CASOS.items():
+        tiempos = {"anterior": [], "actual": []}
+        for largo in largos:
+            linea = generar(largo)
+            ok &= anterior(linea) == actual(linea)
+            tiempos["anterior"].append(_por_linea(anterior, linea, args.repeticiones))
+            tiempos["actual"].append(_por_linea(actual, linea, args.repeticiones))
+            print(f"{caso:20} {largo:>6} {tiempos['anterior'][-1] * 1e6:>11,.1f} us "
+                  f"{tiempos['actual'][-1] * 1e6:>11,.1f} us", file=sys.stderr)
+
+        exponentes = {version: _exponente(largos, t) for version, t in tiempos.items()} if len(largos) > 1 else {}
+        ok &= exponentes.get("actual", 1.0) <= EXPONENTE_MAXIMO
+        resultados[caso] = {"largos": largos, "segundos_por_linea": tiempos, "exponentes": exponentes}
+        if exponentes:
+            print(f"{caso:20} {'k':>6} {exponentes['anterior']:>14.2f} {exponentes['actual']:>14.2f}",
+                  file=sys.stderr)
+
+    if not ok:
+        print("Las versiones no coinciden o la actual no es lineal", file=sys.stderr)
+
+    texto = json.dumps({"parametros": vars(args), "resultados": resultados}, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""
+Procesamiento de estados de cuenta por línea de comandos, sin servidor.
+
+Uso:
+    python -m cuotavista analizar DIRECTORIO [--salida DIR] [--formato csv|json|parquet]
+        [--procesos N] [--recursivo] [--banco brou|itau|santander]
+        [--passwords-archivo ARCHIVO]
+
+Procesa todos los .xls/.xlsx/.pdf del directorio en un pool de procesos,
+con los mismos parsers y el mismo análisis de cuotas que la web. Las
+contraseñas de los PDF Santander se toman de un archivo (una por línea) y
+de la variable de entorno CUOTAVISTA_PASSWORDS (separadas por comas); a
+cada PDF encriptado se le prueban todas en orden.
+
+Escribe en el directorio de salida:
+    movimientos.<formato>  todos los movimientos, con columnas archivo y banco
+    resumen.<formato>      una fila por archivo: estado, error, totales y segundos
+    proyeccion.<formato>   proyección combinada de cuotas mes a mes
+y muestra un reporte de tiempos por archivo.
+"""
+import argparse
+from multiprocessing import Pool
+import os
+import sys
+import time
+
+import pandas as pd
+
+from bancos.lotes import procesar_archivo, error_archivo, combinar_proyecciones, EXTENSIONES_LOTE
+from bancos.paralelo import inicializar_worker
+from bancos.procesamiento import BANCOS
+
+
+FORMATOS = ("csv", "json", "parquet")
+
+# Archivos más lentos que se listan en el reporte de tiempos
+MAX_LENTOS_REPORTE = 10
+
+
+def leer_passwords(archivo: str = None) -> list:
+    """Contraseñas de --passwords-archivo (una por línea) y de CUOTAVISTA_PASSWORDS."""
+    passwords = []
+    if archivo:
+        with open(archivo, encoding="utf-8") as f:
+            passwords.extend(linea.strip() for linea in f)
+    passwords.extend(os.environ.get("CUOTAVISTA_PASSWORDS", "").split(","))
+
+    # Sin vacíos ni repetidas, respetando el orden
+    return list(dict.fromkeys(password.strip() for password in passwords if password.strip()))
+
+
+def listar_archivos(directorio: str, recursivo: bool = False) -> list:
+    """Rutas de los estados de cuenta del directorio, ordenadas."""
+    if recursivo:
+        rutas = [
+            os.path.join(raiz, nombre)
+            for raiz, _, nombres in os.walk(directorio)
+            for nombre in nombres
+        ]
+    else:
+        rutas = [os.path.join(directorio, nombre) for nombre in os.listdir(directorio)]
+
+    return sorted(
+        ruta for ruta in rutas
+        if os.path.isfile(ruta)
+        and ruta.lower().endswith(EXTENSIONES_LOTE)
+        and not os.path.basename(ruta).startswith(".")
+    )
+
+
+def _procesar_ruta(args) -> tuple:
+    """
+    Worker del pool: procesa un archivo y devuelve (fila_resumen, movimientos, importe_mes).
+
+    Los errores quedan en la fila del resumen; movimientos e importe_mes son None.
+    """
+    ruta, passwords, banco = args
+    inicio = time.perf_counter()
+    fila = {"archivo": ruta, "banco": banco}
+
+    try:
+        with open(ruta, "rb") as f:
+            file_bytes = f.read()
+        fila["banco"], resultado = procesar_archivo(os.path.basename(ruta), file_bytes, passwords, banco)
+    except Exception as e:
+        error = error_archivo(e)
+        fila.update(estado="error", error_type=error["error_type"], error=error["message"],
+                    segundos=time.perf_counter() - inicio)
+        return fila, None, None
+
+    datos = resultado.a_dict(limite=0)
+    fila.update(estado="ok", error_type=None, error=None,
+                movimientos=len(resultado.movimientos), **datos["totales"])
+
+    movimientos = resultado.movimientos.drop(columns=["cuotas_pagas", "cuotas_totales"], errors="ignore")
+    movimientos.insert(0, "banco", fila["banco"])
+    movimientos.insert(0, "archivo", ruta)
+
+    fila["segundos"] = time.perf_counter() - inicio
+    return fila, movimientos, resultado.importes_mes
+
+
+def guardar(df: pd.DataFrame, ruta_base: str, formato: str) -> str:
+    """Guarda el DataFrame en el formato pedido y devuelve la ruta."""
+    ruta = f"{ruta_base}.{formato}"
+    if formato == "csv":
+        df.to_csv(ruta, index=False)
+    elif formato == "json":
+        df.to_json(ruta, orient="records", force_ascii=False, indent=1)
+    else:
+        df.to_parquet(ruta, index=False)
+    return ruta
+
+
+def reporte_tiempos(resumen: pd.DataFrame, segundos_total: float) -> str:
+    """Reporte de tiempos por archivo (totales, percentiles y los más lentos)."""
+    tiempos = resumen["segundos"]
+    errores = int((resumen["estado"] == "error").sum())
+    lineas = [
+        f"Archivos: {len(resumen)} ({errores} con error) en {segundos_total:.2f} s "
+        f"({len(resumen) / segundos_total:.1f} archivos/s)",
+        f"Por archivo: media {tiempos.mean():.3f} s, p50 {tiempos.quantile(0.5):.3f} s, "
+        f"p95 {tiempos.quantile(0.95):.3f} s, máx {tiempos.max():.3f} s",
+    ]
+
+    for banco, tiempos_banco in resumen.groupby(resumen["banco"].fillna("?"))["segundos"]:
+        lineas.append(f"  {banco}: {len(tiempos_banco)} archivos, media {tiempos_banco.mean():.3f} s")
+
+    lineas.append("Más lentos:")
+    for fila in resumen.nlargest(MAX_LENTOS_REPORTE, "segundos").itertuples():
+        lineas.append(f"  {fila.segundos:.3f} s  {fila.archivo}")
+
+    return "\n".join(lineas)
+
+
+def analizar(args) -> int:
+    """Comando analizar: procesa el directorio y escribe las salidas."""
+    if args.formato == "parquet":
+        try:
+            pd.io.parquet.get_engine("auto")
+        except ImportError:
+            print("El formato parquet requiere pyarrow o fastparquet (pip install pyarrow).", file=sys.stderr)
+            return 2
+
+    rutas = listar_archivos(args.directorio, args.recursivo)
+    if not rutas:
+        print(f"No se encontraron estados de cuenta en {args.directorio}.", file=sys.stderr)
+        return 1
+
+    passwords = leer_passwords(args.passwords_archivo)
+    tareas = [(ruta, passwords, args.banco) for ruta in rutas]
+
+    inicio = time.perf_counter()
+    filas, movimientos, importes = [], [], []
+
+    # Los archivos se reparten de a varios por proceso para no pagar el IPC de a uno
+    chunksize = max(1, min(16, len(tareas) // (args.procesos * 4)))
+    with Pool(processes=args.procesos, initializer=inicializar_worker) as pool:
+        for i, (fila, df, importe_mes) in enumerate(pool.imap(_procesar_ruta, tareas, chunksize), 1):
+            filas.append(fila)
+            if df is not None:
+                movimientos.append(df)
+                importes.append(importe_mes)
+            if args.progreso and (i % 100 == 0 or i == len(tareas)):
+                print(f"{i}/{len(tareas)}", file=sys.stderr)
+
+    segundos_total = time.perf_counter() - inicio
+
+    os.makedirs(args.salida, exist_ok=True)
+    resumen = pd.DataFrame(filas)
+    proyeccion = pd.DataFrame(combinar_proyecciones(importes))
+    salidas = [
+        guardar(resumen, os.path.join(args.salida, "resumen"), args.formato),
+        guardar(proyeccion, os.path.join(args.salida, "proyeccion"), args.formato),
+    ]
+    if movimientos:
+        salidas.append(guardar(
+            pd.concat(movimientos, ignore_index=True),
+            os.path.join(args.salida, "movimientos"),
+            args.formato,
+        ))
+
+    print(reporte_tiempos(resumen, segundos_total))
+    for ruta in salidas:
+        print(f"Guardado: {ruta}")
+
+    return 0 if (resumen["estado"] == "ok").any() else 1
+
+
+def entero_positivo(valor: str) -> int:
+    """Tipo de argparse para --procesos: entero mayor o igual a 1."""
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{valor}' no es un número entero")
+    if numero < 1:
+        raise argparse.ArgumentTypeError("tiene que ser al menos 1")
+    return numero
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="cuotavista", description="Análisis de estados de cuenta por lote.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_analizar = comandos.add_parser("analizar", aliases=["analyze"],
+                                     help="Procesa un directorio de estados de cuenta.")
+    p_analizar.add_argument("directorio", help="Directorio con los .xls/.xlsx/.pdf")
+    p_analizar.add_argument("--salida", "-o", default="salida_cuotavista", help="Directorio de salida")
+    p_analizar.add_argument("--formato", "-f", choices=FORMATOS, default="csv")
+    p_analizar.add_argument("--procesos", "-p", type=entero_positivo, default=os.cpu_count() or 1,
+                            help="Procesos en paralelo (por defecto, uno por CPU)")
+    p_analizar.add_argument("--recursivo", "-r", action="store_true", help="Incluir subdirectorios")
+    p_analizar.add_argument("--banco", choices=list(BANCOS), help="Forzar el banco de todos los archivos")
+    p_analizar.add_argument("--passwords-archivo", help="Contraseñas Santander, una por línea")
+    p_analizar.add_argument("--progreso", action="store_true", help="Mostrar el avance cada 100 archivos")
+    p_analizar.set_defaults(funcion=analizar)
+
+    args = parser.parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())